@@ -1,6 +1,6 @@
 import streamlit as st
 from utils import extract_text_from_pdf
-from nlp_engine import calculate_role_fit_score, analyze_skill_gaps, get_sentence_scores, get_recruiter_metrics
+from nlp_engine import parse_documents, calculate_role_fit_score, analyze_skill_gaps, get_sentence_scores, get_recruiter_metrics
 from genai_engine import generate_achievement, get_sub_scores, generate_project_idea
 import plotly.graph_objects as go
 from annotated_text import annotated_text
@@ -54,20 +54,23 @@ if st.button("Analyze Resume"):
                     if len(jd_text.split()) < 50:
                         st.warning("⚠️ Your Job Description is very short. For the best Role Fit Score, paste the FULL job description (responsibilities, requirements, etc.).")
 
+                    # Parse + encode each document once; every metric below reuses it
+                    resume_doc, jd_doc = parse_documents([resume_text, jd_text])
+                    
                     # Role Fit Score
-                    score = calculate_role_fit_score(resume_text, jd_text)
+                    score = calculate_role_fit_score(resume_doc, jd_doc)
                     
                     # Sub-Scores (Gemini)
                     sub_scores = get_sub_scores(resume_text, jd_text, api_key, selected_model)
                     
                     # Skill Gap Analysis
-                    missing_skills = analyze_skill_gaps(resume_text, jd_text)
+                    missing_skills = analyze_skill_gaps(resume_doc, jd_doc)
                     
                     # Recruiter Metrics
-                    recruiter_metrics = get_recruiter_metrics(resume_text)
+                    recruiter_metrics = get_recruiter_metrics(resume_doc)
                     
                     # Heatmap Data
-                    sentence_scores = get_sentence_scores(resume_text, jd_text)
+                    sentence_scores = get_sentence_scores(resume_doc, jd_doc)
                     
                     # Display Results
                     st.divider()
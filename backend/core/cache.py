@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Two-tier cache for JSON-serializable results.
+
+    Tier 1 is a bounded in-memory LRU with a TTL. Tier 2 is an optional SQLite
+    table (pass `db_path`) that survives restarts; disk hits are promoted back
+    into memory. Hit/miss counters are available via `stats()`.
+
+    `on_evict(key)` is called when an entry is lost without delete(): it
+    expired, or it fell out of the memory tier and there is no disk tier.
+    """
+
+    def __init__(self, max_size=256, ttl=3600, db_path=None, table="results", on_evict=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.table = table
+        self.on_evict = on_evict
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+                if self._db is None:
+                    self._evicted(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._put_memory(key, value, row[1])
+                    self.disk_hits += 1
+                    return value
+                if row is not None:
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._evicted(key)
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+
+    def delete(self, key):
+        with self._lock:
+            found = self._memory.pop(key, None) is not None
+            if self._db is not None:
+                cursor = self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._db.commit()
+                found = found or cursor.rowcount > 0
+            return found
+
+    def _put_memory(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            evicted, _ = self._memory.popitem(last=False)
+            if self._db is None:
+                self._evicted(evicted)
+
+    def _evicted(self, key):
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._memory)
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# google.generativeai is imported on first use: it is the single most expensive
+# import in the backend and would otherwise be paid on every cold start.
+
+# Send Gemini requests somewhere else, e.g. the fake server in
+# benchmarks/fake_gemini.py ("http://127.0.0.1:8765"). Uses the REST transport.
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+# Idle clients are dropped after this many seconds
+CLIENT_IDLE_TTL = 600
+MAX_CLIENTS = 64
+
+
+class ClientPool:
+    """
+    Registry of Gemini clients keyed by API key and (API key, model name).
+
+    `genai.configure` is process-global, so concurrent requests with different
+    keys could end up using each other's credentials. Here every key gets its own
+    GenerativeServiceClient (and therefore its own HTTP connections), and models
+    are bound to that client explicitly. Safe to use from threads and coroutines.
+    """
+
+    def __init__(self, idle_ttl=CLIENT_IDLE_TTL, max_size=MAX_CLIENTS):
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self._clients = OrderedDict()  # api_key -> (client, last_used)
+        self._models = OrderedDict()   # (api_key, model_name) -> (model, last_used)
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        # Entries are kept in least-recently-used order
+        for entries in (self._clients, self._models):
+            while entries:
+                _, last_used = next(iter(entries.values()))
+                if now - last_used > self.idle_ttl or len(entries) > self.max_size:
+                    entries.popitem(last=False)
+                else:
+                    break
+        # A model is only reused while its key's client is still pooled
+        for key in [k for k in self._models if k[0] not in self._clients]:
+            del self._models[key]
+
+    def _client_locked(self, api_key, now):
+        entry = self._clients.get(api_key)
+        if entry is None:
+            import google.ai.generativelanguage as glm
+            if GEMINI_API_ENDPOINT:
+                client = glm.GenerativeServiceClient(
+                    client_options={"api_key": api_key, "api_endpoint": GEMINI_API_ENDPOINT}, transport="rest"
+                )
+            else:
+                client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+        else:
+            client = entry[0]
+        self._clients[api_key] = (client, now)
+        self._clients.move_to_end(api_key)
+        return client
+
+    def get_client(self, api_key):
+        with self._lock:
+            now = time.monotonic()
+            client = self._client_locked(api_key, now)
+            self._evict(now)
+            return client
+
+    def get_model(self, api_key, model_name):
+        key = (api_key, model_name)
+        with self._lock:
+            now = time.monotonic()
+            entry = self._models.get(key)
+            if entry is None:
+                import google.generativeai as genai
+                model = genai.GenerativeModel(model_name)
+                model._client = self._client_locked(api_key, now)
+            else:
+                model = entry[0]
+                # Keep the shared client warm as well
+                self._client_locked(api_key, now)
+            self._models[key] = (model, now)
+            self._models.move_to_end(key)
+            self._evict(now)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._models.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+
+_pool = ClientPool()
+
+
+def get_client(api_key):
+    """Returns the shared GenerativeServiceClient for `api_key`."""
+    return _pool.get_client(api_key)
+
+
+def get_model(api_key, model_name):
+    """Returns a GenerativeModel bound to the client for `api_key`."""
+    return _pool.get_model(api_key, model_name)
@@ -0,0 +1,173 @@
+import math
+import os
+import re
+
+# Prompt budgets (estimated tokens) for the resume and JD excerpts sent to Gemini
+CONTEXT_RESUME_TOKENS = int(os.getenv("CONTEXT_RESUME_TOKENS", "450"))
+CONTEXT_JD_TOKENS = int(os.getenv("CONTEXT_JD_TOKENS", "350"))
+# "lexical" (word overlap, no network) or "semantic" (embedding similarity via
+# the configured embedding provider, cached in the embedding store)
+CONTEXT_RANKING = os.getenv("CONTEXT_RANKING", "lexical")
+
+# Gemini averages roughly four characters per token on English prose
+CHARS_PER_TOKEN = 4
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "was", "we", "were", "will",
+    "with", "you", "your", "i", "my", "me", "us", "all", "any", "who", "what",
+}
+
+# Words that mark requirements in a JD (kept ahead of company blurb)
+REQUIREMENT_CUES = {
+    "required", "requirements", "must", "experience", "proficiency", "proficient", "knowledge",
+    "skills", "years", "degree", "familiarity", "qualifications", "responsibilities", "preferred",
+}
+
+# Lines that cost tokens but say nothing about fit
+BOILERPLATE = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"                  # e-mail addresses
+    r"|https?://\S+|www\.\S+|linkedin\.com/\S*"  # links
+    r"|\+?\d[\d\s().-]{7,}\d"                    # phone numbers
+    r"|equal opportunity|all qualified applicants|without regard to",
+    re.IGNORECASE,
+)
+
+# Section headings: dropped as units, but kept as the label of the short lines under them
+HEADING = re.compile(
+    r"(?:professional |work |technical |core |key )?"
+    r"(?:summary|profile|objective|experience|employment|education|skills|competencies|projects|"
+    r"certifications|awards|publications|interests|languages|tools|technologies|references|"
+    r"requirements|responsibilities|qualifications|about(?: us)?)(?: history)?\s*:?",
+    re.IGNORECASE,
+)
+# Short lines (skills, tools, one-word bullets) are merged under their heading
+# into units of at most this many estimated tokens
+GROUP_TOKENS = 40
+
+UNIT_SPLIT = re.compile(r"\n+|(?<=[.!?;])\s+|\s+[•▪●◦]\s*")
+WORD = re.compile(r"[a-z0-9+#]+(?:[.-][a-z0-9+#]+)*")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def content_words(text):
+    return {w for w in WORD.findall(text.lower()) if w not in STOP_WORDS and len(w) > 1}
+
+
+def split_units(text):
+    """
+    Splits a document into packable units: lines, sentences and bullets.
+    Contact/boilerplate lines and bare headings are dropped; runs of short
+    lines (a skills list, one tool per line) are merged into units labelled
+    with their heading, e.g. "Skills: Python, Docker, Go".
+    """
+    units, heading, group = [], None, []
+
+    def flush():
+        if group:
+            items = ", ".join(group)
+            units.append(f"{heading}: {items}" if heading else items)
+            group.clear()
+
+    for unit in UNIT_SPLIT.split(text or ""):
+        unit = " ".join(unit.strip(" \t-*").split())
+        if not unit or BOILERPLATE.search(unit):
+            continue
+        if len(unit.split()) >= 4:
+            flush()
+            units.append(unit)
+        elif HEADING.fullmatch(unit) or unit.endswith(":"):
+            flush()
+            heading = unit.rstrip(" :").title() if unit.isupper() else unit.rstrip(" :")
+        else:
+            group.append(unit.rstrip(",;"))
+            if estimate_tokens(", ".join(group)) >= GROUP_TOKENS:
+                flush()
+    flush()
+    return units
+
+
+def lexical_relevance(units, other_text, cues=()):
+    """
+    Share of each unit's content words that also occur in the other document,
+    damped so that long units don't win on length alone, plus a small bonus
+    per requirement cue.
+    """
+    other = content_words(other_text)
+    scores = []
+    for unit in units:
+        words = content_words(unit)
+        if not words:
+            scores.append(0.0)
+            continue
+        overlap = len(words & other) / math.sqrt(len(words))
+        scores.append(overlap + 0.5 * len(words & set(cues)))
+    return scores
+
+
+def semantic_relevance(units, other_text, api_key=None):
+    from .nlp import embed_texts
+    from .similarity import cosine_matrix
+
+    embeddings = embed_texts(units + [other_text], api_key=api_key)
+    if not embeddings or any(not e for e in embeddings):
+        return None
+    return cosine_matrix(embeddings[:-1], embeddings[-1])[:, 0].tolist()
+
+
+def pack_context(text, other_text="", budget=CONTEXT_RESUME_TOKENS, cues=(), ranking=CONTEXT_RANKING,
+                 api_key=None):
+    """
+    Packs the most relevant parts of `text` into `budget` estimated tokens.
+
+    Units are ranked by similarity to `other_text` (plus `cues`), then added
+    greedily while they fit, and finally emitted in their original order so
+    the excerpt still reads like the document. Returns a dict with the packed
+    "text", the "tokens" it uses, the "total_tokens" of the whole document
+    and how many units were kept.
+    """
+    units = split_units(text)
+    total_tokens = estimate_tokens(text)
+    scores = None
+    if ranking == "semantic" and other_text:
+        scores = semantic_relevance(units, other_text, api_key)
+    if scores is None:
+        scores = lexical_relevance(units, other_text, cues) if other_text or cues else [0.0] * len(units)
+
+    # Highest score first; ties keep document order (earlier units win)
+    order = sorted(range(len(units)), key=lambda i: (-scores[i], i))
+    kept, used = [], 0
+    for i in order:
+        cost = estimate_tokens(units[i]) + 1  # +1 for the separating newline
+        if used + cost <= budget:
+            kept.append(i)
+            used += cost
+
+    kept.sort()
+    packed = "\n".join(units[i] for i in kept)
+    if not kept and units:
+        # Even the best unit is over budget (e.g. a document without line
+        # breaks): cut it at the last whole word that fits
+        packed = units[order[0]][:budget * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+    return {
+        "text": packed,
+        "tokens": estimate_tokens(packed),
+        "total_tokens": total_tokens,
+        "units_kept": len(kept),
+        "units_total": len(units),
+    }
+
+
+def pack_pair(resume_text, jd_text, resume_budget=CONTEXT_RESUME_TOKENS, jd_budget=CONTEXT_JD_TOKENS,
+              api_key=None):
+    """
+    Packs a resume against a JD and vice versa. The JD side also favours
+    requirement sentences, so skills the resume lacks still make the cut.
+    Returns (resume context, JD context) as pack_context dicts.
+    """
+    resume = pack_context(resume_text, jd_text, resume_budget, api_key=api_key)
+    jd = pack_context(jd_text, resume_text, jd_budget, cues=REQUIREMENT_CUES, api_key=api_key)
+    return resume, jd
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Persistent by default; /tmp is also the only writable path on serverless hosts
+EMBEDDING_CACHE_DB = os.getenv(
+    "EMBEDDING_CACHE_DB", os.path.join(tempfile.gettempdir(), "resume_fixer_embeddings.db")
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+EMBEDDING_CACHE_QUANTIZE = os.getenv("EMBEDDING_CACHE_QUANTIZE", "0") == "1"
+# A hit only rewrites last_used when it is older than this (seconds); LRU order
+# at this granularity is plenty for eviction and keeps hot lookups read-only
+EMBEDDING_CACHE_TOUCH_INTERVAL = float(os.getenv("EMBEDDING_CACHE_TOUCH_INTERVAL", "600"))
+
+# Keys per "IN (...)" query, below SQLite's bound-parameter limit
+QUERY_CHUNK = 500
+
+
+class EmbeddingStore:
+    """
+    SQLite-backed embedding store keyed by (model, task_type, sha256(text)).
+
+    Vectors are stored as compact float32 blobs, or int8 with a per-vector
+    scale when `quantize` is set (4x smaller, ~1% cosine error). The table is
+    capped at `max_entries`; the least recently used rows are evicted first.
+
+    get_many/put_many handle a whole batch in one query and one transaction;
+    get/put are single-text shortcuts.
+    """
+
+    def __init__(self, db_path=EMBEDDING_CACHE_DB, max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                 quantize=EMBEDDING_CACHE_QUANTIZE, touch_interval=EMBEDDING_CACHE_TOUCH_INTERVAL):
+        self.max_entries = max_entries
+        self.quantize = quantize
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, dtype TEXT NOT NULL, scale REAL NOT NULL, "
+            "vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        # Rows in the table, tracked so inserts don't have to count them
+        (self._count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, task_type, text):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}|{task_type}|{digest}"
+
+    @staticmethod
+    def _encode(vector, quantize):
+        vector = np.asarray(vector, dtype=np.float32)
+        if not quantize:
+            return "float32", 1.0, vector.tobytes()
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        return "int8", scale, np.round(vector / scale).astype(np.int8).tobytes()
+
+    @staticmethod
+    def _decode(dtype, scale, blob):
+        if dtype == "int8":
+            return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * scale
+        return np.frombuffer(blob, dtype=np.float32).copy()
+
+    def get(self, model, task_type, text):
+        return self.get_many(model, task_type, [text])[0]
+
+    def put(self, model, task_type, text, vector):
+        self.put_many(model, task_type, [(text, vector)])
+
+    def _select(self, columns, keys):
+        for start in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[start:start + QUERY_CHUNK]
+            yield from self._db.execute(
+                f"SELECT {columns} FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+
+    def get_many(self, model, task_type, texts):
+        """Returns the cached vector for each text, or None where there is none."""
+        keys = [self.make_key(model, task_type, text) for text in texts]
+        now = time.time()
+        with self._lock:
+            rows = {row[0]: row[1:] for row in
+                    self._select("key, dtype, scale, vector, last_used", list(dict.fromkeys(keys)))}
+            stale = [(now, key) for key, row in rows.items() if row[3] < now - self.touch_interval]
+            if stale:
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", stale)
+                self._db.commit()
+            hits = sum(key in rows for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [self._decode(*rows[key][:3]) if key in rows else None for key in keys]
+
+    def put_many(self, model, task_type, items):
+        """Stores (text, vector) pairs in one transaction."""
+        now = time.time()
+        rows = {}
+        for text, vector in items:
+            key = self.make_key(model, task_type, text)
+            rows[key] = (key, *self._encode(vector, self.quantize), now)
+        if not rows:
+            return
+        with self._lock:
+            existing = sum(1 for _ in self._select("key", list(rows)))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, scale, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows.values(),
+            )
+            self._count += len(rows) - existing
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self._count <= self.max_entries:
+            return
+        # Recount first: other worker processes may share the database file
+        (self._count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if self._count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (self._count - self.max_entries,),
+            )
+            self._count = self.max_entries
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            return {"entries": count, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """Returns the process-wide EmbeddingStore, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = EmbeddingStore()
+            except sqlite3.Error as e:
+                # Unwritable location: fall back to a process-local store
+                print(f"Embedding cache unavailable at {EMBEDDING_CACHE_DB}: {e}")
+                _store = EmbeddingStore(db_path=":memory:")
+        return _store
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import threading
+from typing import List
+
+import numpy as np
+
+# Which provider the FastAPI backend uses: "gemini", "local" or "hashing"
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" or "onnx" (needs sentence-transformers >= 3.2 with the onnx extra)
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")
+LOCAL_EMBEDDING_QUANTIZE = os.getenv("LOCAL_EMBEDDING_QUANTIZE", "0") == "1"
+
+
+class EmbeddingProvider:
+    """
+    Batched text embedding interface.
+
+    `encode` returns a float32 array of shape (len(texts), dim) and raises on
+    failure. `embed` is the forgiving variant used by the scoring code: it
+    returns one list per text, with an empty list where embedding failed.
+    """
+
+    name = "base"
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        try:
+            return self.encode(texts).tolist()
+        except Exception as e:
+            print(f"{self.name} embedding error: {e}")
+            return [[] for _ in texts]
+
+
+class GeminiProvider(EmbeddingProvider):
+    """Gemini `text-embedding-004` via batch_embed_contents, backed by the embedding store."""
+
+    name = "gemini"
+
+    def __init__(self, api_key=None, model="models/text-embedding-004"):
+        self.api_key = api_key
+        self.model = model
+
+    def embed(self, texts):
+        from .nlp import get_gemini_embeddings
+        return get_gemini_embeddings(texts, model=self.model, api_key=self.api_key)
+
+    def encode(self, texts):
+        embeddings = self.embed(texts)
+        if any(not e for e in embeddings):
+            raise RuntimeError("Gemini returned no embedding for some texts")
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+
+class LocalProvider(EmbeddingProvider):
+    """
+    sentence-transformers model on the local CPU (no network round trip).
+    `backend="onnx"` runs it through ONNX Runtime; `quantize=True` uses int8
+    weights (the qint8 ONNX export, or dynamic quantization of the Linear
+    layers for the torch backend).
+    """
+
+    name = "local"
+    _models = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, backend=LOCAL_EMBEDDING_BACKEND,
+                 quantize=LOCAL_EMBEDDING_QUANTIZE, batch_size=64):
+        self.model_name = model_name
+        self.backend = backend
+        self.quantize = quantize
+        self.batch_size = batch_size
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "onnx":
+            model_kwargs = {"file_name": "onnx/model_qint8_avx512.onnx"} if self.quantize else None
+            return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+
+        model = SentenceTransformer(self.model_name, device="cpu")
+        if self.quantize:
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @property
+    def model(self):
+        # Models are shared by every provider instance with the same configuration
+        key = (self.model_name, self.backend, self.quantize)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._load()
+            return self._models[key]
+
+    def encode(self, texts):
+        embeddings = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class HashingProvider(EmbeddingProvider):
+    """
+    Deterministic hashing-vectorizer embeddings (signed feature hashing of
+    words and word bigrams). No model and no network: meant for offline tests
+    and benchmarks, not for quality.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        words = re.findall(r"[a-z0-9+#]+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(text) for text in texts])
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "local": LocalProvider,
+    "hashing": HashingProvider,
+}
+
+
+def get_provider(name=None, api_key=None):
+    """Returns the configured provider (EMBEDDING_PROVIDER unless `name` is given)."""
+    name = name or EMBEDDING_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}' (expected one of {', '.join(PROVIDERS)})")
+    if name == "gemini":
+        return GeminiProvider(api_key=api_key)
+    return PROVIDERS[name]()
@@ -0,0 +1,213 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Upload/extraction limits
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+# Uploads larger than this are spooled to a temp file instead of kept in memory
+SPOOL_THRESHOLD = int(os.getenv("PDF_SPOOL_THRESHOLD", str(1024 * 1024)))
+# Worker processes for page-parallel extraction (0 = always extract inline).
+# Off by default: serverless hosts (Vercel, AWS Lambda) can't run a process pool.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0"))
+# Workers are started from a clean process, never forked from the (threaded) server
+PDF_START_METHOD = os.getenv(
+    "PDF_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+# Documents with fewer pages than this are not worth the process hop
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+# "fast" (plain text, no layout analysis), "standard" or "layout"
+PDF_EXTRACT_MODE = os.getenv("PDF_EXTRACT_MODE", "standard")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PDFTooLarge(ValueError):
+    pass
+
+
+class SpooledPDF:
+    """
+    An uploaded PDF held in memory, or in a named temp file once it grows past
+    SPOOL_THRESHOLD. The sha256 digest is computed while spooling so callers
+    can key caches without keeping the bytes around.
+    """
+
+    def __init__(self, data=None, path=None, digest=None, size=0):
+        self.data = data
+        self.path = path
+        self.digest = digest
+        self.size = size
+
+    @property
+    def source(self):
+        # Something pdfplumber.open (and a worker process) can take
+        return self.path if self.path else self.data
+
+    def close(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+
+async def spool_upload(upload_file, max_bytes=MAX_PDF_BYTES, threshold=SPOOL_THRESHOLD):
+    """Streams a FastAPI UploadFile into a SpooledPDF, enforcing `max_bytes`."""
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    temp = None
+    size = 0
+    try:
+        while True:
+            chunk = await upload_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise PDFTooLarge(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+            digest.update(chunk)
+            if temp is None and size > threshold:
+                temp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                temp.write(buffer.getvalue())
+                buffer = None
+            if temp is not None:
+                temp.write(chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        if temp is not None:
+            temp.close()
+            os.unlink(temp.name)
+        raise
+
+    if temp is not None:
+        temp.close()
+        return SpooledPDF(path=temp.name, digest=digest.hexdigest(), size=size)
+    return SpooledPDF(data=buffer.getvalue(), digest=digest.hexdigest(), size=size)
+
+
+def _open(source, pages=None):
+    # Imported on first use so endpoints that never parse a PDF don't load it
+    import pdfplumber
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return pdfplumber.open(source, pages=pages)
+
+
+def _page_text(page, mode):
+    if mode == "fast":
+        return page.extract_text_simple()
+    if mode == "layout":
+        return page.extract_text(layout=True)
+    return page.extract_text()
+
+
+def _extract_pages(source, page_numbers, mode):
+    # Runs in a worker process; page_numbers are 1-based
+    with _open(source, pages=page_numbers) as pdf:
+        return [_page_text(page, mode) for page in pdf.pages]
+
+
+_pool = None
+_pool_disabled = False
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the shared worker pool, or None if it is off or can't run here."""
+    global _pool, _pool_disabled
+    with _pool_lock:
+        if _pool is None and PDF_WORKERS > 0 and not _pool_disabled:
+            try:
+                context = multiprocessing.get_context(PDF_START_METHOD)
+                if PDF_START_METHOD == "forkserver":
+                    # Also hands the server our sys.path, so workers can import this module
+                    context.set_forkserver_preload([__name__])
+                _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+            except (OSError, ValueError, NotImplementedError, ImportError) as e:
+                # e.g. no POSIX semaphores (AWS Lambda): extract inline from now on
+                print(f"PDF worker pool unavailable, extracting inline: {e}")
+                _pool_disabled = True
+        return _pool
+
+
+def _discard_pool(pool, error):
+    # A broken pool (worker killed) is replaced on next use; one that can't start workers is not
+    global _pool, _pool_disabled
+    print(f"PDF worker pool failed, extracting inline: {error!r}")
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_disabled = not isinstance(error, BrokenProcessPool)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_text(source, mode=PDF_EXTRACT_MODE, max_pages=MAX_PDF_PAGES, workers=PDF_WORKERS):
+    """
+    Extracts text from a PDF (bytes, path, file object or SpooledPDF).
+    Only the first `max_pages` pages are read. Long documents are split into
+    page ranges and extracted in parallel by the worker pool.
+    """
+    if isinstance(source, SpooledPDF):
+        source = source.source
+    if hasattr(source, "read"):
+        source = source.read()
+
+    with _open(source) as pdf:
+        page_count = len(pdf.pages)
+        if page_count > max_pages:
+            print(f"PDF has {page_count} pages, extracting the first {max_pages}")
+        page_count = min(page_count, max_pages)
+
+        pool = get_pool() if workers > 0 else None
+        if pool is None or page_count < PARALLEL_MIN_PAGES:
+            texts = [_page_text(page, mode) for page in pdf.pages[:page_count]]
+            return _join(texts)
+
+    numbers = list(range(1, page_count + 1))
+    step = -(-page_count // workers)  # ceil division
+    try:
+        futures = [
+            pool.submit(_extract_pages, source, numbers[i:i + step], mode)
+            for i in range(0, page_count, step)
+        ]
+        return _join([text for future in futures for text in future.result()])
+    except (BrokenProcessPool, OSError) as e:
+        _discard_pool(pool, e)
+        return extract_text(source, mode=mode, max_pages=max_pages, workers=0)
+
+
+def _extract_document(source, mode, max_pages):
+    # Whole-document extraction inside a worker (used for batches)
+    try:
+        return extract_text(source, mode=mode, max_pages=max_pages, workers=0)
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return None
+
+
+def extract_many(sources, mode=PDF_EXTRACT_MODE, max_pages=MAX_PDF_PAGES):
+    """Extracts several PDFs, one document per worker process. Unreadable ones give None."""
+    pool = get_pool()
+    if pool is None or len(sources) < 2:
+        return [_extract_document(source, mode, max_pages) for source in sources]
+    sources = [s.source if isinstance(s, SpooledPDF) else s for s in sources]
+    try:
+        return list(pool.map(_extract_document, sources, [mode] * len(sources), [max_pages] * len(sources)))
+    except (BrokenProcessPool, OSError) as e:
+        _discard_pool(pool, e)
+        return [_extract_document(source, mode, max_pages) for source in sources]
+
+
+def _join(texts):
+    # One join instead of repeated `text +=` (quadratic on long documents)
+    parts = [text for text in texts if text]
+    return "\n".join(parts) + "\n" if parts else ""
@@ -1,89 +1,351 @@
-import google.generativeai as genai
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .scheduler import generate_content, stream_content
+from .context import pack_pair, estimate_tokens
+
+# Batch bullet rewriting: input tokens per LLM call, bullets per call, and how
+# many calls run at once (the scheduler still applies its own limits)
+ACHIEVEMENT_PACK_TOKENS = int(os.getenv("ACHIEVEMENT_PACK_TOKENS", "1200"))
+ACHIEVEMENT_PACK_SIZE = int(os.getenv("ACHIEVEMENT_PACK_SIZE", "10"))
+ACHIEVEMENT_CONCURRENCY = int(os.getenv("ACHIEVEMENT_CONCURRENCY", "4"))
+
+# Gemini failures are raised (see core.scheduler), never papered over with
+# made-up text or scores: the API turns them into 503s or degraded stages.
+
+ACHIEVEMENT_RULES = """
+        Rules:
+        1. Start with a strong action verb.
+        2. Quantify results where possible (add numbers/percentages).
+        3. Make it sound professional and impactful.
+        4. Keep it to 1-2 sentences max.
+"""
 
 def generate_achievement(bullet_point, job_title, api_key, model_name="gemini-2.0-flash-exp"):
     if not api_key:
         return "Please provide a valid API Key."
     
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = f"""
+    response = generate_content(api_key, model_name, achievement_prompt(bullet_point, job_title))
+    return response.text.strip()
+
+def achievement_prompt(bullet_point, job_title):
+    return f"""
         You are an expert Resume Writer.
         Rewrite the following resume bullet point using the STAR method (Situation, Task, Action, Result).
         Target Job Title: {job_title}
         Original Bullet Point: "{bullet_point}"
-        
-        Rules:
-        1. Start with a strong action verb.
-        2. Quantify results where possible (add numbers/percentages).
-        3. Make it sound professional and impactful.
-        4. Keep it to 1-2 sentences max.
+        {ACHIEVEMENT_RULES}
         """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating content: {e}"
+
+def stream_text(api_key, model_name, prompt):
+    """Yields text chunks as the model produces them (generate_content with stream=True)."""
+    response = stream_content(api_key, model_name, prompt)
+    try:
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. only finish/safety metadata)
+                continue
+            if text:
+                yield text
+    finally:
+        # Closed early (client went away): cancel the call instead of draining it
+        cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+        if cancel is not None:
+            cancel()
+
+def stream_achievement(bullet_point, job_title, api_key, model_name="gemini-2.0-flash-exp"):
+    if not api_key:
+        yield "Please provide a valid API Key."
+        return
+    yield from stream_text(api_key, model_name, achievement_prompt(bullet_point, job_title))
+
+# Sub-score categories as returned to clients, and their JSON schema field names
+SUB_SCORE_FIELDS = {
+    "Hard Skills": "hard_skills",
+    "Soft Skills": "soft_skills",
+    "Experience": "experience",
+    "Education": "education",
+}
+
+SUB_SCORES_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "integer"} for field in SUB_SCORE_FIELDS.values()},
+    "required": list(SUB_SCORE_FIELDS.values()),
+}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "missing_skills": {"type": "array", "items": {"type": "string"}},
+        "sub_scores": SUB_SCORES_SCHEMA,
+    },
+    "required": ["missing_skills", "sub_scores"],
+}
+
+GRADING_RUBRIC = """
+        Score each category from 0 to 100:
+        - hard_skills: Technical match
+        - soft_skills: Communication, Leadership, etc.
+        - experience: Years, Relevance
+        - education: Degree match
+"""
+
+SKILL_GAP_RULES = """
+        missing_skills: strictly TECHNICAL skills that are REQUIRED in the Job Description but MISSING from the Resume.
+        - Do not include soft skills (e.g., "communication", "leadership").
+        - Do not include generic terms (e.g., "development", "engineering").
+        - Use an empty list if no major skills are missing.
+"""
+
+
+def json_config(schema):
+    # Structured output: Gemini returns JSON matching `schema`, no prose or fences
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def parse_json_object(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model returned invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Model returned JSON that is not an object")
+    return data
+
+
+def parse_sub_scores(data):
+    """Validates the schema fields and maps them to the client-facing category names."""
+    if not isinstance(data, dict):
+        raise ValueError("sub_scores must be an object")
+    scores = {}
+    for category, field in SUB_SCORE_FIELDS.items():
+        value = data.get(field)
+        # bool is an int subclass, but true/false is not a score
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"sub_scores.{field} must be a number, got {value!r}")
+        if not 0 <= value <= 100:
+            raise ValueError(f"sub_scores.{field} out of range: {value}")
+        scores[category] = int(round(value))
+    return scores
+
+
+def parse_missing_skills(data):
+    if not isinstance(data, list) or not all(isinstance(skill, str) for skill in data):
+        raise ValueError("missing_skills must be a list of strings")
+    # Deduplicate case-insensitively, keeping the model's order
+    skills = {}
+    for skill in data:
+        skill = skill.strip()
+        if skill and skill.lower() not in skills:
+            skills[skill.lower()] = skill
+    return list(skills.values())
+
 
 def get_sub_scores(resume_text, jd_text, api_key, model_name="gemini-2.0-flash-exp"):
     if not api_key:
-        return {"Hard Skills": 0, "Soft Skills": 0, "Experience": 0, "Education": 0}
+        # Zeros would read as a real (terrible) grade; the caller marks the stage degraded
+        raise ValueError("A Gemini API key is required for the sub-scores")
     
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = f"""
+    resume, jd = pack_pair(resume_text, jd_text, api_key=api_key)
+    prompt = f"""
         You are an expert Resume Grader.
         Analyze the following Resume against the Job Description.
-        Provide a score from 0 to 100 for each of the following categories:
-        1. Hard Skills (Technical match)
-        2. Soft Skills (Communication, Leadership, etc.)
-        3. Experience (Years, Relevance)
-        4. Education (Degree match)
-        
-        Resume:
-        {resume_text[:2000]}... (truncated)
-        
-        Job Description:
-        {jd_text[:1000]}... (truncated)
+        {GRADING_RUBRIC}
+        Resume (most relevant excerpts):
+        {resume["text"]}
         
-        Return ONLY a valid JSON string in the following format:
-        {{
-            "Hard Skills": 85,
-            "Soft Skills": 70,
-            "Experience": 60,
-            "Education": 90
-        }}
+        Job Description (most relevant excerpts):
+        {jd["text"]}
         """
+    
+    # On the /api/analyze critical path: hedged when GEMINI_HEDGE_AFTER is set
+    response = generate_content(api_key, model_name, prompt, hedge=True,
+                                generation_config=json_config(SUB_SCORES_SCHEMA))
+    return parse_sub_scores(parse_json_object(response.text))
+
+def get_resume_analysis(resume_text, jd_text, api_key, model_name="gemini-2.0-flash-exp"):
+    """
+    Skill gaps and sub-scores from a single structured-output request, so the
+    resume and JD are sent (and paid for) once. Returns
+    {"missing_skills": [...], "sub_scores": {...}, "context_tokens": {...}};
+    raises ValueError if the response does not match ANALYSIS_SCHEMA.
+    """
+    if not api_key:
+        raise ValueError("A Gemini API key is required for the resume analysis")
+    
+    # Budgeted excerpts instead of the first N characters of each document
+    resume, jd = pack_pair(resume_text, jd_text, api_key=api_key)
+    prompt = f"""
+        You are an expert Resume Grader and Senior Technical Recruiter.
+        Analyze the following Resume against the Job Description.
+        {SKILL_GAP_RULES}
+        sub_scores:
+        {GRADING_RUBRIC}
+        Resume (most relevant excerpts):
+        {resume["text"]}
         
-        response = model.generate_content(prompt)
-        import json
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:-3]
-        return json.loads(text)
-    except Exception as e:
-        print(f"Error getting sub-scores: {e}")
-        return {"Hard Skills": 50, "Soft Skills": 50, "Experience": 50, "Education": 50}
+        Job Description (most relevant excerpts):
+        {jd["text"]}
+        """
+    
+    response = generate_content(api_key, model_name, prompt, hedge=True,
+                                generation_config=json_config(ANALYSIS_SCHEMA))
+    data = parse_json_object(response.text)
+    return {
+        "missing_skills": parse_missing_skills(data.get("missing_skills")),
+        "sub_scores": parse_sub_scores(data.get("sub_scores")),
+        "context_tokens": {
+            "resume": resume["tokens"], "resume_total": resume["total_tokens"],
+            "jd": jd["tokens"], "jd_total": jd["total_tokens"],
+        },
+    }
 
 def generate_project_idea(skill, api_key, model_name="gemini-2.0-flash-exp"):
+    # Callers should normally go through core.ideas, which caches ideas per skill
     if not api_key:
         return f"Build a project using {skill}."
     
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = f"""
+    response = generate_content(api_key, model_name, project_idea_prompt(skill))
+    return response.text.strip()
+
+def project_idea_prompt(skill):
+    return f"""
         You are a Career Coach.
         Suggest ONE specific, impressive project idea that a candidate can build to demonstrate the skill: "{skill}".
         Keep it concise (1 sentence).
         Example for SQL: "Build a Library Management System using MySQL to handle complex queries and transactions."
         """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Build a project using {skill}."
+
+def stream_project_idea(skill, api_key, model_name="gemini-2.0-flash-exp"):
+    if not api_key:
+        yield f"Build a project using {skill}."
+        return
+    yield from stream_text(api_key, model_name, project_idea_prompt(skill))
+
+def generate_project_ideas(skills, api_key, model_name="gemini-2.0-flash-exp"):
+    """One project idea per skill from a single structured-output call. Returns {position: idea}."""
+    items = json.dumps([{"id": i, "skill": skill} for i, skill in enumerate(skills)], ensure_ascii=False)
+    prompt = f"""
+        You are a Career Coach.
+        For EACH skill below, suggest ONE specific, impressive project idea that a candidate can build to demonstrate it.
+        Keep each idea concise (1 sentence) and return it with the skill's id.
+        Example for SQL: "Build a Library Management System using MySQL to handle complex queries and transactions."
+        Skills (JSON):
+        {items}
+        """
+    response = generate_content(api_key, model_name, prompt, generation_config=json_config(IDEAS_SCHEMA))
+    return parse_id_texts(response.text, set(range(len(skills))), "ideas")
+
+def id_text_schema(field):
+    # {field: [{"id": int, "text": str}, ...]}: lets batched outputs be matched to inputs by id
+    return {
+        "type": "object",
+        "properties": {
+            field: {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "integer"}, "text": {"type": "string"}},
+                    "required": ["id", "text"],
+                },
+            },
+        },
+        "required": [field],
+    }
+
+
+REWRITES_SCHEMA = id_text_schema("rewrites")
+IDEAS_SCHEMA = id_text_schema("ideas")
+
+
+def pack_bullets(bullets, budget=ACHIEVEMENT_PACK_TOKENS, max_size=ACHIEVEMENT_PACK_SIZE):
+    """Groups bullet indices into packs of at most `budget` estimated tokens and `max_size` bullets."""
+    packs, current, used = [], [], 0
+    for i, bullet in enumerate(bullets):
+        cost = estimate_tokens(bullet) + 8  # id and JSON framing
+        if current and (used + cost > budget or len(current) >= max_size):
+            packs.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_id_texts(text, ids, field):
+    """Maps the model's {id, text} items back to `ids`; unknown, duplicate or empty entries are ignored."""
+    items = parse_json_object(text).get(field)
+    if not isinstance(items, list):
+        raise ValueError(f"{field} must be a list")
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        item_id, value = item.get("id"), item.get("text")
+        if (isinstance(item_id, int) and not isinstance(item_id, bool) and item_id in ids
+                and item_id not in results and isinstance(value, str) and value.strip()):
+            results[item_id] = value.strip()
+    return results
+
+
+def rewrite_pack(bullets, job_title, api_key, model_name):
+    """One structured-output call for several bullets. Returns {position in `bullets`: rewrite}."""
+    items = json.dumps([{"id": i, "bullet": bullet} for i, bullet in enumerate(bullets)], ensure_ascii=False)
+    prompt = f"""
+        You are an expert Resume Writer.
+        Rewrite each of the following resume bullet points using the STAR method (Situation, Task, Action, Result).
+        Target Job Title: {job_title}
+        Bullet Points (JSON, rewrite each one separately and return it with the same id):
+        {items}
+        {ACHIEVEMENT_RULES}
+        """
+    response = generate_content(api_key, model_name, prompt, generation_config=json_config(REWRITES_SCHEMA))
+    return parse_id_texts(response.text, set(range(len(bullets))), "rewrites")
+
+
+def generate_achievements(bullets, job_title, api_key, model_name="gemini-2.0-flash-exp",
+                          pack_tokens=ACHIEVEMENT_PACK_TOKENS, pack_size=ACHIEVEMENT_PACK_SIZE):
+    """
+    Rewrites many bullets with a few LLM calls: bullets are packed by token
+    budget, the packs run concurrently, and every output is matched to its
+    input by id. A bullet the model skipped is retried on its own. Returns one
+    {"index", "original", "enhanced_text", "error"} dict per input bullet, so
+    one failed pack doesn't sink the rest.
+    """
+    results = [{"index": i, "original": bullet, "enhanced_text": None, "error": None}
+               for i, bullet in enumerate(bullets)]
+    todo = [i for i, bullet in enumerate(bullets) if bullet.strip()]
+    for i in set(range(len(bullets))) - set(todo):
+        results[i]["error"] = "Empty bullet point"
+    if not todo:
+        return results
+    if not api_key:
+        for i in todo:
+            results[i]["error"] = "Please provide a valid API Key."
+        return results
+
+    def run_pack(pack):
+        indices = [todo[j] for j in pack]
+        try:
+            rewrites = rewrite_pack([bullets[i] for i in indices], job_title, api_key, model_name)
+        except Exception as e:
+            for i in indices:
+                results[i]["error"] = str(e)
+            return
+        for position, i in enumerate(indices):
+            if position in rewrites:
+                results[i]["enhanced_text"] = rewrites[position]
+                continue
+            try:
+                results[i]["enhanced_text"] = generate_achievement(bullets[i], job_title, api_key, model_name)
+            except Exception as e:
+                results[i]["error"] = str(e)
+
+    packs = pack_bullets([bullets[i] for i in todo], pack_tokens, pack_size)
+    with ThreadPoolExecutor(max_workers=min(len(packs), ACHIEVEMENT_CONCURRENCY)) as executor:
+        list(executor.map(run_pack, packs))
+    return results
@@ -0,0 +1,151 @@
+import os
+import re
+
+from .cache import ResultCache
+from .genai import generate_project_idea, generate_project_ideas, stream_project_idea
+
+# A project idea depends only on (skill, model), so ideas are shared by every
+# user. Set PROJECT_IDEAS_DB to keep them across restarts.
+PROJECT_IDEA_TTL = float(os.getenv("PROJECT_IDEA_TTL", str(7 * 24 * 3600)))
+PROJECT_IDEA_CACHE_SIZE = int(os.getenv("PROJECT_IDEA_CACHE_SIZE", "2048"))
+
+# Pre-generated by warm_up (override with a comma-separated PROJECT_IDEA_WARMUP_SKILLS)
+COMMON_SKILLS = [s.strip() for s in os.getenv("PROJECT_IDEA_WARMUP_SKILLS", ",".join([
+    "Python", "SQL", "JavaScript", "TypeScript", "React", "Node.js", "Java", "Go", "Docker",
+    "Kubernetes", "AWS", "Azure", "GCP", "Terraform", "CI/CD", "Git", "PostgreSQL", "MongoDB",
+    "Redis", "Kafka", "Spark", "Airflow", "TensorFlow", "PyTorch", "Machine Learning",
+    "REST APIs", "GraphQL", "Linux", "Microservices", "Data Structures",
+])).split(",") if s.strip()]
+
+# Common spellings that mean the same skill
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "js": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "ml": "machine learning",
+    "rest api": "rest apis",
+    "ci cd": "ci/cd",
+}
+
+# Ideas per batched LLM call
+IDEA_BATCH_SIZE = 25
+
+_store = ResultCache(max_size=PROJECT_IDEA_CACHE_SIZE, ttl=PROJECT_IDEA_TTL,
+                     db_path=os.getenv("PROJECT_IDEAS_DB"), table="project_ideas")
+
+
+def normalize_skill(skill):
+    """Lowercases and trims a skill ("  Docker." -> "docker") and maps aliases to one name."""
+    skill = re.sub(r"\s+", " ", skill.strip().lower()).strip(" .,;:")
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def idea_key(skill, model_name):
+    return f"{model_name}|{normalize_skill(skill)}"
+
+
+def get_project_idea(skill, api_key, model_name):
+    """Returns (idea, cached) for one skill."""
+    key = idea_key(skill, model_name)
+    idea = _store.get(key)
+    if idea is not None:
+        return idea, True
+    idea = generate_project_idea(skill, api_key, model_name)
+    if api_key:
+        # Without a key the generic placeholder comes back; don't share it
+        _store.set(key, idea)
+    return idea, False
+
+
+def stream_cached_project_idea(skill, api_key, model_name):
+    """
+    Streaming variant of get_project_idea: a cached idea comes back as one
+    chunk, a new one is streamed and stored once it is complete.
+    """
+    key = idea_key(skill, model_name)
+    idea = _store.get(key)
+    if idea is not None:
+        yield idea
+        return
+    parts = []
+    for text in stream_project_idea(skill, api_key, model_name):
+        parts.append(text)
+        yield text
+    # Only reached if the client read the whole stream
+    idea = "".join(parts).strip()
+    if idea and api_key:
+        _store.set(key, idea)
+
+
+def get_project_ideas(skills, api_key, model_name):
+    """
+    Ideas for a whole missing_skills list. Cached skills are answered from the
+    store; the rest are generated together in one structured-output call
+    (per IDEA_BATCH_SIZE skills), with a single-skill retry for any the model
+    skipped. Returns one {"skill", "idea", "cached", "error"} dict per input.
+    """
+    results = [{"skill": skill, "idea": None, "cached": False, "error": None} for skill in skills]
+
+    # Skills that normalize to the same key are generated once
+    pending = {}
+    for i, skill in enumerate(skills):
+        if not normalize_skill(skill):
+            results[i]["error"] = "Empty skill"
+            continue
+        idea = _store.get(idea_key(skill, model_name))
+        if idea is not None:
+            results[i].update(idea=idea, cached=True)
+        else:
+            pending.setdefault(normalize_skill(skill), []).append(i)
+
+    def resolve(normalized, idea=None, error=None):
+        if idea is not None:
+            _store.set(idea_key(normalized, model_name), idea)
+        for i in pending[normalized]:
+            results[i].update(idea=idea, error=error)
+
+    if pending and not api_key:
+        for normalized in pending:
+            resolve(normalized, error="Please provide a valid API Key.")
+        return results
+
+    names = list(pending)
+    for start in range(0, len(names), IDEA_BATCH_SIZE):
+        batch = names[start:start + IDEA_BATCH_SIZE]
+        # Ask with the user's spelling of each skill
+        try:
+            ideas = generate_project_ideas([skills[pending[n][0]] for n in batch], api_key, model_name)
+        except Exception as e:
+            for normalized in batch:
+                resolve(normalized, error=str(e))
+            continue
+        for position, normalized in enumerate(batch):
+            if position in ideas:
+                resolve(normalized, idea=ideas[position])
+                continue
+            try:
+                resolve(normalized, idea=generate_project_idea(skills[pending[normalized][0]], api_key, model_name))
+            except Exception as e:
+                resolve(normalized, error=str(e))
+    return results
+
+
+def warm_up(api_key, model_name, skills=None):
+    """Pre-generates ideas for the most common skills. Returns how many were generated."""
+    results = get_project_ideas(skills or COMMON_SKILLS, api_key, model_name)
+    for result in results:
+        if result["error"]:
+            print(f"Project idea warm-up failed for '{result['skill']}': {result['error']}")
+    return sum(1 for r in results if r["idea"] is not None and not r["cached"])
+
+
+def idea_stats():
+    return _store.stats()
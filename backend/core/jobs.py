@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import time
+
+from .cache import ResultCache
+from .embeddings import EMBEDDING_PROVIDER
+from .nlp import embed_text, embed_texts, split_sentences, extract_required_skills, scale_similarity
+from .vector_index import VectorIndex
+
+# Registered jobs live for 30 days; set JOBS_DB to keep them across restarts
+JOB_TTL = float(os.getenv("JOB_TTL", str(30 * 24 * 3600)))
+
+
+class EmbeddingMismatch(ValueError):
+    """A job or query embedded by another provider than the one the catalog uses."""
+
+
+def make_job_id(jd_text):
+    # Content-addressed, so registering the same JD twice is idempotent
+    normalized = " ".join(jd_text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def build_job_profile(jd_text, api_key, model_name, title=None, provider=EMBEDDING_PROVIDER):
+    """
+    Precomputes every JD-side artifact the scoring functions need,
+    so per-resume analysis only has to process the resume. `model_name`
+    extracts the required skills; `provider` is recorded with the embeddings
+    (they were made by EMBEDDING_PROVIDER).
+    """
+    embedding = embed_text(jd_text, api_key=api_key)
+    if not embedding:
+        raise ValueError("Could not embed the job description")
+
+    sentences = split_sentences(jd_text)
+    sentence_embeddings = embed_texts(sentences, api_key=api_key)
+    if not all(sentence_embeddings):
+        raise ValueError("Could not embed the job description sentences")
+    return {
+        "job_id": make_job_id(jd_text),
+        "title": title,
+        "jd_text": jd_text,
+        "sentences": sentences,
+        "sentence_embeddings": sentence_embeddings,
+        "words": sorted(set(jd_text.lower().split())),
+        "embedding": list(embedding),
+        "embedding_provider": provider,
+        "embedding_dim": len(embedding),
+        "required_skills": extract_required_skills(jd_text, api_key, model_name),
+        "model_name": model_name,
+        "created_at": time.time(),
+    }
+
+
+class JobRegistry:
+    """
+    Stores job profiles by job_id (memory, plus SQLite when `db_path` is set)
+    and keeps their embeddings in a VectorIndex so a resume can be matched
+    against the whole catalog. The index is written to `index_path` after
+    every change and loaded from it on startup.
+
+    Jobs that leave the store (expired after `ttl`, or evicted from a
+    memory-only store of `max_size`) are dropped from the index as well,
+    when the store notices or when a search runs into them.
+
+    Profiles and the index record the embedding `provider`. After a provider
+    change, a saved index is started afresh, stored profiles count as
+    incompatible until they are registered again, and mismatched queries
+    raise EmbeddingMismatch.
+    """
+
+    def __init__(self, db_path=None, index_path=None, max_size=1024, ttl=JOB_TTL, provider=EMBEDDING_PROVIDER):
+        self.provider = provider
+        self._store = ResultCache(max_size=max_size, ttl=ttl, db_path=db_path, table="jobs",
+                                  on_evict=self._forget)
+        self.index_path = index_path
+        self.index = VectorIndex.load(index_path) if index_path else VectorIndex()
+        if self.index.space not in (None, provider):
+            print(f"Job index {index_path} holds '{self.index.space}' embeddings, not '{provider}'; rebuilding it")
+            self.index = VectorIndex()
+        self.index.space = provider
+        self._save_lock = threading.Lock()
+
+    def _save_index(self):
+        if self.index_path:
+            with self._save_lock:
+                self.index.save(self.index_path)
+
+    def _forget(self, job_id):
+        if self.index.remove(job_id):
+            self._save_index()
+
+    def compatible(self, job):
+        """Whether `job` was embedded by this registry's provider."""
+        return job.get("embedding_provider") == self.provider
+
+    def register(self, jd_text, api_key, model_name, title=None):
+        job_id = make_job_id(jd_text)
+        existing = self._store.get(job_id)
+        if existing is not None and self.compatible(existing):
+            if job_id not in self.index:
+                self.index.add(job_id, existing["embedding"])
+                self._save_index()
+            return existing
+        # New, or embedded by a previous provider: (re)build the profile
+        job = build_job_profile(jd_text, api_key, model_name, title, self.provider)
+        self._store.set(job_id, job)
+        self.index.add(job_id, job["embedding"])
+        self._save_index()
+        return job
+
+    def get(self, job_id):
+        return self._store.get(job_id)
+
+    def delete(self, job_id):
+        found = self._store.delete(job_id)
+        if self.index.remove(job_id):
+            self._save_index()
+            found = True
+        return found
+
+    def match(self, embedding, top_k=10):
+        """Returns up to `top_k` (job, role fit score) pairs for a resume embedding."""
+        if self.index.dim is not None and len(embedding) != self.index.dim:
+            raise EmbeddingMismatch(f"The job catalog holds {self.index.dim}-dimensional '{self.provider}' "
+                                    f"embeddings, got a {len(embedding)}-dimensional query")
+        while True:
+            matches, stale = [], []
+            for job_id, similarity in self.index.search(embedding, top_k):
+                job = self._store.get(job_id)
+                if job is None:
+                    stale.append(job_id)
+                else:
+                    matches.append((job, scale_similarity(similarity)))
+            if not stale:
+                return matches
+            # Indexed jobs that are gone from the store (e.g. a restart without
+            # JOBS_DB): drop them and search again, until top_k live jobs are
+            # found or the index runs out
+            for job_id in stale:
+                if self._store.get(job_id) is None:  # Not re-registered meanwhile
+                    self.index.remove(job_id)
+            self._save_index()
+
+
+def job_summary(job):
+    """Public view of a job profile (without the raw embedding)."""
+    return {
+        "job_id": job["job_id"],
+        "title": job["title"],
+        "num_sentences": len(job["sentences"]),
+        "required_skills": job["required_skills"],
+        "model_name": job.get("model_name"),
+        "embedding_provider": job.get("embedding_provider"),
+        "created_at": job["created_at"],
+    }
@@ -1,79 +1,160 @@
-import google.generativeai as genai
+import contextvars
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Set
 
-# Configure Gemini
-# Note: API Key is passed dynamically or set in env
-def configure_gemini(api_key: str):
-    if api_key:
-        genai.configure(api_key=api_key)
+import numpy as np
+
+from .scheduler import generate_content, embed_content
+from .embedding_cache import get_embedding_store
+from .similarity import cosine, cosine_matrix, max_per_row
+from .embeddings import get_provider
+from .context import pack_context, pack_pair, REQUIREMENT_CUES
+
+# Heatmap/Role Fit mode: "semantic" (batched sentence embeddings) or "lexical"
+SENTENCE_SCORING = os.getenv("SENTENCE_SCORING", "semantic")
+# Sentences per batch_embed_contents request, and the total time we wait for them
+SENTENCE_BATCH_SIZE = int(os.getenv("SENTENCE_BATCH_SIZE", "100"))
+SENTENCE_EMBED_BUDGET = float(os.getenv("SENTENCE_EMBED_BUDGET", "8"))
+MAX_SENTENCES = int(os.getenv("MAX_SENTENCES", "200"))
+
+# Note: API Key is passed per call; clients are pooled per key (see core.clients)
+def get_gemini_embedding(text: str, model="models/text-embedding-004", api_key: str = None,
+                         task_type="semantic_similarity"):
+    # Repeated JDs/resumes are served from the local embedding store
+    store = get_embedding_store()
+    cached = store.get(model, task_type, text)
+    if cached is not None:
+        return cached.tolist()
 
-def get_gemini_embedding(text: str, model="models/text-embedding-004"):
     try:
-        result = genai.embed_content(
-            model=model,
-            content=text,
-            task_type="semantic_similarity"
-        )
-        return result['embedding']
+        result = embed_content(api_key, model=model, content=text, task_type=task_type)
+        embedding = result['embedding']
+        store.put(model, task_type, text, embedding)
+        return embedding
     except Exception as e:
         print(f"Embedding Error: {e}")
         return []
 
-def calculate_role_fit_score(resume_text: str, jd_text: str, api_key: str) -> float:
-    if not resume_text or not jd_text or not api_key:
+def get_gemini_embeddings(texts: List[str], model="models/text-embedding-004", api_key: str = None,
+                          task_type="semantic_similarity") -> List[List[float]]:
+    # Batched variant: cached texts are looked up locally, the rest go out in
+    # batch_embed_contents requests (the SDK splits them into batches of 100).
+    store = get_embedding_store()
+    embeddings = [None] * len(texts)
+    pending = {}
+    for i, (text, cached) in enumerate(zip(texts, store.get_many(model, task_type, texts))):
+        if cached is not None:
+            embeddings[i] = cached.tolist()
+        else:
+            pending.setdefault(text, []).append(i)
+
+    if pending:
+        try:
+            unique_texts = list(pending)
+            result = embed_content(api_key, model=model, content=unique_texts, task_type=task_type)
+            store.put_many(model, task_type, zip(unique_texts, result['embedding']))
+            for text, embedding in zip(unique_texts, result['embedding']):
+                for i in pending[text]:
+                    embeddings[i] = embedding
+        except Exception as e:
+            print(f"Batch Embedding Error: {e}")
+
+    return [e if e is not None else [] for e in embeddings]
+
+def embed_texts(texts: List[str], api_key: str = None) -> List[List[float]]:
+    # Provider-agnostic entry point (EMBEDDING_PROVIDER: gemini, local or hashing)
+    return get_provider(api_key=api_key).embed(texts)
+
+def embed_text(text: str, api_key: str = None) -> List[float]:
+    return embed_texts([text], api_key=api_key)[0]
+
+def split_sentences(text: str, min_length: int = 20) -> List[str]:
+    # Naive sentence splitting for speed
+    return [s.strip() for s in text.split('.') if len(s.strip()) > min_length]
+
+def scale_similarity(raw_score: float) -> float:
+    # Scale score: 0.7 cosine similarity is usually very high for documents
+    # Map 0.3 -> 0%, 0.8 -> 100%
+    scaled_score = (raw_score - 0.3) / (0.8 - 0.3) * 100
+    return round(min(100, max(0, scaled_score)), 2)
+
+def calculate_role_fit_score(resume_text: str, jd_text: str, api_key: str, job: dict = None) -> float:
+    if not resume_text or not jd_text:
         return 0.0
+    if not api_key:
+        raise ValueError("A Gemini API key is required for the Role Fit score")
     
-    configure_gemini(api_key)
-    
-    # Split into chunks (naive sentence splitting for speed)
-    resume_sentences = [s.strip() for s in resume_text.split('.') if len(s.strip()) > 20]
-    jd_sentences = [s.strip() for s in jd_text.split('.') if len(s.strip()) > 20]
+    # Split into chunks (JD side comes precomputed for registered jobs)
+    resume_sentences = split_sentences(resume_text)
+    jd_sentences = job["sentences"] if job else split_sentences(jd_text)
     
     if not resume_sentences or not jd_sentences:
         return 0.0
 
-    # Get Embeddings (Batching would be better but keeping it simple for now)
-    # Gemini Embeddings are fast.
+    # Role Fit compares whole-document embeddings; the sentence-level view is the heatmap
+    resume_emb = embed_text(resume_text, api_key=api_key)
+    jd_emb = job["embedding"] if job else embed_text(jd_text, api_key=api_key)
     
-    # We will use a simplified approach: Embed the WHOLE text to get a global similarity score
-    # This is much faster and often sufficient for "Role Fit"
-    
-    try:
-        resume_emb = get_gemini_embedding(resume_text)
-        jd_emb = get_gemini_embedding(jd_text)
+    if not resume_emb or not jd_emb:
+        # A 0.0 here would look like a real (terrible) fit; let the stage degrade
+        raise RuntimeError("Embeddings unavailable for the Role Fit score")
         
-        if not resume_emb or not jd_emb:
-            return 0.0
-            
-        # Calculate Cosine Similarity manually
-        def cosine_similarity(v1, v2):
-            dot_product = sum(a*b for a, b in zip(v1, v2))
-            magnitude1 = sum(a*a for a in v1) ** 0.5
-            magnitude2 = sum(b*b for b in v2) ** 0.5
-            if magnitude1 == 0 or magnitude2 == 0:
-                return 0.0
-            return dot_product / (magnitude1 * magnitude2)
-
-        raw_score = cosine_similarity(resume_emb, jd_emb)
+    raw_score = cosine(resume_emb, jd_emb)
+    return scale_similarity(raw_score)
+
+def extract_required_skills(jd_text: str, api_key: str, model_name: str = "gemini-2.0-flash-exp") -> List[str]:
+    if not jd_text or not api_key:
+        return []
         
-        # Scale score: 0.7 cosine similarity is usually very high for documents
-        # Map 0.3 -> 0%, 0.8 -> 100%
-        scaled_score = (raw_score - 0.3) / (0.8 - 0.3) * 100
-        return round(min(100, max(0, scaled_score)), 2)
+    # Requirement sentences first, in about the room the old 4000-character cut allowed
+    jd = pack_context(jd_text, cues=REQUIREMENT_CUES, budget=1000)
+    prompt = f"""
+    Act as a Senior Technical Recruiter.
+    List the strictly TECHNICAL skills that are REQUIRED in the Job Description below.
+    
+    Rules:
+    1. Return ONLY a comma-separated list of skills.
+    2. Do not include soft skills (e.g., "communication", "leadership").
+    3. Do not include generic terms (e.g., "development", "engineering").
+    4. If no technical skills are required, return "None".
+    
+    JOB DESCRIPTION:
+    {jd["text"]}
+    """
+    
+    # Raises on failure so a registered job never stores an empty skill list
+    response = generate_content(api_key, model_name, prompt)
+    text = response.text.strip()
+    if "None" in text or not text:
+        return []
         
-    except Exception as e:
-        print(f"Scoring Error: {e}")
-        return 0.0
+    return sorted({s.strip() for s in text.split(',') if s.strip()})
 
-def analyze_skill_gaps(resume_text: str, jd_text: str, api_key: str) -> Set[str]:
-    if not resume_text or not jd_text or not api_key:
+def find_missing_skills(resume_text: str, required_skills: List[str]) -> Set[str]:
+    # Resume-side only: a required skill is present if it appears as a whole term
+    resume_lower = resume_text.lower()
+    missing = set()
+    for skill in required_skills:
+        pattern = r'(?<![\w+#.])' + re.escape(skill.lower()) + r'(?![\w+#])'
+        if not re.search(pattern, resume_lower):
+            missing.add(skill)
+    return missing
+
+def analyze_skill_gaps(resume_text: str, jd_text: str, api_key: str, job: dict = None,
+                       model_name: str = "gemini-2.0-flash-exp") -> Set[str]:
+    # /api/analyze gets the skill gaps together with the sub-scores from
+    # genai.get_resume_analysis; this is the standalone variant.
+    if not resume_text or not jd_text:
         return set()
-        
-    configure_gemini(api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
     
+    if job:
+        return find_missing_skills(resume_text, job["required_skills"])
+    if not api_key:
+        raise ValueError("A Gemini API key is required for the skill gaps")
+        
+    resume, jd = pack_pair(resume_text, jd_text, api_key=api_key)
     prompt = f"""
     Act as a Senior Technical Recruiter.
     Compare the Resume and Job Description below.
@@ -86,42 +167,108 @@ def analyze_skill_gaps(resume_text: str, jd_text: str, api_key: str) -> Set[str]
     4. If no major skills are missing, return "None".
     
     JOB DESCRIPTION:
-    {jd_text[:2000]}
+    {jd["text"]}
     
     RESUME:
-    {resume_text[:2000]}
+    {resume["text"]}
     """
     
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        if "None" in text or not text:
-            return set()
-            
-        skills = {s.strip() for s in text.split(',') if s.strip()}
-        return skills
-    except Exception as e:
-        print(f"Skill Gap Error: {e}")
+    # Failures propagate: an empty set would claim "no missing skills"
+    response = generate_content(api_key, model_name, prompt, hedge=True)
+    text = response.text.strip()
+    if "None" in text or not text:
         return set()
-
-def get_sentence_scores(resume_text: str, jd_text: str, api_key: str):
-    # For Heatmap: We need sentence-level scoring.
-    # To save API calls, we'll just return a dummy list or a simplified version.
-    # Real-time sentence embedding for 50+ sentences might be too slow/expensive for this demo.
-    # Strategy: Return empty list for now to avoid OOM/Timeout, or implement a very lightweight keyword match.
-    
-    # Lightweight Keyword Match Fallback
-    jd_words = set(jd_text.lower().split())
-    sentences = [s.strip() for s in resume_text.split('.') if len(s.strip()) > 10]
-    
-    scores = []
-    for sent in sentences:
-        sent_words = set(sent.lower().split())
-        overlap = len(sent_words.intersection(jd_words))
-        score = min(1.0, overlap / len(sent_words)) if sent_words else 0
-        scores.append((sent, score))
         
-    return scores
+    skills = {s.strip() for s in text.split(',') if s.strip()}
+    return skills
+
+def get_sentence_scores(resume_text: str, jd_text: str, api_key: str, job: dict = None):
+    # Lexical heatmap (SENTENCE_SCORING="lexical", or when embeddings are unavailable).
+    # The embedding-based heatmap is get_semantic_sentence_analysis.
+    
+    # Lightweight Keyword Match
+    jd_words = set(job["words"]) if job else set(jd_text.lower().split())
+    sentences = split_sentences(resume_text, min_length=10)
+    
+    return [(sent, lexical_sentence_score(sent, jd_words)) for sent in sentences]
+
+def embed_within_budget(texts: List[str], api_key: str, batch_size: int = SENTENCE_BATCH_SIZE,
+                        budget: float = SENTENCE_EMBED_BUDGET) -> List[List[float]]:
+    # Chunks are embedded concurrently; anything not back within `budget`
+    # seconds is left empty so the caller can fall back for those texts.
+    chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if not chunks:
+        return []
+    
+    executor = ThreadPoolExecutor(max_workers=min(len(chunks), 4))
+    # Each chunk runs in the caller's context, so it keeps the stage deadline
+    futures = [executor.submit(contextvars.copy_context().run, embed_texts, chunk, api_key=api_key)
+               for chunk in chunks]
+    wait(futures, timeout=budget)
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    embeddings = []
+    for chunk, future in zip(chunks, futures):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            embeddings.extend(future.result())
+        else:
+            print(f"Sentence embedding chunk missed the {budget}s budget")
+            embeddings.extend([[]] * len(chunk))
+    return embeddings
+
+def lexical_sentence_score(sentence: str, jd_words: Set[str]) -> float:
+    sent_words = set(sentence.lower().split())
+    overlap = len(sent_words.intersection(jd_words))
+    return min(1.0, overlap / len(sent_words)) if sent_words else 0
+
+def get_semantic_sentence_analysis(resume_text: str, jd_text: str, api_key: str, job: dict = None) -> dict:
+    """
+    Embeds resume and JD sentences in a few batched requests and reuses the
+    similarity matrix for both the coverage-based Role Fit score and the heatmap.
+    """
+    if not resume_text or not jd_text:
+        return {"score": 0.0, "sentence_scores": []}
+    if not api_key:
+        raise ValueError("A Gemini API key is required for the Role Fit score")
+    
+    resume_sentences = split_sentences(resume_text, min_length=10)[:MAX_SENTENCES]
+    jd_sentences = (job["sentences"] if job else split_sentences(jd_text))[:MAX_SENTENCES]
+    jd_embeddings = (job or {}).get("sentence_embeddings")
+    # Profiles stored before failed batches were rejected hold only empty rows
+    have_jd = any(jd_embeddings or [])
+    
+    # One round of batched requests for everything we don't have yet
+    to_embed = resume_sentences + ([] if have_jd else jd_sentences)
+    embedded = embed_within_budget(to_embed, api_key)
+    resume_embeddings = embedded[:len(resume_sentences)]
+    if not have_jd:
+        jd_embeddings = embedded[len(resume_sentences):]
+    
+    resume_ok = [i for i, e in enumerate(resume_embeddings) if e]
+    jd_rows = [e for e in jd_embeddings[:len(jd_sentences)] if e]
+    if not resume_ok or not jd_rows:
+        # Embedding unavailable: keep the previous whole-document / lexical behaviour
+        return {
+            "score": calculate_role_fit_score(resume_text, jd_text, api_key, job),
+            "sentence_scores": get_sentence_scores(resume_text, jd_text, api_key, job)
+        }
+    
+    # Shape: (num_jd_sentences, num_resume_sentences)
+    similarities = cosine_matrix(jd_rows, [resume_embeddings[i] for i in resume_ok])
+    
+    # Role Fit: how well each JD requirement is covered by its best resume sentence
+    coverage, _ = max_per_row(similarities)
+    score = scale_similarity(float(coverage.mean()))
+    
+    # Heatmap: each resume sentence's best JD match, mapped onto 0..1 like the score
+    best_match = np.clip((similarities.max(axis=0) - 0.3) / (0.8 - 0.3), 0.0, 1.0)
+    semantic = dict(zip(resume_ok, best_match.tolist()))
+    jd_words = set(job["words"]) if job else set(jd_text.lower().split())
+    sentence_scores = [
+        (sent, semantic[i] if i in semantic else lexical_sentence_score(sent, jd_words))
+        for i, sent in enumerate(resume_sentences)
+    ]
+    return {"score": score, "sentence_scores": sentence_scores}
 
 def get_recruiter_metrics(resume_text: str):
     # Pure Python implementation (No Spacy)
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import os
+import time
+
+from .nlp import (calculate_role_fit_score, analyze_skill_gaps, get_recruiter_metrics, get_sentence_scores,
+                  get_semantic_sentence_analysis, SENTENCE_SCORING)
+from .genai import get_sub_scores, get_resume_analysis
+from .scheduler import run_with_deadline
+
+# Per-stage wall-clock budget (seconds). A stage that overruns is abandoned and
+# its section comes back as None (null) so one slow Gemini call can't hold the
+# response; the stage is listed under "degraded".
+STAGE_TIMEOUT = float(os.getenv("ANALYZE_STAGE_TIMEOUT", "30"))
+
+# Bump whenever scoring logic or prompts change so cached results are invalidated
+SCORING_VERSION = "4"
+
+
+def none_or_list(values):
+    return None if values is None else list(values)
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+def analysis_key(pdf_digest, jd_text, model_name, job_id=None):
+    """
+    Content hash identifying one resume/JD/model analysis.
+    `pdf_digest` is the sha256 hex digest of the PDF (see extraction.spool_upload).
+    """
+    h = hashlib.sha256()
+    parts = (pdf_digest.encode("utf-8"), normalize_text(jd_text).encode("utf-8"),
+             model_name.encode("utf-8"), SCORING_VERSION.encode("utf-8"),
+             (job_id or "").encode("utf-8"))
+    for part in parts:
+        # Length-prefix each part so boundaries can't be shifted between fields
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.hexdigest()
+
+
+async def run_stage(name, func, *args, fallback=None, timeout=STAGE_TIMEOUT, degraded=None):
+    """
+    Runs a blocking stage in a worker thread so the event loop stays free.
+    Returns `fallback` if the stage fails (e.g. Gemini is unavailable, see
+    core.scheduler) or does not finish within `timeout` seconds, and records
+    the stage name in `degraded` if a list is given. The stage's Gemini calls
+    stop queueing and retrying at the same deadline, so an abandoned stage
+    does not keep its worker thread busy.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(run_with_deadline, deadline, func, *args), timeout)
+    except asyncio.TimeoutError:
+        print(f"Stage '{name}' timed out after {timeout}s")
+    except Exception as e:
+        print(f"Stage '{name}' failed: {e}")
+    if degraded is not None:
+        degraded.append(name)
+    return fallback
+
+
+async def run_llm_stages(resume_text, jd_text, api_key, model_name, job=None, timeout=STAGE_TIMEOUT,
+                         degraded=None):
+    """
+    Returns {"missing_skills", "sub_scores", "context_tokens"} (the prompt
+    token counts reported by the context packer, None if unknown). Without a
+    registered job both come
+    from one structured-output request; with one, the skill gaps are checked
+    locally against the job's required skills and only the sub-scores need Gemini.
+    Values a failed stage could not produce are None.
+    """
+    if job:
+        missing_skills, sub_scores = await asyncio.gather(
+            run_stage("skill_gaps", analyze_skill_gaps, resume_text, jd_text, api_key, job,
+                      timeout=timeout, degraded=degraded),
+            run_stage("sub_scores", get_sub_scores, resume_text, jd_text, api_key, model_name,
+                      timeout=timeout, degraded=degraded),
+        )
+        return {"missing_skills": none_or_list(missing_skills), "sub_scores": sub_scores, "context_tokens": None}
+
+    result = await run_stage("llm_analysis", get_resume_analysis, resume_text, jd_text, api_key, model_name,
+                             fallback={"missing_skills": None, "sub_scores": None},
+                             timeout=timeout, degraded=degraded)
+    return {
+        "missing_skills": result["missing_skills"],
+        "sub_scores": result["sub_scores"],
+        "context_tokens": result.get("context_tokens"),
+    }
+
+
+async def analysis_sections(resume_text, jd_text, api_key, model_name, timeout=STAGE_TIMEOUT, job=None,
+                            degraded=None):
+    """
+    Runs the independent analysis stages concurrently and yields
+    (section, fields) pairs as soon as each section is ready, fastest first:
+    "recruiter_metrics", "heatmap", "fit_score", "skill_gaps" and
+    "sub_scores". `fields` are the run_analysis result keys the section fills
+    in. Stages that failed are appended to `degraded` and their fields are None.
+    """
+    # Pure Python and cheap, no need to leave the event loop
+    yield "recruiter_metrics", {"recruiter_metrics": get_recruiter_metrics(resume_text)}
+
+    async def semantic_sentences():
+        # One set of sentence embeddings feeds both the Role Fit score and the heatmap
+        result = await run_stage("sentence_analysis", get_semantic_sentence_analysis,
+                                 resume_text, jd_text, api_key, job,
+                                 fallback={"score": None, "sentence_scores": None},
+                                 timeout=timeout, degraded=degraded)
+        return [("fit_score", {"score": result["score"]}),
+                ("heatmap", {"sentence_scores": result["sentence_scores"]})]
+
+    async def role_fit():
+        score = await run_stage("role_fit", calculate_role_fit_score, resume_text, jd_text, api_key, job,
+                                timeout=timeout, degraded=degraded)
+        return [("fit_score", {"score": score})]
+
+    async def heatmap():
+        sentence_scores = await run_stage("sentence_scores", get_sentence_scores, resume_text, jd_text, api_key, job,
+                                          timeout=timeout, degraded=degraded)
+        return [("heatmap", {"sentence_scores": sentence_scores})]
+
+    async def skill_gaps():
+        missing_skills = await run_stage("skill_gaps", analyze_skill_gaps, resume_text, jd_text, api_key, job,
+                                         timeout=timeout, degraded=degraded)
+        return [("skill_gaps", {"missing_skills": none_or_list(missing_skills)})]
+
+    async def sub_scores():
+        scores = await run_stage("sub_scores", get_sub_scores, resume_text, jd_text, api_key, model_name,
+                                 timeout=timeout, degraded=degraded)
+        return [("sub_scores", {"sub_scores": scores, "context_tokens": None})]
+
+    async def llm_analysis():
+        # Skill gaps and sub-scores come from the same structured-output request
+        llm = await run_llm_stages(resume_text, jd_text, api_key, model_name, timeout=timeout, degraded=degraded)
+        return [("skill_gaps", {"missing_skills": llm["missing_skills"]}),
+                ("sub_scores", {"sub_scores": llm["sub_scores"], "context_tokens": llm["context_tokens"]})]
+
+    stages = [semantic_sentences()] if SENTENCE_SCORING == "semantic" else [role_fit(), heatmap()]
+    # With a registered job the skill gaps are checked locally, so they don't wait for Gemini
+    stages += [skill_gaps(), sub_scores()] if job else [llm_analysis()]
+
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for section in await finished:
+                yield section
+    finally:
+        # The consumer went away (e.g. the client disconnected)
+        for task in tasks:
+            task.cancel()
+
+
+async def run_analysis(resume_text, jd_text, api_key, model_name, timeout=STAGE_TIMEOUT, job=None):
+    """
+    Runs the independent analysis stages concurrently.
+    Pass a registered `job` profile to reuse its precomputed JD artifacts.
+    Wall-clock time is roughly that of the slowest stage instead of the sum.
+    Stages that failed are listed under "degraded"; their fields are None.
+    """
+    degraded = []
+    fields = {}
+    async for _, section in analysis_sections(resume_text, jd_text, api_key, model_name, timeout, job, degraded):
+        fields.update(section)
+    return analysis_result(resume_text, fields, degraded)
+
+
+def analysis_result(resume_text, fields, degraded):
+    """The /api/analyze response from the fields of all analysis_sections."""
+    return {
+        "score": fields["score"],
+        "missing_skills": fields["missing_skills"],
+        "recruiter_metrics": fields["recruiter_metrics"],
+        "sentence_scores": fields["sentence_scores"],
+        "sub_scores": fields["sub_scores"],
+        "context_tokens": fields["context_tokens"],
+        "resume_text": resume_text[:1000] + "...", # Preview
+        "degraded": degraded
+    }
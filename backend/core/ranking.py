@@ -0,0 +1,92 @@
+import asyncio
+
+import numpy as np
+
+from .nlp import embed_text, embed_texts, get_recruiter_metrics, scale_similarity
+from .similarity import cosine_matrix
+from .pipeline import run_llm_stages, STAGE_TIMEOUT
+from .extraction import extract_many as extract_documents
+from .scheduler import GeminiUnavailable
+
+
+async def extract_many(files):
+    """Extracts text from several (filename, pdf) pairs in parallel worker processes."""
+    return await asyncio.to_thread(extract_documents, [pdf for _, pdf in files])
+
+
+def rank_by_similarity(resume_embeddings, jd_embedding):
+    """
+    Cosine similarity of every resume against the JD in one matrix-vector product.
+    All embeddings must have the JD's dimension (filter out failed ones first).
+    """
+    matrix = np.asarray(resume_embeddings, dtype=np.float32).reshape(len(resume_embeddings), len(jd_embedding))
+    return cosine_matrix(matrix, jd_embedding)[:, 0]
+
+
+async def rank_resumes(files, jd_text, api_key, model_name, top_n_details=0, job=None,
+                       timeout=STAGE_TIMEOUT):
+    """
+    Scores many resumes against one JD.
+    Extraction runs in parallel, all resumes are embedded in batched requests and
+    scored in one vectorized pass. The LLM stages (sub-scores, skill gaps) only
+    run for the best `top_n_details` candidates. Resumes that could not be
+    embedded are not ranked; they are listed under "unscored" with a null score.
+    """
+    texts = await extract_many(files)
+
+    readable = [i for i, text in enumerate(texts) if text]
+    if job:
+        jd_embedding = job["embedding"]
+        resume_embeddings = await asyncio.to_thread(
+            embed_texts, [texts[i] for i in readable], api_key=api_key
+        )
+    else:
+        jd_embedding, resume_embeddings = await asyncio.gather(
+            asyncio.to_thread(embed_text, jd_text, api_key=api_key),
+            asyncio.to_thread(embed_texts, [texts[i] for i in readable], api_key=api_key),
+        )
+    if not jd_embedding:
+        raise ValueError("Could not embed the job description")
+
+    embedded = [(i, embedding) for i, embedding in zip(readable, resume_embeddings)
+                if len(embedding) == len(jd_embedding)]
+    if readable and not embedded:
+        raise GeminiUnavailable("Could not embed any of the resumes, try again shortly")
+    embedded_ids = {i for i, _ in embedded}
+    unscored = [{
+        "filename": files[i][0],
+        "score": None,
+        "similarity": None,
+        "recruiter_metrics": get_recruiter_metrics(texts[i]),
+    } for i in readable if i not in embedded_ids]
+
+    similarities = rank_by_similarity([embedding for _, embedding in embedded], jd_embedding)
+
+    # (source index, entry) pairs so duplicate filenames stay distinct
+    scored = []
+    for (i, _), similarity in zip(embedded, similarities):
+        scored.append((i, {
+            "filename": files[i][0],
+            "score": scale_similarity(float(similarity)),
+            "similarity": round(float(similarity), 4),
+            "recruiter_metrics": get_recruiter_metrics(texts[i]),
+        }))
+    # Raw similarity breaks ties between scores clamped to 0 or 100
+    scored.sort(key=lambda pair: pair[1]["similarity"], reverse=True)
+    for rank, (_, entry) in enumerate(scored, start=1):
+        entry["rank"] = rank
+
+    async def add_details(i, entry):
+        degraded = []
+        llm = await run_llm_stages(texts[i], jd_text, api_key, model_name, job, timeout=timeout, degraded=degraded)
+        entry["missing_skills"], entry["sub_scores"] = llm["missing_skills"], llm["sub_scores"]
+        entry["degraded"] = degraded
+
+    # Expensive LLM stages only for the shortlist
+    await asyncio.gather(*(add_details(i, entry) for i, entry in scored[:max(0, top_n_details)]))
+
+    return {
+        "ranked": [entry for _, entry in scored],
+        "unscored": unscored,
+        "unreadable": [files[i][0] for i, text in enumerate(texts) if not text],
+    }
@@ -0,0 +1,338 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from .clients import get_client, get_model
+
+# Every Gemini request (generation and embeddings) goes through one scheduler.
+# Limits are per API key, because that is how Gemini enforces quota.
+GEMINI_RATE = float(os.getenv("GEMINI_RATE", "5"))  # Sustained requests per second per key
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))  # Requests a key may make back to back
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))  # In-flight requests, all keys
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "10"))  # Max wait for a token or a slot
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))  # Per-request deadline (seconds)
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "0.5"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "8"))
+# Consecutive failures that open a key's circuit, and how long it stays open
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_RESET = float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+# Send a duplicate request if the first has not answered after this many
+# seconds (only for calls made with hedge=True; 0 disables hedging)
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "0"))
+
+# HTTP statuses worth retrying: quota (429) and transient server errors
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+# time.monotonic() by which the current caller stops waiting for an answer
+# (see run_with_deadline); calls past it are not queued or retried
+_deadline = contextvars.ContextVar("gemini_deadline", default=None)
+
+
+class GeminiUnavailable(RuntimeError):
+    """Raised when a call was rejected (open circuit, no quota) or ran out of retries."""
+
+
+def http_code(error):
+    # google.api_core exceptions carry the HTTP status in `code`
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error):
+    code = http_code(error)
+    if code is not None:
+        return code in RETRYABLE_CODES
+    # Network failures and timeouts. Under the REST transport these are
+    # requests' ConnectionError / ReadTimeout, which subclass OSError rather
+    # than the builtin ConnectionError / TimeoutError.
+    return isinstance(error, (OSError, TimeoutError))
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`; each request takes one."""
+
+    def __init__(self, rate=GEMINI_RATE, capacity=GEMINI_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=GEMINI_QUEUE_TIMEOUT):
+        """Takes a token, waiting up to `timeout` seconds. Returns False if none came free."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                delay = (1 - self._tokens) / self.rate if self.rate > 0 else timeout
+            if now + delay > deadline:
+                return False
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `threshold` consecutive failures it opens
+    and rejects calls for `reset_timeout` seconds, then lets a single trial
+    call through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=GEMINI_BREAKER_THRESHOLD, reset_timeout=GEMINI_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def cancel_trial(self):
+        # The trial call never reached Gemini (e.g. no quota), so let another try
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class GeminiScheduler:
+    """
+    Central gate for Gemini calls: a token bucket and a circuit breaker per API
+    key, a global cap on in-flight requests, retries with exponential backoff
+    and full jitter on retryable errors, and optional hedged requests.
+
+    `call` either returns the result or raises; it never invents a value.
+    Callers turn GeminiUnavailable into a degraded result or an HTTP 503.
+    """
+
+    def __init__(self, rate=GEMINI_RATE, burst=GEMINI_BURST, max_concurrency=GEMINI_MAX_CONCURRENCY,
+                 queue_timeout=GEMINI_QUEUE_TIMEOUT, max_retries=GEMINI_MAX_RETRIES,
+                 backoff_base=GEMINI_BACKOFF_BASE, backoff_max=GEMINI_BACKOFF_MAX,
+                 breaker_threshold=GEMINI_BREAKER_THRESHOLD, breaker_reset=GEMINI_BREAKER_RESET,
+                 hedge_after=GEMINI_HEDGE_AFTER):
+        self.rate = rate
+        self.burst = burst
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.hedge_after = hedge_after
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="gemini-hedge")
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0, "hedged": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def bucket(self, api_key):
+        with self._lock:
+            if api_key not in self._buckets:
+                self._buckets[api_key] = TokenBucket(self.rate, self.burst)
+            return self._buckets[api_key]
+
+    def breaker(self, api_key):
+        with self._lock:
+            if api_key not in self._breakers:
+                self._breakers[api_key] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self._breakers[api_key]
+
+    def backoff(self, attempt):
+        # "Full jitter": uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _queue_timeout(self, deadline):
+        if deadline is None:
+            return self.queue_timeout
+        return max(0.0, min(self.queue_timeout, deadline - time.monotonic()))
+
+    def _run(self, api_key, func, args, kwargs, take_token=True, deadline=None):
+        if take_token and not self.bucket(api_key).acquire(self._queue_timeout(deadline)):
+            self._count("rejected")
+            raise GeminiUnavailable("Gemini rate limit reached for this API key, try again shortly")
+        if not self._slots.acquire(timeout=self._queue_timeout(deadline)):
+            self._count("rejected")
+            raise GeminiUnavailable("Too many Gemini requests in flight, try again shortly")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+    def _hedged(self, api_key, func, args, kwargs, deadline=None):
+        primary = self._executor.submit(self._run, api_key, func, args, kwargs, True, deadline)
+        try:
+            return primary.result(timeout=self.hedge_after)
+        except FutureTimeout:
+            pass
+        # Only hedge with spare quota: the duplicate must not wait for a token
+        if not self.bucket(api_key).acquire(0):
+            return primary.result()
+        hedge = self._executor.submit(self._run, api_key, func, args, kwargs, False, deadline)
+        self._count("hedged")
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        first = done.pop()
+        if first.exception() is None:
+            return first.result()
+        other = hedge if first is primary else primary
+        if isinstance(first.exception(), GeminiUnavailable) or other.exception() is None:
+            return other.result()
+        raise first.exception()
+
+    def call(self, api_key, func, *args, hedge=False, deadline=None, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` under the limits for `api_key`. `deadline`
+        (time.monotonic(), default: the one set by run_with_deadline) bounds
+        queueing, the request timeout and retries; once it has passed the call
+        gives up with GeminiUnavailable.
+        """
+        self._count("calls")
+        if deadline is None:
+            deadline = _deadline.get()
+        breaker = self.breaker(api_key)
+        attempt = 0
+        while True:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._count("rejected")
+                    raise GeminiUnavailable("Gemini call abandoned: the caller's deadline has passed")
+                options = kwargs.get("request_options")
+                if options and options.get("timeout"):
+                    kwargs["request_options"] = {**options, "timeout": min(options["timeout"], remaining)}
+            if not breaker.allow():
+                self._count("rejected")
+                raise GeminiUnavailable("Gemini is failing for this API key (circuit open), try again shortly")
+            try:
+                if hedge and self.hedge_after > 0:
+                    result = self._hedged(api_key, func, args, kwargs, deadline)
+                else:
+                    result = self._run(api_key, func, args, kwargs, deadline=deadline)
+            except GeminiUnavailable:
+                breaker.cancel_trial()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    if http_code(e) is not None:
+                        # The service answered (e.g. invalid request or key): not an outage
+                        breaker.record_success()
+                    else:
+                        # Failed before any answer: says nothing about Gemini's health
+                        breaker.cancel_trial()
+                    raise
+                breaker.record_failure()
+                delay = self.backoff(attempt)
+                if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay >= deadline):
+                    self._count("failures")
+                    raise GeminiUnavailable(f"Gemini call failed after {attempt + 1} attempts: {e}") from e
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = list(self._breakers.values())
+        stats["open_circuits"] = sum(1 for b in breakers if b.state != "closed")
+        return stats
+
+
+def run_with_deadline(deadline, func, *args, **kwargs):
+    """
+    Runs `func(*args, **kwargs)` with every scheduled Gemini call it makes
+    (in this thread, or in threads started with its context) bounded by
+    `deadline`, a time.monotonic() value.
+    """
+    token = _deadline.set(deadline)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _deadline.reset(token)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler()
+        return _scheduler
+
+
+def request_options():
+    # The scheduler owns retries, so the SDK's own retry is disabled
+    return {"timeout": GEMINI_TIMEOUT, "retry": None}
+
+
+def generate_content(api_key, model_name, prompt, hedge=False, **kwargs):
+    """model.generate_content through the scheduler."""
+    model = get_model(api_key, model_name)
+    return get_scheduler().call(api_key, model.generate_content, prompt, hedge=hedge,
+                                request_options=request_options(), **kwargs)
+
+
+def stream_content(api_key, model_name, prompt, **kwargs):
+    """
+    Streaming generate_content through the scheduler. Opening the stream (up
+    to the first chunk) is rate limited and retried; chunks after that are not.
+    """
+    model = get_model(api_key, model_name)
+    return get_scheduler().call(api_key, model.generate_content, prompt, stream=True,
+                                request_options=request_options(), **kwargs)
+
+
+def embed_content(api_key, hedge=False, **kwargs):
+    """genai.embed_content (single text or batch) through the scheduler."""
+    import google.generativeai as genai  # Deferred: see core.clients
+    return get_scheduler().call(api_key, genai.embed_content, hedge=hedge,
+                                client=get_client(api_key) if api_key else None,
+                                request_options=request_options(), **kwargs)
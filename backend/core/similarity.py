@@ -0,0 +1,59 @@
+import numpy as np
+
+# Shared similarity kernels for both scoring engines (backend/core/nlp.py and
+# the Streamlit nlp_engine.py). Everything works on float32 matrices so that
+# many-to-many comparisons cost one matrix multiply.
+
+
+def as_matrix(vectors):
+    """Converts a vector, a list of vectors or a tensor into a 2-D float32 array."""
+    if hasattr(vectors, "detach"):
+        # torch tensors (e.g. SentenceTransformer with convert_to_tensor=True)
+        vectors = vectors.detach().cpu().numpy()
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    return matrix
+
+
+def normalize_rows(matrix):
+    """L2-normalizes each row; all-zero rows stay zero."""
+    matrix = as_matrix(matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def cosine_matrix(a, b):
+    """Cosine similarity of every row of `a` against every row of `b`, shape (len(a), len(b))."""
+    a, b = as_matrix(a), as_matrix(b)
+    if a.shape[0] == 0 or b.shape[0] == 0:
+        return np.zeros((a.shape[0], b.shape[0]), dtype=np.float32)
+    return normalize_rows(a) @ normalize_rows(b).T
+
+
+def cosine(a, b):
+    """Cosine similarity of two single vectors as a Python float."""
+    return float(cosine_matrix(a, b)[0, 0])
+
+
+def max_per_row(similarities):
+    """
+    Best match for each row (e.g. how well each JD sentence is covered).
+    Returns (scores, column indices).
+    """
+    similarities = np.asarray(similarities, dtype=np.float32)
+    if similarities.shape[1] == 0:
+        empty = np.zeros(similarities.shape[0])
+        return empty.astype(np.float32), empty.astype(np.int64)
+    return similarities.max(axis=1), similarities.argmax(axis=1)
+
+
+def top_k(scores, k):
+    """Indices of the `k` highest scores, best first."""
+    scores = np.asarray(scores).reshape(-1)
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
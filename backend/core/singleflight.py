@@ -0,0 +1,40 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one computation.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same future and receive the same result (or the
+    same exception). The entry is dropped as soon as the work finishes, so
+    this is deduplication only, not caching.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, func):
+        future, _ = self.join(key, func)
+        # Shield so one client disconnecting doesn't cancel the others' result
+        return await asyncio.shield(future)
+
+    def join(self, key, func):
+        """
+        Like do(), but returns (future, leader) without waiting: `leader` is
+        True if this call started the work. For callers that consume the
+        work's progress themselves, e.g. a streamed response.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = asyncio.ensure_future(func())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return future, True
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
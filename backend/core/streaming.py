@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+
+from .scheduler import GeminiUnavailable
+
+
+async def iterate_in_thread(make_iterator, *args):
+    """
+    Runs a blocking iterator (e.g. a streaming Gemini response) in a worker
+    thread and yields its items on the event loop as they arrive.
+
+    When the consumer stops early - the client disconnected and the response
+    was cancelled - the worker stops at the next item and closes the
+    iterator, which cancels the underlying request.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(kind, value=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+        except RuntimeError:
+            # The event loop is gone; nobody is listening any more
+            stop.set()
+
+    def produce():
+        iterator = None
+        try:
+            iterator = make_iterator(*args)
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put("item", item)
+        except Exception as e:
+            put("error", e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            put("done")
+
+    threading.Thread(target=produce, name="stream-producer", daemon=True).start()
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "error":
+                raise value
+            if kind == "done":
+                return
+            yield value
+    finally:
+        stop.set()
+
+
+def sse(event, data):
+    """One Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def ndjson(event, data):
+    """One newline-delimited JSON line: {"event": ..., "data": ...}."""
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+# Event formats for streamed responses: name -> (formatter, media type)
+EVENT_FORMATS = {
+    "sse": (sse, "text/event-stream"),
+    "ndjson": (ndjson, "application/x-ndjson"),
+}
+
+
+async def sse_text_events(first, chunks):
+    """
+    SSE body for a streamed generation: a "token" event per text chunk
+    (starting with the already received `first`), then "done" with the full
+    text. A failure after the response has started can no longer change the
+    status code, so it is sent as an "error" event instead.
+    """
+    parts = []
+    try:
+        if first is not None:
+            parts.append(first)
+            yield sse("token", {"text": first})
+        async for text in chunks:
+            parts.append(text)
+            yield sse("token", {"text": text})
+        yield sse("done", {"text": "".join(parts).strip()})
+    except GeminiUnavailable as e:
+        yield sse("error", {"status": 503, "detail": str(e)})
+    except Exception as e:
+        yield sse("error", {"status": 500, "detail": str(e)})
+    finally:
+        await chunks.aclose()
@@ -1,18 +1,11 @@
-import pdfplumber
-import io
+from .extraction import extract_text
 
 def extract_text_from_pdf_bytes(pdf_bytes):
     """
-    Extracts text from a PDF file (bytes).
+    Extracts text from a PDF file (bytes, or a SpooledPDF from extraction.spool_upload).
     """
     try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            text = ""
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
-        return text
+        return extract_text(pdf_bytes)
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return None
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from .similarity import normalize_rows, top_k
+
+# Above this many vectors the index switches from exact search to IVF
+APPROX_INDEX_THRESHOLD = int(os.getenv("APPROX_INDEX_THRESHOLD", "5000"))
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index with incremental inserts and deletes.
+
+    Small collections are searched exactly with one matrix-vector product.
+    Once the collection grows past `approx_threshold`, an IVF (inverted file)
+    layer is trained with k-means: each vector is assigned to its nearest
+    centroid and a query only scores vectors in the `nprobe` closest cells.
+    The index is retrained when it doubles in size since the last training.
+
+    `space` names the embedding space the vectors come from (e.g. the
+    embedding provider); it is saved with the index so callers can tell
+    whether a loaded index still matches their embeddings.
+    """
+
+    def __init__(self, dim=None, approx_threshold=APPROX_INDEX_THRESHOLD, nprobe=8, space=None):
+        self.dim = dim
+        self.space = space
+        self.approx_threshold = approx_threshold
+        self.nprobe = nprobe
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)  # Normalized rows, with spare capacity
+        self._ids = []
+        self._rows = {}  # id -> row
+        self._centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)  # Row -> centroid (IVF only)
+        self._trained_size = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._rows
+
+    def _grow(self, needed):
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+        assign = np.zeros(new_capacity, dtype=np.int32)
+        assign[:len(self._ids)] = self._assign[:len(self._ids)]
+        self._vectors, self._assign = vectors, assign
+
+    def add(self, item_id, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vector.shape[0]
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            if vector.shape[0] != self.dim:
+                raise ValueError(f"Expected a {self.dim}-dimensional vector, got {vector.shape[0]}")
+
+            vector = normalize_rows(vector)[0]
+            row = self._rows.get(item_id)
+            if row is None:
+                row = len(self._ids)
+                self._grow(row + 1)
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+            self._vectors[row] = vector
+
+            if self._centroids is not None:
+                self._assign[row] = int(np.argmax(self._centroids @ vector))
+            self._maybe_train()
+
+    def remove(self, item_id):
+        with self._lock:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return False
+            # Swap the last row into the hole to keep storage dense
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._vectors[row] = self._vectors[last]
+                self._assign[row] = self._assign[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            if len(self._ids) < self.approx_threshold:
+                self._centroids = None
+            return True
+
+    def _maybe_train(self):
+        size = len(self._ids)
+        if size < self.approx_threshold:
+            return
+        if self._centroids is not None and size < 2 * self._trained_size:
+            return
+        self.train()
+
+    def train(self, iterations=10, seed=0):
+        """(Re)builds the IVF cells with spherical k-means over the stored vectors."""
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return
+            data = self._vectors[:size]
+            nlist = max(1, int(np.sqrt(size)))
+            rng = np.random.default_rng(seed)
+            sample = data[rng.choice(size, size=min(size, nlist * 64), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = normalize_rows(centroids)
+
+            self._centroids = centroids.astype(np.float32)
+            self._assign[:size] = np.argmax(data @ self._centroids.T, axis=1)
+            self._trained_size = size
+
+    def search(self, query, k=10):
+        """Returns up to `k` (id, cosine similarity) pairs, best first."""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            size = len(self._ids)
+            if size == 0 or k <= 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Expected a {self.dim}-dimensional query, got {query.shape[0]}")
+            query = normalize_rows(query)[0]
+            data = self._vectors[:size]
+
+            if self._centroids is None:
+                rows = np.arange(size)
+            else:
+                probes = top_k(self._centroids @ query, self.nprobe)
+                rows = np.flatnonzero(np.isin(self._assign[:size], probes))
+                if len(rows) < k:
+                    rows = np.arange(size)
+
+            scores = data[rows] @ query
+            return [(self._ids[rows[i]], float(scores[i])) for i in top_k(scores, k)]
+
+    def save(self, path):
+        """Writes `<path>.npy` (vectors) and `<path>.json` (ids + IVF state)."""
+        with self._lock:
+            size = len(self._ids)
+            np.save(path + ".npy", self._vectors[:size])
+            meta = {
+                "dim": self.dim,
+                "space": self.space,
+                "ids": self._ids,
+                "assign": self._assign[:size].tolist() if self._centroids is not None else None,
+                "centroids": self._centroids.tolist() if self._centroids is not None else None,
+                "trained_size": self._trained_size,
+            }
+            tmp = path + ".json.tmp"
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, path + ".json")
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Loads an index written by `save`; returns an empty index if none exists."""
+        if not os.path.exists(path + ".json"):
+            return cls(**kwargs)
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        index = cls(dim=meta["dim"], space=meta.get("space"), **kwargs)
+        vectors = np.load(path + ".npy")
+        size = len(meta["ids"])
+        if size:
+            index._grow(size)
+            index._vectors[:size] = vectors
+        index._ids = list(meta["ids"])
+        index._rows = {item_id: row for row, item_id in enumerate(index._ids)}
+        if meta["centroids"] is not None:
+            index._centroids = np.asarray(meta["centroids"], dtype=np.float32)
+            index._assign[:size] = meta["assign"]
+            index._trained_size = meta["trained_size"]
+        return index
@@ -1,17 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import asyncio
+import threading
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import uvicorn
+from typing import List, Optional
 import os
 import sys
 
 # Add current directory to path so we can import core modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.nlp import calculate_role_fit_score, analyze_skill_gaps, get_recruiter_metrics, get_sentence_scores
-from core.genai import generate_achievement, get_sub_scores, generate_project_idea
-from core.utils import extract_text_from_pdf_bytes
+# Only light modules are imported here. The scoring stack (NumPy, pdfplumber,
+# google.generativeai) is imported by the endpoints that use it, so a cold
+# start - and e.g. /api/generate-project - doesn't pay for it.
+# `python benchmarks/startup_report.py` shows the import cost per module.
+from core.genai import generate_achievement, generate_achievements, stream_achievement
+from core.ideas import (get_project_idea, get_project_ideas, stream_cached_project_idea, warm_up, idea_stats,
+                        COMMON_SKILLS)
+from core.singleflight import SingleFlight
+from core.cache import ResultCache
+from core.extraction import spool_upload, PDFTooLarge
+from core.scheduler import GeminiUnavailable
+from core.streaming import iterate_in_thread, sse_text_events, EVENT_FORMATS
 
 app = FastAPI()
 
@@ -24,6 +35,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Identical analyses that are already in flight are shared, not repeated
+inflight_analyses = SingleFlight()
+
+# Finished analyses are cached by content hash; set ANALYZE_CACHE_DB for a disk tier
+analysis_cache = ResultCache(
+    max_size=int(os.getenv("ANALYZE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ANALYZE_CACHE_TTL", "86400")),
+    db_path=os.getenv("ANALYZE_CACHE_DB"),
+)
+
+# Job descriptions registered once via /api/jobs; set JOBS_DB / JOB_INDEX_PATH to persist.
+# Created on first use (it loads the vector index).
+_job_registry = None
+_job_registry_lock = threading.Lock()
+
+def get_job_registry():
+    global _job_registry
+    with _job_registry_lock:
+        if _job_registry is None:
+            from core.jobs import JobRegistry
+            _job_registry = JobRegistry(db_path=os.getenv("JOBS_DB"), index_path=os.getenv("JOB_INDEX_PATH"))
+        return _job_registry
+
+def get_registered_job(job_id):
+    # A job to score against: it must exist and share the resumes' embedding provider
+    registry = get_job_registry()
+    job = registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    if not registry.compatible(job):
+        raise HTTPException(status_code=409, detail=(
+            f"Job {job_id} was embedded with '{job.get('embedding_provider')}', but the server now uses "
+            f"'{registry.provider}' embeddings; register it again via /api/jobs"))
+    return job
+
+# Keeps proxies (e.g. nginx) from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 class AnalyzeRequest(BaseModel):
     jd_text: str
     resume_text: Optional[str] = None
@@ -41,38 +90,292 @@ def read_root():
 @app.post("/api/analyze")
 async def analyze_resume(
     resume_file: UploadFile = File(...),
-    jd_text: str = Form(...),
+    jd_text: Optional[str] = Form(None),
+    job_id: Optional[str] = Form(None),
     api_key: str = Form(...),
     model_name: str = Form(...)
 ):
+    from core.pipeline import analysis_key
+
+    try:
+        job = None
+        if job_id:
+            job = get_registered_job(job_id)
+            jd_text = job["jd_text"]
+        elif not jd_text:
+            raise HTTPException(status_code=400, detail="Provide either jd_text or job_id")
+            
+        pdf = await spool_upload(resume_file)
+        key = analysis_key(pdf.digest, jd_text, model_name, job_id)
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            pdf.close()
+            return cached
+            
+        leader = False
+        def start():
+            nonlocal leader
+            leader = True
+            return _analyze_pdf(key, pdf, jd_text, api_key, model_name, job)
+        try:
+            return await inflight_analyses.do(key, start)
+        finally:
+            # The leader's computation closes the spooled PDF itself
+            if not leader:
+                pdf.close()
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analyze/stream")
+async def stream_analysis(
+    resume_file: UploadFile = File(...),
+    jd_text: Optional[str] = Form(None),
+    job_id: Optional[str] = Form(None),
+    api_key: str = Form(...),
+    model_name: str = Form(...),
+    format: str = Form("sse")
+):
+    # Progressive /api/analyze: one event per section as soon as it is ready
+    # (see ANALYSIS_SECTIONS), then "summary" with the full /api/analyze
+    # result. Each section's data holds the result keys it fills in.
+    # `format` is "sse" (Server-Sent Events) or "ndjson".
+    from core.pipeline import analysis_key
+    from core.utils import extract_text_from_pdf_bytes
+
+    if format not in EVENT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EVENT_FORMATS)}")
+    event, media_type = EVENT_FORMATS[format]
+    try:
+        job = None
+        if job_id:
+            job = get_registered_job(job_id)
+            jd_text = job["jd_text"]
+        elif not jd_text:
+            raise HTTPException(status_code=400, detail="Provide either jd_text or job_id")
+
+        pdf = await spool_upload(resume_file)
+        key = analysis_key(pdf.digest, jd_text, model_name, job_id)
+        cached = analysis_cache.get(key)
+        resume_text = None
+        if cached is not None or key in inflight_analyses:
+            # Replayed from the cache, or from the identical analysis already running
+            pdf.close()
+        else:
+            try:
+                resume_text = await asyncio.to_thread(extract_text_from_pdf_bytes, pdf)
+            finally:
+                pdf.close()
+            if not resume_text:
+                raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if cached is not None:
+        events = _replay_analysis(cached, event)
+    else:
+        # Shared with identical /api/analyze and /api/analyze/stream requests.
+        # The analysis runs as its own task: the leader's response streams
+        # its sections as they finish, followers replay the final result,
+        # and a client disconnecting doesn't cancel it for the others.
+        sections = asyncio.Queue()
+        flight, leader = inflight_analyses.join(
+            key, lambda: _analyze_sections(key, resume_text, jd_text, api_key, model_name, job, sections))
+        events = _stream_analysis(flight, sections if leader else None, event)
+    return StreamingResponse(events, media_type=media_type, headers=SSE_HEADERS)
+
+# Which result keys each streamed section carries
+ANALYSIS_SECTIONS = {
+    "recruiter_metrics": ["recruiter_metrics"],
+    "heatmap": ["sentence_scores"],
+    "fit_score": ["score"],
+    "skill_gaps": ["missing_skills"],
+    "sub_scores": ["sub_scores", "context_tokens"],
+}
+
+async def _replay_analysis(result, event):
+    for section, keys in ANALYSIS_SECTIONS.items():
+        yield event(section, {k: result[k] for k in keys})
+    yield event("summary", result)
+
+async def _analyze_sections(key, resume_text, jd_text, api_key, model_name, job, sections):
+    # Puts (section, data) on `sections` as each one finishes, then None
+    from core.pipeline import analysis_sections, analysis_result
+
+    degraded, fields = [], {}
     try:
-        # Extract text from PDF bytes
-        content = await resume_file.read()
-        resume_text = extract_text_from_pdf_bytes(content)
+        async for section, data in analysis_sections(resume_text, jd_text, api_key, model_name, job=job,
+                                                     degraded=degraded):
+            fields.update(data)
+            sections.put_nowait((section, data))
+    finally:
+        sections.put_nowait(None)
+    result = analysis_result(resume_text, fields, degraded)
+    if not degraded:
+        analysis_cache.set(key, result)
+    return result
+
+async def _stream_analysis(flight, sections, event):
+    # The leader passes the queue its analysis fills; followers pass None
+    try:
+        if sections is not None:
+            while (item := await sections.get()) is not None:
+                yield event(*item)
+            yield event("summary", await asyncio.shield(flight))
+        else:
+            async for chunk in _replay_analysis(await asyncio.shield(flight), event):
+                yield chunk
+    except HTTPException as e:
+        yield event("error", {"status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        yield event("error", {"status": 500, "detail": str(e)})
+
+async def _analyze_pdf(key, pdf, jd_text, api_key, model_name, job=None):
+    from core.pipeline import run_analysis
+    from core.utils import extract_text_from_pdf_bytes
+
+    # Extract text from the PDF (CPU-bound, keep it off the event loop)
+    try:
+        resume_text = await asyncio.to_thread(extract_text_from_pdf_bytes, pdf)
+    finally:
+        pdf.close()
+    
+    if not resume_text:
+        raise HTTPException(status_code=400, detail="Could not extract text from PDF")
         
+    # NLP + GenAI stages run concurrently
+    result = await run_analysis(resume_text, jd_text, api_key, model_name, job=job)
+    if not result["degraded"]:
+        analysis_cache.set(key, result)
+    return result
+
+# Upper bound on resumes per /api/rank request (each is spooled and extracted)
+MAX_RANK_FILES = int(os.getenv("MAX_RANK_FILES", "100"))
+
+@app.post("/api/rank")
+async def rank_endpoint(
+    resume_files: List[UploadFile] = File(...),
+    jd_text: Optional[str] = Form(None),
+    job_id: Optional[str] = Form(None),
+    api_key: str = Form(...),
+    model_name: str = Form(...),
+    top_n_details: int = Form(0)
+):
+    from core.ranking import rank_resumes
+
+    if len(resume_files) > MAX_RANK_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RANK_FILES} resumes per request")
+    try:
+        job = None
+        if job_id:
+            job = get_registered_job(job_id)
+            jd_text = job["jd_text"]
+        elif not jd_text:
+            raise HTTPException(status_code=400, detail="Provide either jd_text or job_id")
+            
+        files = []
+        try:
+            for f in resume_files:
+                files.append((f.filename, await spool_upload(f)))
+            return await rank_resumes(files, jd_text, api_key, model_name, top_n_details, job=job)
+        finally:
+            for _, pdf in files:
+                pdf.close()
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/jobs")
+async def register_job(
+    jd_text: str = Form(...),
+    api_key: str = Form(...),
+    model_name: str = Form(...),
+    title: Optional[str] = Form(None)
+):
+    from core.jobs import job_summary
+
+    try:
+        job = await asyncio.to_thread(get_job_registry().register, jd_text, api_key, model_name, title)
+        return job_summary(job)
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    from core.jobs import job_summary
+
+    job = get_job_registry().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return job_summary(job)
+
+@app.delete("/api/jobs/{job_id}")
+def delete_job(job_id: str):
+    if not get_job_registry().delete(job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return {"deleted": job_id}
+
+@app.post("/api/jobs/match")
+async def match_jobs(
+    resume_file: UploadFile = File(...),
+    api_key: str = Form(...),
+    top_k: int = Form(10)
+):
+    from core.jobs import job_summary, EmbeddingMismatch
+    from core.nlp import embed_text
+    from core.utils import extract_text_from_pdf_bytes
+
+    try:
+        pdf = await spool_upload(resume_file)
+        try:
+            resume_text = await asyncio.to_thread(extract_text_from_pdf_bytes, pdf)
+        finally:
+            pdf.close()
         if not resume_text:
             raise HTTPException(status_code=400, detail="Could not extract text from PDF")
             
-        # NLP Analysis
-        score = calculate_role_fit_score(resume_text, jd_text, api_key)
-        missing_skills = list(analyze_skill_gaps(resume_text, jd_text, api_key))
-        recruiter_metrics = get_recruiter_metrics(resume_text)
-        sentence_scores = get_sentence_scores(resume_text, jd_text, api_key)
-        
-        # GenAI Analysis (Sub-scores)
-        sub_scores = get_sub_scores(resume_text, jd_text, api_key, model_name)
-        
+        embedding = await asyncio.to_thread(embed_text, resume_text, api_key=api_key)
+        if not embedding:
+            raise HTTPException(status_code=502, detail="Could not embed the resume")
+            
+        job_registry = get_job_registry()
+        matches = job_registry.match(embedding, top_k)
         return {
-            "score": score,
-            "missing_skills": missing_skills,
-            "recruiter_metrics": recruiter_metrics,
-            "sentence_scores": sentence_scores,
-            "sub_scores": sub_scores,
-            "resume_text": resume_text[:1000] + "..." # Preview
+            "matches": [dict(job_summary(job), score=score) for job, score in matches],
+            "catalog_size": len(job_registry.index)
         }
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except EmbeddingMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    from core.scheduler import get_scheduler
+    return {"analysis": analysis_cache.stats(), "project_ideas": idea_stats(), "gemini": get_scheduler().stats()}
+
 @app.post("/api/generate-achievement")
 async def generate_achievement_endpoint(
     bullet_point: str = Form(...),
@@ -81,8 +384,52 @@ async def generate_achievement_endpoint(
     model_name: str = Form(...)
 ):
     try:
-        enhanced_text = generate_achievement(bullet_point, job_title, api_key, model_name)
+        enhanced_text = await asyncio.to_thread(generate_achievement, bullet_point, job_title, api_key, model_name)
         return {"enhanced_text": enhanced_text}
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def stream_text_response(make_iterator, *args):
+    # Wait for the first chunk before answering, so a Gemini failure still
+    # gets a proper status code; everything after that is streamed as SSE
+    chunks = iterate_in_thread(make_iterator, *args)
+    try:
+        first = await anext(chunks, None)
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(sse_text_events(first, chunks), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/api/generate-achievement/stream")
+async def stream_achievement_endpoint(
+    bullet_point: str = Form(...),
+    job_title: str = Form(...),
+    api_key: str = Form(...),
+    model_name: str = Form(...)
+):
+    # Same as /api/generate-achievement, but tokens are sent as they are generated
+    return await stream_text_response(stream_achievement, bullet_point, job_title, api_key, model_name)
+
+# Upper bound on bullets per /api/generate-achievements request
+MAX_BATCH_BULLETS = int(os.getenv("MAX_BATCH_BULLETS", "50"))
+
+@app.post("/api/generate-achievements")
+async def generate_achievements_endpoint(
+    bullet_points: List[str] = Form(...),
+    job_title: str = Form(...),
+    api_key: str = Form(...),
+    model_name: str = Form(...)
+):
+    # Per-bullet results: a failed bullet carries an "error" instead of failing the request
+    if len(bullet_points) > MAX_BATCH_BULLETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_BULLETS} bullet points per request")
+    try:
+        results = await asyncio.to_thread(generate_achievements, bullet_points, job_title, api_key, model_name)
+        succeeded = sum(1 for r in results if r["error"] is None)
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -93,10 +440,45 @@ async def generate_project_endpoint(
     model_name: str = Form(...)
 ):
     try:
-        idea = generate_project_idea(skill, api_key, model_name)
-        return {"idea": idea}
+        idea, cached = await asyncio.to_thread(get_project_idea, skill, api_key, model_name)
+        return {"idea": idea, "cached": cached}
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/generate-project/stream")
+async def stream_project_endpoint(
+    skill: str = Form(...),
+    api_key: str = Form(...),
+    model_name: str = Form(...)
+):
+    # A cached idea arrives as a single token event
+    return await stream_text_response(stream_cached_project_idea, skill, api_key, model_name)
+
+@app.post("/api/generate-projects")
+async def generate_projects_endpoint(
+    skills: List[str] = Form(...),
+    api_key: str = Form(...),
+    model_name: str = Form(...)
+):
+    # Ideas for a whole missing_skills list; uncached skills share one LLM call
+    try:
+        ideas = await asyncio.to_thread(get_project_ideas, skills, api_key, model_name)
+        return {"ideas": ideas}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/project-ideas/warmup")
+async def warm_up_project_ideas(
+    background_tasks: BackgroundTasks,
+    api_key: str = Form(...),
+    model_name: str = Form(...)
+):
+    # Meant for a scheduled job: pre-generates ideas for the most common skills
+    background_tasks.add_task(asyncio.to_thread, warm_up, api_key, model_name)
+    return {"scheduled": len(COMMON_SKILLS)}
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,90 @@
+"""
+Benchmark: full en_core_web_sm pipeline vs the pruned nlp_engine pipeline.
+
+Usage (from the repo root):
+    python benchmarks/bench_spacy.py --docs 50 --size typical --batch-size 16 --n-process 1
+
+Parses synthetic resumes from benchmarks/corpus.py and reports per-document
+parse time and the memory allocated while loading each pipeline and
+processing the corpus.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Allow running as a script from anywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spacy
+
+from benchmarks.corpus import SIZES, synthetic_resume
+from nlp_engine import SPACY_MODEL, SPACY_EXCLUDE, build_spacy_pipeline
+
+
+def measure(label, load, texts, batch_size, n_process):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    nlp = load()
+    load_seconds = time.perf_counter() - start
+    _, load_peak = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    docs = list(nlp.pipe(texts, batch_size=batch_size, n_process=n_process))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sentences = sum(len(list(doc.sents)) for doc in docs)
+    return {
+        "pipeline": label,
+        "components": nlp.pipe_names,
+        "load_s": round(load_seconds, 3),
+        "ms_per_doc": round(elapsed / len(texts) * 1000, 2),
+        "docs_per_s": round(len(texts) / elapsed, 1),
+        "load_peak_mb": round(load_peak / 1e6, 1),
+        "total_peak_mb": round(peak / 1e6, 1),
+        "sentences": sentences,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--size", choices=list(SIZES), default="typical", help="Synthetic resume size")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    texts = [synthetic_resume(args.size, seed) for seed in range(args.docs)]
+
+    full = measure("full", lambda: spacy.load(SPACY_MODEL), texts, args.batch_size, args.n_process)
+    pruned = measure(f"pruned (exclude={','.join(SPACY_EXCLUDE)})", build_spacy_pipeline,
+                     texts, args.batch_size, args.n_process)
+    results = {
+        "results": [full, pruned],
+        "speedup": round(full["ms_per_doc"] / pruned["ms_per_doc"], 2),
+        "memory_reduction_mb": round(full["total_peak_mb"] - pruned["total_peak_mb"], 1),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for r in results["results"]:
+        print(f"{r['pipeline']}")
+        print(f"  components:  {', '.join(r['components'])}")
+        print(f"  load:        {r['load_s']}s ({r['load_peak_mb']} MB)")
+        print(f"  per doc:     {r['ms_per_doc']} ms ({r['docs_per_s']} docs/s)")
+        print(f"  peak memory: {r['total_peak_mb']} MB")
+    print(f"\nSpeedup: {results['speedup']}x per document, "
+          f"{results['memory_reduction_mb']} MB less peak memory")
+
+
+if __name__ == "__main__":
+    main()
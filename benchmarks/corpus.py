@@ -0,0 +1,138 @@
+"""
+Synthetic resume/JD corpus for the benchmarks.
+
+Everything is generated from a seed, so a corpus is identical across runs and
+machines. Sizes:
+
+    short         a few lines (a student resume, a one-paragraph JD)
+    typical       a one/two page resume and a full JD
+    pathological  far past anything real: a 20-page resume with hundreds of
+                  sentences, and a JD pasted without any punctuation
+
+Usage (from the repo root):
+    python benchmarks/corpus.py --size typical --seed 1
+"""
+import argparse
+import json
+import random
+
+SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "React", "AWS", "Spark", "TensorFlow", "Go", "Kafka",
+          "PostgreSQL", "Redis", "TypeScript", "Terraform", "Airflow", "GraphQL", "Java", "Linux"]
+VERBS = ["Led", "Built", "Engineered", "Developed", "Managed", "Designed", "Implemented", "Launched",
+         "Worked on", "Helped with", "Maintained", "Migrated"]
+OBJECTS = ["a data pipeline", "the billing service", "a recommendation engine", "CI/CD workflows",
+           "an internal analytics dashboard", "the authentication layer", "a real-time alerting system",
+           "the customer onboarding flow", "a feature store", "the search backend"]
+BUZZWORDS = ["synergy", "hardworking", "motivated", "proactive", "passionate", "driven"]
+JD_LINES = [
+    "We are looking for a {role} to join our platform team.",
+    "Must have {years}+ years of experience with {skill} in production.",
+    "Strong knowledge of {skill} and {skill} is required.",
+    "Experience designing APIs and distributed systems with {skill}.",
+    "Familiarity with {skill} is a plus.",
+    "You will own services end to end, from design to on-call.",
+    "Bachelor's degree in Computer Science or equivalent experience.",
+    "We are an equal opportunity employer and value diversity.",
+]
+ROLES = ["Backend Engineer", "Data Engineer", "Machine Learning Engineer", "Platform Engineer"]
+
+# (resume sentences, resume pages, JD lines) per size
+SIZES = {
+    "short": (6, 1, 4),
+    "typical": (40, 2, 14),
+    "pathological": (600, 20, 400),
+}
+
+
+def resume_sentence(rng):
+    sentence = (f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and "
+                f"{rng.choice(SKILLS)}, improving throughput by {rng.randint(5, 80)}%.")
+    if rng.random() < 0.1:
+        sentence = f"{rng.choice(BUZZWORDS).capitalize()} engineer. " + sentence
+    return sentence
+
+
+def synthetic_resume(size="typical", seed=0):
+    sentences, _, _ = SIZES[size]
+    rng = random.Random(f"resume-{size}-{seed}")
+    lines = ["Jane Doe - jane.doe@example.com - +1 555 010 0199", "Experience"]
+    lines += [resume_sentence(rng) for _ in range(sentences)]
+    lines += ["Education", "B.Sc. Computer Science, State University"]
+    return "\n".join(lines)
+
+
+def synthetic_jd(size="typical", seed=0):
+    _, _, count = SIZES[size]
+    rng = random.Random(f"jd-{size}-{seed}")
+    lines = [rng.choice(JD_LINES).format(role=rng.choice(ROLES), years=rng.randint(2, 8),
+                                         skill=rng.choice(SKILLS)) for _ in range(count)]
+    if size == "pathological":
+        # Pasted from a web page: one giant line, no sentence boundaries
+        return " ".join(line.rstrip(".") for line in lines)
+    return "\n".join(lines)
+
+
+def make_pdf(lines, pages=1):
+    """
+    Builds a minimal PDF (Helvetica, no dependencies) with `lines` spread over
+    `pages` pages, one text line per resume line.
+    """
+    per_page = max(1, -(-len(lines) // pages))
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for start in range(0, max(len(lines), 1), per_page):
+        chunk = lines[start:start + per_page]
+        body = " T* ".join(f"({escape_pdf(line)}) Tj" for line in chunk)
+        stream = f"BT /F1 9 Tf 11 TL 36 760 Td {body} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def escape_pdf(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace").decode("latin-1")
+
+
+def synthetic_pdf(size="typical", seed=0):
+    _, pages, _ = SIZES[size]
+    return make_pdf(synthetic_resume(size, seed).splitlines(), pages)
+
+
+def corpus(sizes=tuple(SIZES), seed=0):
+    """Returns {size: {"resume", "jd", "pdf"}} for the given sizes."""
+    return {
+        size: {"resume": synthetic_resume(size, seed), "jd": synthetic_jd(size, seed), "pdf": synthetic_pdf(size, seed)}
+        for size in sizes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=list(SIZES), default="typical")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf", help="Also write the resume as a PDF to this path")
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "wb") as f:
+            f.write(synthetic_pdf(args.size, args.seed))
+    print(json.dumps({"resume": synthetic_resume(args.size, args.seed), "jd": synthetic_jd(args.size, args.seed)},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Local stand-in for the Gemini REST API, for load tests.
+
+Usage (from the repo root):
+    python benchmarks/fake_gemini.py --port 8765 --latency 0.4 --error-rate 0.02 --rate-limit 5
+
+then start the backend with GEMINI_API_ENDPOINT=http://127.0.0.1:8765 (see
+core.clients) and it talks to this server instead of Google.
+
+Implements generateContent, streamGenerateContent, embedContent and
+batchEmbedContents (plus GET /stats with request counts) with:
+
+- latency:     mean seconds per request, plus uniform +/- jitter
+- error rate:  share of requests answered with a 500 error
+- rate limit:  requests per second per API key (token bucket with a burst of
+               the same size, at least 1); over the limit the request gets a
+               429 like Gemini's RESOURCE_EXHAUSTED
+
+Answers are deterministic: hashing-vectorizer embeddings, schema-shaped JSON
+for structured output and a fixed rewrite for plain prompts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# Allow running as a script from anywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.gemini_stub import EMBEDDING_DIM, example
+from backend.core.embeddings import HashingProvider
+
+REWRITE = "Led a team of 5 engineers to ship a billing service in 3 months, cutting infrastructure costs by 20%."
+
+
+class FakeGemini:
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, rate_limit=0.0, token_delay=0.02, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.token_delay = token_delay
+        self._rng = random.Random(seed)
+        self._hashing = HashingProvider(dim=EMBEDDING_DIM)
+        self._buckets = {}  # api_key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+        self.app = Starlette(routes=[
+            Route("/{version}/models/{target:path}", self.handle, methods=["POST"]),
+            Route("/stats", self.get_stats),
+        ])
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _allow(self, api_key):
+        if self.rate_limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            burst = max(1.0, self.rate_limit)
+            tokens, updated = self._buckets.get(api_key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * self.rate_limit)
+            allowed = tokens >= 1
+            self._buckets[api_key] = (tokens - 1 if allowed else tokens, now)
+            return allowed
+
+    def _delay(self):
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _fails(self):
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    async def get_stats(self, request: Request):
+        with self._lock:
+            return JSONResponse(dict(self.stats))
+
+    @staticmethod
+    def error(code, status, message):
+        return JSONResponse({"error": {"code": code, "message": message, "status": status}}, status_code=code)
+
+    async def handle(self, request: Request):
+        self._count("requests")
+        model, _, method = request.path_params["target"].partition(":")
+        api_key = request.headers.get("x-goog-api-key") or request.query_params.get("key") or ""
+        body = await request.json()
+
+        if not self._allow(api_key):
+            self._count("rate_limited")
+            return self.error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        await asyncio.sleep(self._delay())
+        if self._fails():
+            self._count("errors")
+            return self.error(500, "INTERNAL", "An internal error has occurred.")
+
+        if method == "generateContent":
+            response = JSONResponse(self.candidate(self.answer(body)))
+        elif method == "streamGenerateContent":
+            return await self.stream(body)
+        elif method == "embedContent":
+            response = JSONResponse({"embedding": {"values": self.embed([self.text(body["content"])])[0]}})
+        elif method == "batchEmbedContents":
+            texts = [self.text(r["content"]) for r in body.get("requests", [])]
+            response = JSONResponse({"embeddings": [{"values": v} for v in self.embed(texts)]})
+        else:
+            return self.error(404, "NOT_FOUND", f"Unknown method {method} for models/{model}")
+        self._count("ok")
+        return response
+
+    async def stream(self, body):
+        from starlette.responses import StreamingResponse
+
+        words = self.answer(body).split(" ")
+        self._count("ok")
+
+        async def chunks():
+            # The REST transport reads a JSON array of responses incrementally
+            yield "["
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(self.token_delay)
+                    yield ","
+                yield json.dumps(self.candidate(word + (" " if i < len(words) - 1 else "")))
+            yield "]"
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @staticmethod
+    def text(content):
+        return " ".join(part.get("text", "") for part in content.get("parts", []))
+
+    def embed(self, texts):
+        return self._hashing.encode(texts).tolist()
+
+    @staticmethod
+    def answer(body):
+        schema = body.get("generationConfig", {}).get("responseSchema")
+        return json.dumps(example(schema)) if schema else REWRITE
+
+    @staticmethod
+    def candidate(text):
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP",
+                            "index": 0}],
+            "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 20, "totalTokenCount": 120},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform +/- seconds around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail with a 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per API key (0: none)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeGemini(args.latency, args.jitter, args.error_rate, args.rate_limit, args.token_delay, args.seed)
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Deterministic in-process stand-in for Gemini, for benchmarks.
+
+`install()` replaces the scheduler entry points the backend modules imported
+(generate_content / embed_content), so nothing leaves the process and every
+run sees the same answers:
+
+- embeddings are hashing-vectorizer vectors (same text, same vector; similar
+  texts get similar vectors), 768-dimensional like text-embedding-004;
+- generation returns valid JSON for structured-output requests (built from
+  the request's response_schema) and a fixed rewrite otherwise.
+
+`latency` adds a fixed sleep per call to mimic the network round trip.
+`package` selects the copy of the modules to patch: backend/main.py imports
+them as `core` (it puts backend/ on sys.path), the benchmarks as `backend.core`.
+"""
+import importlib
+import json
+import time
+
+from backend.core.embeddings import HashingProvider
+
+EMBEDDING_DIM = 768
+
+_hashing = HashingProvider(dim=EMBEDDING_DIM)
+
+# Schema types as the REST API sends them (enum-encoding=int)
+SCHEMA_TYPES = {1: "string", 2: "number", 3: "integer", 4: "boolean", 5: "array", 6: "object"}
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        # stream=True: the whole answer as a single chunk
+        yield self
+
+
+def example(schema):
+    """A deterministic value matching a (dict) response_schema."""
+    kind = schema.get("type", "object")
+    kind = SCHEMA_TYPES.get(kind, "string") if isinstance(kind, int) else kind.lower()
+    if kind == "object":
+        return {name: example(field) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [example(schema.get("items", {"type": "string"}))]
+    if kind == "integer":
+        return 70
+    if kind == "number":
+        return 70.0
+    if kind == "boolean":
+        return True
+    return "Kubernetes"
+
+
+class GeminiStub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {"generate": 0, "embed": 0}
+
+    def generate_content(self, api_key, model_name, prompt, hedge=False, generation_config=None, **kwargs):
+        self.calls["generate"] += 1
+        time.sleep(self.latency)
+        schema = (generation_config or {}).get("response_schema")
+        if schema:
+            return StubResponse(json.dumps(example(schema)))
+        return StubResponse("Led a team of 5 engineers to ship a billing service, cutting costs by 20%.")
+
+    def stream_content(self, api_key, model_name, prompt, **kwargs):
+        return self.generate_content(api_key, model_name, prompt, **kwargs)
+
+    def embed_content(self, api_key, hedge=False, model=None, content=None, task_type=None, **kwargs):
+        self.calls["embed"] += 1
+        time.sleep(self.latency)
+        if isinstance(content, str):
+            return {"embedding": _hashing.encode([content])[0].tolist()}
+        return {"embedding": _hashing.encode(list(content)).tolist()}
+
+
+def install(latency=0.0, package="backend.core"):
+    """Routes the backend's Gemini calls to a new GeminiStub and returns it."""
+    stub = GeminiStub(latency)
+    nlp = importlib.import_module(f"{package}.nlp")
+    genai = importlib.import_module(f"{package}.genai")
+    nlp.generate_content = stub.generate_content
+    nlp.embed_content = stub.embed_content
+    genai.generate_content = stub.generate_content
+    genai.stream_content = stub.stream_content
+    reset_embedding_cache(package)
+    return stub
+
+
+def reset_embedding_cache(package="backend.core"):
+    """Swaps in an empty in-memory embedding store, so every run embeds from scratch."""
+    embedding_cache = importlib.import_module(f"{package}.embedding_cache")
+    embedding_cache._store = embedding_cache.EmbeddingStore(db_path=":memory:")
@@ -0,0 +1,418 @@
+"""
+End-to-end load test for the FastAPI backend against a local fake Gemini.
+
+Usage (from the repo root):
+    python benchmarks/loadtest.py --concurrency 16 --duration 30 \\
+        --mix analyze=6,analyze-stream=1,generate-achievement=2,generate-project=1 \\
+        --latency 0.4 --error-rate 0.02 --rate-limit 5 --keys 4
+
+Starts benchmarks/fake_gemini.py in its own process (or use --gemini-url),
+runs the real app (backend.main:app) in a single uvicorn worker pointed at
+it through GEMINI_API_ENDPOINT, with all of its caches in memory (or use
+--app-url for a server you started yourself), then keeps --concurrency
+requests in flight for --duration seconds.
+
+Requests are drawn from --mix (endpoint=weight). Resumes come from --pdf-dir,
+or from the synthetic corpus (benchmarks/corpus.py) when none is given; each
+analysis gets a unique JD unless --repeat-inputs is set, so the result cache
+doesn't answer them.
+
+The report has throughput and p50/p95/p99 latency per endpoint, time to first
+byte for streaming endpoints, and errors broken down by status code or
+exception, plus how many analyses came back degraded (a stage failed, so its
+sections are null and it is listed under "degraded"). A "probe" row times
+GET / every --probe-interval seconds: when its latency climbs with load,
+something is blocking the app's event loop.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Allow running as a script from anywhere
+sys.path.append(ROOT)
+
+import httpx
+
+from benchmarks.corpus import SIZES, synthetic_jd, synthetic_pdf
+
+MODEL_NAME = "gemini-2.0-flash"
+DEFAULT_MIX = "analyze=5,analyze-stream=1,generate-achievement=2,generate-achievement-stream=1,generate-project=1"
+BULLETS = ["Managed a team of developers", "Worked on the billing system", "Fixed bugs in the API",
+           "Helped migrate services to the cloud", "Wrote tests for the payment flow"]
+PROJECT_SKILLS = ["Docker", "Kubernetes", "Kafka", "GraphQL", "Terraform", "Airflow", "Redis", "Rust"]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a list of numbers, None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name.strip()}' (expected one of {', '.join(ENDPOINTS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def load_corpus(pdf_dir=None, sizes=("short", "typical"), count=20):
+    """Returns a list of (file name, PDF bytes)."""
+    if pdf_dir:
+        paths = sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")))
+        if not paths:
+            raise ValueError(f"No PDFs in {pdf_dir}")
+        pdfs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                pdfs.append((os.path.basename(path), f.read()))
+        return pdfs
+    return [(f"{size}-{seed}.pdf", synthetic_pdf(size, seed)) for seed in range(count) for size in sizes]
+
+
+class LoadContext:
+    """Everything a request builder needs: inputs, API keys and a seeded RNG."""
+
+    def __init__(self, pdfs, keys, repeat_inputs=False, seed=0):
+        self.pdfs = pdfs
+        self.keys = keys
+        self.repeat_inputs = repeat_inputs
+        self.rng = random.Random(seed)
+        self.counter = 0
+        self.jds = [synthetic_jd("typical", i) for i in range(8)]
+
+    def form(self):
+        self.counter += 1
+        return {"api_key": self.keys[self.counter % len(self.keys)], "model_name": MODEL_NAME}
+
+    def analysis(self, **extra):
+        name, pdf = self.rng.choice(self.pdfs)
+        jd = self.rng.choice(self.jds)
+        if not self.repeat_inputs:
+            jd += f"\nRequisition {self.counter}-{self.rng.random():.8f}"
+        return {"data": {**self.form(), "jd_text": jd, **extra},
+                "files": {"resume_file": (name, pdf, "application/pdf")}}
+
+    def achievement(self):
+        return {"data": {**self.form(), "bullet_point": self.rng.choice(BULLETS), "job_title": "Software Engineer"}}
+
+    def project(self):
+        return {"data": {**self.form(), "skill": self.rng.choice(PROJECT_SKILLS)}}
+
+
+# name -> (path, streamed, request builder)
+ENDPOINTS = {
+    "analyze": ("/api/analyze", False, lambda ctx: ctx.analysis()),
+    "analyze-stream": ("/api/analyze/stream", True, lambda ctx: ctx.analysis(format="ndjson")),
+    "generate-achievement": ("/api/generate-achievement", False, lambda ctx: ctx.achievement()),
+    "generate-achievement-stream": ("/api/generate-achievement/stream", True, lambda ctx: ctx.achievement()),
+    "generate-project": ("/api/generate-project", False, lambda ctx: ctx.project()),
+    "generate-project-stream": ("/api/generate-project/stream", True, lambda ctx: ctx.project()),
+}
+
+
+def stream_error(line):
+    """The status of an error event in an SSE or NDJSON line, or None."""
+    if line.startswith("data: "):
+        line = line[len("data: "):]
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(event, dict) and event.get("event") == "error":
+        event = event["data"]
+    elif not (isinstance(event, dict) and "status" in event and "detail" in event):
+        return None
+    return event.get("status")
+
+
+def is_degraded(text):
+    """True for an analysis result (or its NDJSON summary event) that lists degraded stages."""
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return False
+    if isinstance(payload, dict) and payload.get("event") == "summary":
+        payload = payload["data"]
+    return isinstance(payload, dict) and bool(payload.get("degraded"))
+
+
+async def send(client, name, ctx):
+    """Sends one request; returns {"endpoint", "latency", "ttfb", "error", "degraded"}."""
+    path, streamed, build = ENDPOINTS[name]
+    request = build(ctx)
+    start = time.perf_counter()
+    ttfb, error, degraded = None, None, False
+    try:
+        if streamed:
+            async with client.stream("POST", path, **request) as response:
+                if response.status_code != 200:
+                    error = str(response.status_code)
+                else:
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        if ttfb is None:
+                            ttfb = time.perf_counter() - start
+                        status = stream_error(line)
+                        if status is not None:
+                            error = f"stream {status}"
+                        degraded = degraded or is_degraded(line)
+        else:
+            response = await client.post(path, **request)
+            if response.status_code != 200:
+                error = str(response.status_code)
+            degraded = is_degraded(response.text)
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    return {"endpoint": name, "latency": time.perf_counter() - start, "ttfb": ttfb, "error": error,
+            "degraded": degraded}
+
+
+async def probe(client):
+    start = time.perf_counter()
+    try:
+        response = await client.get("/")
+        error = None if response.status_code == 200 else str(response.status_code)
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    return {"endpoint": "probe", "latency": time.perf_counter() - start, "ttfb": None, "error": error,
+            "degraded": False}
+
+
+async def run_load(app_url, mix, ctx, concurrency=8, duration=10.0, max_requests=None, probe_interval=0.25,
+                   timeout=60.0, warmup=True):
+    """Drives the app at `app_url`; returns (samples, elapsed seconds)."""
+    samples = []
+    names, weights = list(mix), list(mix.values())
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=app_url, timeout=timeout, limits=limits) as client:
+        if warmup:
+            # First calls pay for lazy imports and client setup; not measured
+            await asyncio.gather(*(send(client, name, ctx) for name in names))
+
+        start = time.perf_counter()
+        deadline = start + duration
+        issued = 0
+
+        async def worker():
+            nonlocal issued
+            while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+                issued += 1
+                samples.append(await send(client, ctx.rng.choices(names, weights)[0], ctx))
+
+        async def prober():
+            while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+                samples.append(await probe(client))
+                await asyncio.sleep(probe_interval)
+
+        tasks = [worker() for _ in range(concurrency)]
+        if probe_interval > 0:
+            tasks.append(prober())
+        await asyncio.gather(*tasks)
+        return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    """Per-endpoint throughput, latency percentiles (ms) and error breakdown."""
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample["endpoint"]].append(sample)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    endpoints = {}
+    for name, rows in sorted(by_endpoint.items()):
+        latencies = [r["latency"] for r in rows]
+        ttfbs = [r["ttfb"] for r in rows if r["ttfb"] is not None]
+        errors = Counter(r["error"] for r in rows if r["error"])
+        endpoints[name] = {
+            "requests": len(rows),
+            "ok": len(rows) - sum(errors.values()),
+            # Answered, but some stages failed and their sections are null (see core.pipeline)
+            "degraded": sum(1 for r in rows if r["degraded"]),
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else None,
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "max_ms": ms(max(latencies)),
+            "ttfb_p50_ms": ms(percentile(ttfbs, 50)),
+            "ttfb_p95_ms": ms(percentile(ttfbs, 95)),
+            "errors": dict(errors.most_common()),
+        }
+    load = [s for s in samples if s["endpoint"] != "probe"]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": len(load),
+        "throughput_rps": round(len(load) / elapsed, 2) if elapsed else None,
+        "error_rate": round(sum(1 for s in load if s["error"]) / len(load), 4) if load else None,
+        "endpoints": endpoints,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(name, command, ready_path, env=None, log_path=None, startup_timeout=60.0):
+    """
+    Runs `command` (with {port} filled in) in a separate process, so the
+    server doesn't share a GIL with the load generator, and waits until
+    `ready_path` answers. Returns (process, base URL).
+    """
+    port = free_port()
+    log = open(log_path, "a") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen([part.format(port=port) for part in command], cwd=ROOT,
+                               env={**os.environ, **(env or {})}, stdout=log, stderr=log)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} exited with status {process.returncode}"
+                               + (f", see {log_path}" if log_path else ""))
+        try:
+            if httpx.get(url + ready_path, timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{name} did not start within {startup_timeout}s")
+
+
+def start_fake_gemini(latency=0.3, jitter=0.1, error_rate=0.0, rate_limit=0.0, token_delay=0.02, seed=0,
+                      log_path=None):
+    command = [sys.executable, os.path.join(ROOT, "benchmarks", "fake_gemini.py"), "--port", "{port}",
+               "--latency", str(latency), "--jitter", str(jitter), "--error-rate", str(error_rate),
+               "--rate-limit", str(rate_limit), "--token-delay", str(token_delay), "--seed", str(seed)]
+    return start_server("Fake Gemini", command, "/stats", log_path=log_path)
+
+
+# The app under test keeps every cache and store in memory: the fake's
+# vectors must not land in the shared on-disk embedding cache under the real
+# model's key, and a warm cache from an earlier run would flatter the numbers
+ISOLATED_ENV = {
+    "EMBEDDING_CACHE_DB": ":memory:",
+    "ANALYZE_CACHE_DB": "",
+    "PROJECT_IDEAS_DB": "",
+    "JOBS_DB": "",
+    "JOB_INDEX_PATH": "",
+}
+
+
+def start_app(gemini_url, app="backend.main:app", env=None, log_path=None):
+    """Runs `app` in one uvicorn worker pointed at `gemini_url`, with in-memory caches (ISOLATED_ENV)."""
+    command = [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", "{port}",
+               "--log-level", "warning"]
+    return start_server("App", command, "/", env={**ISOLATED_ENV, "GEMINI_API_ENDPOINT": gemini_url, **(env or {})},
+                        log_path=log_path)
+
+
+def fetch_json(url):
+    try:
+        return httpx.get(url, timeout=5).json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s: {report['throughput_rps']} req/s, "
+          f"error rate {report['error_rate']:.1%}" if report["requests"] else "\nNo requests completed")
+    print(f"\n{'endpoint':<28} {'reqs':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'ttfb p50':>9} "
+          f"{'degraded':>9}  errors")
+    for name, row in report["endpoints"].items():
+        ttfb = f"{row['ttfb_p50_ms']:.0f}" if row["ttfb_p50_ms"] is not None else "-"
+        errors = ", ".join(f"{kind} x{count}" for kind, count in row["errors"].items()) or "-"
+        print(f"{name:<28} {row['requests']:>6} {row['throughput_rps']:>7.2f} {row['p50_ms']:>8.0f} "
+              f"{row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {ttfb:>9} {row['degraded']:>9}  {errors}")
+    print("(latencies in ms)")
+    if report.get("gemini"):
+        print(f"\nfake Gemini: {report['gemini']}")
+    if report.get("scheduler"):
+        print(f"app scheduler: {report['scheduler']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests kept in flight")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint=weight list ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--pdf-dir", help="Directory of resume PDFs (default: synthetic corpus)")
+    parser.add_argument("--sizes", default="short,typical", help=f"Synthetic corpus sizes ({', '.join(SIZES)})")
+    parser.add_argument("--corpus-size", type=int, default=20, help="Synthetic resumes per size")
+    parser.add_argument("--repeat-inputs", action="store_true", help="Reuse JDs so repeated analyses hit the cache")
+    parser.add_argument("--keys", type=int, default=1, help="Distinct API keys to spread requests over")
+    parser.add_argument("--probe-interval", type=float, default=0.25, help="Seconds between GET / probes (0: off)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout")
+    parser.add_argument("--no-warmup", action="store_true", help="Measure the first request per endpoint too")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--app", default="backend.main:app", help="ASGI app to run with uvicorn")
+    parser.add_argument("--app-url", help="Load an already running app instead of starting one")
+    parser.add_argument("--app-log", help="Write the app's and fake Gemini's output to this file")
+    parser.add_argument("--gemini-url", help="Use this Gemini endpoint instead of the built-in fake")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake Gemini: mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Fake Gemini: +/- seconds around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake Gemini: share of 500 responses")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fake Gemini: requests/s per key (0: none)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Fake Gemini: seconds between chunks")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+        pdfs = load_corpus(args.pdf_dir, [s for s in args.sizes.split(",") if s], args.corpus_size)
+    except (ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    processes = []
+    gemini_url, fake_url = args.gemini_url, None
+    app_url = args.app_url
+    try:
+        if not gemini_url and not app_url:
+            process, fake_url = start_fake_gemini(args.latency, args.jitter, args.error_rate, args.rate_limit,
+                                                  args.token_delay, args.seed, args.app_log)
+            processes.append(process)
+            gemini_url = fake_url
+        if not app_url:
+            process, app_url = start_app(gemini_url, args.app, log_path=args.app_log)
+            processes.append(process)
+        ctx = LoadContext(pdfs, [f"load-key-{i}" for i in range(args.keys)], args.repeat_inputs, args.seed)
+        if not args.json:
+            print(f"Loading {app_url} with {args.concurrency} concurrent requests for {args.duration}s "
+                  f"(Gemini: {gemini_url or 'as configured by the app'})", flush=True)
+        samples, elapsed = asyncio.run(run_load(app_url, mix, ctx, args.concurrency, args.duration, args.requests,
+                                                args.probe_interval, args.timeout, not args.no_warmup))
+        report = summarize(samples, elapsed)
+        report["config"] = {k: v for k, v in vars(args).items() if k not in ("json", "app_log")}
+        report["gemini"] = fetch_json(fake_url + "/stats") if fake_url else None
+        report["scheduler"] = (fetch_json(app_url + "/api/cache/stats") or {}).get("gemini")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Microbenchmarks for the scoring and extraction hot paths.
+
+Usage (from the repo root):
+    python benchmarks/microbench.py --save baseline.json
+    python benchmarks/microbench.py --compare baseline.json --threshold 0.15
+
+Times each function on the synthetic corpus (benchmarks/corpus.py: short,
+typical and pathological inputs) with Gemini replaced by the deterministic
+stub in benchmarks/gemini_stub.py, so results only reflect local work:
+
+    extract_text_from_pdf_bytes          backend.core.utils
+    core.calculate_role_fit_score        backend.core.nlp (Gemini embeddings)
+    core.get_semantic_sentence_analysis  backend.core.nlp (Gemini embeddings)
+    core.get_sentence_scores             backend.core.nlp
+    core.get_recruiter_metrics           backend.core.nlp
+    engine.calculate_role_fit_score      nlp_engine (spaCy + ENGINE_EMBEDDING_PROVIDER)
+    engine.get_sentence_scores           nlp_engine
+    engine.extract_nouns                 nlp_engine
+    engine.get_recruiter_metrics         nlp_engine
+
+Caches are reset before every call (embedding store, parsed documents), so
+each sample is a cold call. The nlp_engine cases are skipped if spaCy or
+Streamlit is not installed.
+
+--save writes the results as a JSON baseline. --compare re-runs the suite
+and flags every case whose median is more than --threshold slower than the
+baseline (exit status 1 if any regressed).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Allow running as a script from anywhere
+sys.path.append(ROOT)
+
+from benchmarks.corpus import SIZES, corpus
+from benchmarks import gemini_stub
+
+BASELINE_VERSION = 1
+STUB_KEY = "stub-key"
+
+
+def core_cases():
+    from backend.core import nlp
+    from backend.core.utils import extract_text_from_pdf_bytes
+
+    reset = gemini_stub.reset_embedding_cache
+    return {
+        "extract_text_from_pdf_bytes": (None, lambda s: extract_text_from_pdf_bytes(s["pdf"])),
+        "core.calculate_role_fit_score": (reset, lambda s: nlp.calculate_role_fit_score(s["resume"], s["jd"], STUB_KEY)),
+        "core.get_semantic_sentence_analysis": (
+            reset, lambda s: nlp.get_semantic_sentence_analysis(s["resume"], s["jd"], STUB_KEY)),
+        "core.get_sentence_scores": (None, lambda s: nlp.get_sentence_scores(s["resume"], s["jd"], STUB_KEY)),
+        "core.get_recruiter_metrics": (None, lambda s: nlp.get_recruiter_metrics(s["resume"])),
+    }
+
+
+def engine_cases():
+    """The Streamlit app's implementations, or {} with a reason if they can't load."""
+    try:
+        import nlp_engine
+    except ImportError as e:
+        return {}, f"nlp_engine unavailable ({e})"
+
+    def reset():
+        nlp_engine.get_document.cache_clear()
+        gemini_stub.reset_embedding_cache()
+
+    return {
+        "engine.calculate_role_fit_score": (reset, lambda s: nlp_engine.calculate_role_fit_score(s["resume"], s["jd"])),
+        "engine.get_sentence_scores": (reset, lambda s: nlp_engine.get_sentence_scores(s["resume"], s["jd"])),
+        "engine.extract_nouns": (reset, lambda s: nlp_engine.extract_nouns(s["resume"])),
+        "engine.get_recruiter_metrics": (reset, lambda s: nlp_engine.get_recruiter_metrics(s["resume"])),
+    }, None
+
+
+def measure(run, sample, setup=None, repeat=5, min_time=0.2, max_samples=1000):
+    """
+    Times single calls of `run(sample)` (after an untimed `setup()`) until at
+    least `repeat` samples and `min_time` seconds of measured time.
+    """
+    if setup:
+        setup()
+    run(sample)  # Warm-up: imports, lazy singletons, thread pools
+    timings = []
+    while len(timings) < max_samples and (len(timings) < repeat or sum(timings) < min_time):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run(sample)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(timings[0] * 1000, 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        "samples": len(timings),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes=tuple(SIZES), only=None, repeat=5, min_time=0.2, seed=0, latency=0.0, progress=None):
+    gemini_stub.install(latency)
+    cases = core_cases()
+    extra, skipped = engine_cases()
+    cases.update(extra)
+    samples = corpus(sizes, seed)
+
+    results = {}
+    for name, (setup, run) in cases.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for size in sizes:
+            key = f"{name}[{size}]"
+            results[key] = measure(run, samples[size], setup, repeat, min_time)
+            if progress:
+                progress(key, results[key])
+    return {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "seed": seed,
+            "stub_latency_s": latency,
+            "embedding_provider": os.getenv("EMBEDDING_PROVIDER"),
+            "engine_embedding_provider": os.getenv("ENGINE_EMBEDDING_PROVIDER"),
+            "pdf_workers": os.getenv("PDF_WORKERS"),
+        },
+        "skipped": [skipped] if skipped else [],
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.15, min_delta_ms=0.01, report_missing=True):
+    """
+    Returns one row per case in both runs: median before/after, relative
+    change and a status ("regression", "improvement" or "ok"). Differences
+    below `min_delta_ms` are treated as noise. Baseline cases the current
+    run did not measure are listed as "missing" unless `report_missing` is off
+    (e.g. for a run restricted with --only).
+    """
+    rows = []
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            rows.append({"case": key, "baseline_ms": None, "current_ms": now["median_ms"], "change": None,
+                         "status": "new"})
+            continue
+        delta = now["median_ms"] - before["median_ms"]
+        change = delta / before["median_ms"] if before["median_ms"] else 0.0
+        status = "ok"
+        if abs(delta) >= min_delta_ms and change > threshold:
+            status = "regression"
+        elif abs(delta) >= min_delta_ms and change < -threshold:
+            status = "improvement"
+        rows.append({"case": key, "baseline_ms": before["median_ms"], "current_ms": now["median_ms"],
+                     "change": round(change, 4), "status": status})
+    for key in baseline["results"] if report_missing else []:
+        if key not in current["results"]:
+            rows.append({"case": key, "baseline_ms": baseline["results"][key]["median_ms"], "current_ms": None,
+                         "change": None, "status": "missing"})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated corpus sizes")
+    parser.add_argument("--only", action="append", help="Only cases whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Minimum timed calls per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum measured seconds per case")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Seconds added to every stubbed Gemini call")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))} (expected {', '.join(SIZES)})")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    def progress(key, result):
+        if not args.json:
+            print(f"{key:<56} {result['median_ms']:>11.3f} ms  (p95 {result['p95_ms']:.3f} ms, "
+                  f"n={result['samples']})", flush=True)
+
+    report = run_suite(sizes, args.only, args.repeat, args.min_time, args.seed, args.stub_latency, progress)
+    for reason in report["skipped"]:
+        print(f"skipped: {reason}", file=sys.stderr)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        if not args.json:
+            print(f"\nBaseline written to {args.save}")
+
+    if baseline is None:
+        if args.json:
+            print(json.dumps(report, indent=2))
+        return
+
+    rows = compare(baseline, report, args.threshold, report_missing=not args.only and sizes == list(SIZES))
+    regressions = [r for r in rows if r["status"] == "regression"]
+    if args.json:
+        print(json.dumps({"report": report, "comparison": rows}, indent=2))
+    else:
+        print(f"\nCompared with {args.compare} (commit {baseline.get('commit')}, threshold {args.threshold:.0%})")
+        for row in rows:
+            if row["change"] is None:
+                print(f"{row['case']:<56} {row['status']}")
+                continue
+            flag = {"regression": "  << REGRESSION", "improvement": "  (faster)"}.get(row["status"], "")
+            print(f"{row['case']:<56} {row['baseline_ms']:>11.3f} -> {row['current_ms']:>11.3f} ms "
+                  f"{row['change']:>+8.1%}{flag}")
+        print(f"\n{len(regressions)} regression(s)")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start report for the serverless entry point.
+
+Usage (from the repo root):
+    python benchmarks/startup_report.py --module api.index --top 15
+
+Imports the module in fresh interpreters with `python -X importtime` and
+reports the wall-clock import time (median of --runs) plus the cumulative
+import cost of the most expensive modules. Also lists which of the heavy
+dependencies were loaded, so an accidental eager import shows up.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that should only be imported by the endpoints that need them
+HEAVY_MODULES = ["google.generativeai", "pdfplumber", "numpy", "uvicorn"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe(module, importtime=False):
+    """Imports `module` in a fresh interpreter; returns (probe result, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE.format(module=module, heavy=HEAVY_MODULES)]
+    proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def startup_report(module="api.index", runs=5, top=15):
+    timings = [run_probe(module)[0] for _ in range(runs)]
+    probe, stderr = run_probe(module, importtime=True)
+    rows = parse_importtime(stderr)
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return {
+        "module": module,
+        "median_s": round(statistics.median(t["seconds"] for t in timings), 4),
+        "min_s": round(min(t["seconds"] for t in timings), 4),
+        "heavy_loaded": probe["loaded"],
+        "top_modules": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1), "depth": depth}
+            for name, own, cum, depth in rows[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="api.index", help="Module to import (default: api.index)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Most expensive modules to list")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = startup_report(args.module, args.runs, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"import {report['module']}: {report['median_s'] * 1000:.0f} ms median "
+          f"({report['min_s'] * 1000:.0f} ms best of {args.runs})")
+    print(f"heavy dependencies loaded: {', '.join(report['heavy_loaded']) or 'none'}")
+    print(f"\n{'cumulative':>12} {'self':>9}  module")
+    for row in report["top_modules"]:
+        print(f"{row['cumulative_ms']:>9.1f} ms {row['self_ms']:>6.1f} ms  {'  ' * row['depth']}{row['module']}")
+
+
+if __name__ == "__main__":
+    main()
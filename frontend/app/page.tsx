@@ -1,13 +1,22 @@
 "use client"
 
 import React, { useState } from 'react';
-import axios from 'axios';
 import { Upload, FileText, CheckCircle, AlertCircle, Loader2, Settings, Brain, ChevronRight } from 'lucide-react';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { SkillRadarChart } from '@/components/RadarChart';
 import { Heatmap } from '@/components/Heatmap';
 
+// A section the backend could not compute (it is listed in `degraded` and sent as null)
+function Unavailable() {
+  return (
+    <div className="flex items-center gap-2 text-sm text-slate-400">
+      <AlertCircle className="h-4 w-4 text-orange-400" />
+      <span>Unavailable right now. Try analyzing again in a moment.</span>
+    </div>
+  );
+}
+
 export default function Home() {
   const [apiKey, setApiKey] = useState('');
   const [modelName, setModelName] = useState('gemini-2.0-flash-exp');
@@ -25,29 +34,52 @@ export default function Home() {
 
     setLoading(true);
     setError('');
+    setResults(null);
 
     const formData = new FormData();
     formData.append('resume_file', file);
     formData.append('jd_text', jdText);
     formData.append('api_key', apiKey);
     formData.append('model_name', modelName);
+    formData.append('format', 'ndjson');
 
     try {
       const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-      const response = await axios.post(`${apiUrl}/api/analyze`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
-      setResults(response.data);
+      // Each section is shown as soon as the backend finishes it
+      const response = await fetch(`${apiUrl}/api/analyze/stream`, { method: 'POST', body: formData });
+      if (!response.ok || !response.body) {
+        const body = await response.json().catch(() => null);
+        throw new Error(body?.detail || "An error occurred during analysis.");
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop() || '';
+        for (const line of lines.filter(Boolean)) {
+          const { event, data } = JSON.parse(line);
+          if (event === 'error') throw new Error(data.detail);
+          setResults((prev: any) => ({ ...prev, ...data }));
+        }
+      }
     } catch (err: any) {
-      setError(err.response?.data?.detail || "An error occurred during analysis.");
+      setError(err.message || "An error occurred during analysis.");
     } finally {
       setLoading(false);
     }
   };
 
-  const radarData = results ? [
+  // undefined: not streamed in yet; null: unavailable
+  const section = (value: any, render: () => React.ReactNode) =>
+    value === undefined ? <Loader2 className="h-6 w-6 animate-spin text-slate-500" />
+      : value === null ? <Unavailable />
+      : render();
+
+  const radarData = results?.sub_scores ? [
     { subject: 'Hard Skills', A: results.sub_scores['Hard Skills'], fullMark: 100 },
     { subject: 'Soft Skills', A: results.sub_scores['Soft Skills'], fullMark: 100 },
     { subject: 'Experience', A: results.sub_scores['Experience'], fullMark: 100 },
@@ -96,7 +128,7 @@ export default function Home() {
           </div>
         </div>
 
-        {results && (
+        {results?.recruiter_metrics && (
           <div className="space-y-4 pt-4 border-t border-slate-800">
             <h3 className="text-sm font-semibold text-slate-400 uppercase tracking-wider">Recruiter Metrics</h3>
             <div className="space-y-3">
@@ -187,8 +219,13 @@ export default function Home() {
               <CardContent className="p-8 flex items-center justify-between">
                 <div>
                   <p className="text-blue-400 font-medium mb-1">Overall Role Fit Score</p>
-                  <h2 className="text-5xl font-bold text-white tracking-tight">{results.score}%</h2>
-                  <p className="text-slate-400 text-sm mt-2">Based on semantic analysis of {results.sentence_scores.length} sentences.</p>
+                  <h2 className="text-5xl font-bold text-white tracking-tight">
+                    {results.score === undefined ? '…' : results.score === null ? 'N/A' : `${results.score}%`}
+                  </h2>
+                  {results.score === null && <div className="mt-2"><Unavailable /></div>}
+                  {results.sentence_scores && (
+                    <p className="text-slate-400 text-sm mt-2">Based on semantic analysis of {results.sentence_scores.length} sentences.</p>
+                  )}
                 </div>
                 <div className="h-24 w-24 rounded-full border-4 border-blue-500/30 flex items-center justify-center bg-blue-500/10">
                   <CheckCircle className="w-10 h-10 text-blue-500" />
@@ -203,7 +240,7 @@ export default function Home() {
                   <CardTitle className="text-white">Skill Profile</CardTitle>
                 </CardHeader>
                 <CardContent>
-                  <SkillRadarChart data={radarData} />
+                  {section(results.sub_scores, () => <SkillRadarChart data={radarData} />)}
                 </CardContent>
               </Card>
 
@@ -214,7 +251,11 @@ export default function Home() {
                 </CardHeader>
                 <CardContent>
                   <div className="flex flex-wrap gap-2">
-                    {results.missing_skills.length > 0 ? (
+                    {results.missing_skills === undefined ? (
+                      <Loader2 className="h-6 w-6 animate-spin text-slate-500" />
+                    ) : results.missing_skills === null ? (
+                      <Unavailable />
+                    ) : results.missing_skills.length > 0 ? (
                       results.missing_skills.map((skill: string, i: number) => (
                         <span key={i} className="px-3 py-1 bg-red-900/30 text-red-300 rounded-full text-sm font-medium border border-red-900/50 hover:bg-red-900/50 transition cursor-default">
                           {skill}
@@ -241,7 +282,7 @@ export default function Home() {
                   <span className="flex items-center gap-1 text-green-400"><span className="w-2 h-2 rounded-full bg-green-400"></span> Strong Match</span>
                   <span className="flex items-center gap-1 text-orange-400"><span className="w-2 h-2 rounded-full bg-orange-400"></span> Weak Match</span>
                 </div>
-                <Heatmap sentenceScores={results.sentence_scores} />
+                {section(results.sentence_scores, () => <Heatmap sentenceScores={results.sentence_scores} />)}
               </CardContent>
             </Card>
 
@@ -1,5 +1,7 @@
 import google.generativeai as genai
 
+from backend.core.context import pack_pair
+
 def generate_achievement(bullet_point, job_title, api_key, model_name="gemini-pro"):
     """
     Rewrites a resume bullet point using the STAR method and quantified metrics.
@@ -38,6 +40,8 @@ def get_sub_scores(resume_text, jd_text, api_key, model_name="gemini-2.0-flash-e
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel(model_name)
         
+        # Most relevant sentences within a token budget, not the first N characters
+        resume, jd = pack_pair(resume_text, jd_text)
         prompt = f"""
         You are an expert Resume Grader.
         Analyze the following Resume against the Job Description.
@@ -47,11 +51,11 @@ def get_sub_scores(resume_text, jd_text, api_key, model_name="gemini-2.0-flash-e
         3. Experience (Years, Relevance)
         4. Education (Degree match)
         
-        Resume:
-        {resume_text[:2000]}... (truncated)
+        Resume (most relevant excerpts):
+        {resume["text"]}
         
-        Job Description:
-        {jd_text[:1000]}... (truncated)
+        Job Description (most relevant excerpts):
+        {jd["text"]}
         
         Return ONLY a valid JSON string in the following format:
         {{
@@ -0,0 +1,165 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Worker-pool execution mode for nlp_engine. A fixed set of processes each hold
+# the embedding model and the spaCy pipeline; encode requests from concurrent
+# users are micro-batched before they are sent to a worker.
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))  # 0 = run inference in-process
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "64"))  # Texts per worker call
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))  # How long a batch waits to fill up
+
+# Per-process state, set by _init_worker (or inherited from the parent on fork)
+_provider = None
+_nlp = None
+
+
+def _preload(provider_name, spacy=True):
+    """Loads the models into this process so forked workers share them copy-on-write."""
+    global _provider, _nlp
+    from backend.core.embeddings import get_provider, LocalProvider
+
+    if _provider is None:
+        _provider = get_provider(provider_name, api_key=os.getenv("GEMINI_API_KEY"))  # Key only used by "gemini"
+        if isinstance(_provider, LocalProvider):
+            _provider.model
+    if spacy and _nlp is None:
+        from nlp_engine import build_spacy_pipeline
+        _nlp = build_spacy_pipeline()
+
+
+def _init_worker(provider_name, spacy):
+    try:
+        import torch
+        # One intra-op thread per worker; the pool provides the parallelism
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    _preload(provider_name, spacy)
+
+
+def _worker_encode(texts):
+    return np.asarray(_provider.encode(texts), dtype=np.float32)
+
+
+def _worker_parse(texts, batch_size):
+    from nlp_engine import doc_features
+    return [doc_features(doc) for doc in _nlp.pipe(texts, batch_size=batch_size)]
+
+
+class InferencePool:
+    """
+    Fixed-size pool of inference processes with an async client API.
+
+    `encode` calls from any thread or event loop are queued on the pool's own
+    event loop and flushed to a worker once `max_batch` texts are waiting or
+    `max_wait_ms` has passed, so many small requests cost a few model calls.
+    Each flushed batch goes to the next free worker, which is what lets
+    throughput scale with the number of cores.
+
+    `encode` / `parse` block; `encode_async` / `parse_async` can be awaited
+    from the web layer. The pool also satisfies the embedding provider
+    interface (`encode(list[str])`), so nlp_engine can use it as its model.
+    """
+
+    def __init__(self, workers=INFERENCE_WORKERS, provider_name="local", spacy=True,
+                 max_batch=INFERENCE_MAX_BATCH, max_wait_ms=INFERENCE_MAX_WAIT_MS, preload=True):
+        self.workers = max(1, workers)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0  # Worker calls made for encode requests
+
+        context = None
+        if preload and "fork" in multiprocessing.get_all_start_methods():
+            # Load once here; forked workers inherit the weights copy-on-write
+            _preload(provider_name, spacy)
+            context = multiprocessing.get_context("fork")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_worker, initargs=(provider_name, spacy),
+        )
+
+        self._pending = []  # (texts, future) waiting for the next flush
+        self._pending_count = 0
+        self._flush_handle = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    # Batching (runs on the pool's event loop)
+
+    async def _submit(self, texts):
+        future = self._loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_count += len(texts)
+        if self._pending_count >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending, self._pending_count = self._pending, [], 0
+        if not batch:
+            return
+        self.batches += 1
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        work = self._executor.submit(_worker_encode, texts)
+        work.add_done_callback(lambda done: self._loop.call_soon_threadsafe(self._deliver, batch, done))
+
+    def _deliver(self, batch, done):
+        error = done.exception()
+        if error is None:
+            embeddings = done.result()
+        start = 0
+        for texts, future in batch:
+            if future.cancelled():
+                start += len(texts)
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(embeddings[start:start + len(texts)])
+            start += len(texts)
+
+    def _schedule(self, texts):
+        return asyncio.run_coroutine_threadsafe(self._submit(list(texts)), self._loop)
+
+    # Client API
+
+    def encode(self, texts):
+        """Embeds `texts` (float32 array of shape (len(texts), dim)); blocks until done."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._schedule(texts).result()
+
+    async def encode_async(self, texts):
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return await asyncio.wrap_future(self._schedule(texts))
+
+    def parse(self, texts, batch_size=16):
+        """Runs spaCy in a worker; returns (sentences, tokens) per text as nlp_engine.doc_features."""
+        return self._executor.submit(_worker_parse, list(texts), batch_size).result()
+
+    async def parse_async(self, texts, batch_size=16):
+        return await asyncio.wrap_future(self._executor.submit(_worker_parse, list(texts), batch_size))
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,59 +1,234 @@
 import spacy
-from sentence_transformers import SentenceTransformer, util
 import streamlit as st
+import os
 import subprocess
 import sys
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+from backend.core.similarity import cosine_matrix, max_per_row
+from backend.core.embeddings import get_provider, LocalProvider
+from inference_pool import InferencePool, INFERENCE_WORKERS
+
+SPACY_MODEL = "en_core_web_sm"
+# Only sentence boundaries and POS tags are used, so the dependency parser, NER
+# and lemmatizer are excluded and a rule-based sentencizer does the splitting.
+SPACY_EXCLUDE = [c for c in os.getenv("SPACY_EXCLUDE", "parser,ner,lemmatizer").split(",") if c]
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "16"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+# The Streamlit engine's provider, separate from the backend's EMBEDDING_PROVIDER:
+# "local" (sentence-transformers all-MiniLM-L6-v2 on CPU), "hashing", or
+# "gemini" (the engine has no per-request key, so it reads GEMINI_API_KEY)
+ENGINE_EMBEDDING_PROVIDER = os.getenv("ENGINE_EMBEDDING_PROVIDER", "local")
+
+def engine_api_key(provider_name=ENGINE_EMBEDDING_PROVIDER):
+    """GEMINI_API_KEY for the "gemini" provider; raises if it is not set."""
+    if provider_name != "gemini":
+        return None
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("ENGINE_EMBEDDING_PROVIDER=gemini needs GEMINI_API_KEY")
+    return api_key
+
+def build_spacy_pipeline(exclude=SPACY_EXCLUDE):
+    nlp = spacy.load(SPACY_MODEL, exclude=exclude)
+    if "parser" in exclude and not {"senter", "sentencizer"} & set(nlp.pipe_names):
+        nlp.add_pipe("sentencizer")
+    return nlp
 
 # Load models with caching
 @st.cache_resource
 def load_spacy_model():
     try:
-        return spacy.load("en_core_web_sm")
+        return build_spacy_pipeline()
     except OSError:
         # Fallback if model isn't found
         print("Downloading spacy model...")
-        subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
-        return spacy.load("en_core_web_sm")
+        subprocess.run([sys.executable, "-m", "spacy", "download", SPACY_MODEL])
+        return build_spacy_pipeline()
+
+@st.cache_resource
+def load_inference_pool():
+    """
+    Returns the shared InferencePool when INFERENCE_WORKERS > 0 (spaCy and
+    encoding then run in worker processes), otherwise None.
+    """
+    if INFERENCE_WORKERS <= 0:
+        return None
+    try:
+        return InferencePool(INFERENCE_WORKERS, provider_name=ENGINE_EMBEDDING_PROVIDER)
+    except Exception as e:
+        print(f"Error starting inference workers, running in-process: {e}")
+        return None
 
 @st.cache_resource
 def load_sentence_transformer():
+    """
+    Returns the configured embedding provider (anything with a batched
+    `encode(list[str])`), or None if it could not be loaded.
+    """
+    pool = load_inference_pool()
+    if pool is not None:
+        return pool
     try:
-        return SentenceTransformer('all-MiniLM-L6-v2')
+        provider = get_provider(ENGINE_EMBEDDING_PROVIDER, api_key=engine_api_key())
+        if isinstance(provider, LocalProvider):
+            provider.model # Load the weights now rather than on the first request
+        return provider
     except Exception as e:
-        print(f"Error loading SentenceTransformer: {e}")
+        print(f"Error loading embedding provider '{ENGINE_EMBEDDING_PROVIDER}': {e}")
         return None
 
+# Common words in resumes/JDs that are NOT skills
+RESUME_STOP_WORDS = {
+    "experience", "role", "team", "project", "work", "skills", "years", "months", "time",
+    "company", "responsibilities", "requirements", "degree", "university", "college",
+    "candidate", "application", "opportunity", "business", "solutions", "services",
+    "development", "management", "analysis", "data", "system", "support", "knowledge",
+    "understanding", "proficiency", "ability", "track", "record", "hands", "familiarity",
+    "expertise", "bachelor", "master", "phd", "job", "description", "summary", "objective",
+    "education", "certification", "qualifications", "key", "tasks", "products", "designs",
+    "scale", "engineer", "artificial", "intelligence", "domain", "source", "title", "junior",
+    "senior", "lead", "manager", "intern", "internship", "students", "projects", "technologies"
+}
+
+STRONG_VERBS = {"led", "built", "engineered", "developed", "managed", "created", "designed", "implemented", "orchestrated", "spearheaded", "executed", "launched"}
+
+def doc_features(doc):
+    """
+    Everything the scoring functions read from a spaCy Doc: the sentences and
+    (lowercased text, POS, fine-grained tag, is_stop, is_punct) per token.
+    Plain tuples, so inference workers can send them back cheaply.
+    """
+    sentences = [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
+    tokens = [(t.text.lower(), t.pos_, t.tag_, t.is_stop, t.is_punct) for t in doc]
+    return sentences, tokens
+
+class ResumeDocument:
+    """
+    A resume or JD analysed once and shared by every scoring function.
+    The spaCy parse and the batched sentence encoding each run on first use
+    and are cached, so scoring a resume costs one parse and one encode.
+    """
+
+    def __init__(self, text, doc=None, features=None):
+        self.text = text or ""
+        if doc is not None:
+            # Already parsed (e.g. by parse_documents via nlp.pipe)
+            self.__dict__["doc"] = doc
+        if features is not None:
+            # Parsed in an inference worker: only the extracted features come back
+            self.__dict__["sentences"], self.__dict__["tokens"] = features
+
+    def __bool__(self):
+        return bool(self.text)
+
+    @cached_property
+    def doc(self):
+        return load_spacy_model()(self.text)
+
+    @cached_property
+    def _features(self):
+        pool = load_inference_pool()
+        if pool is not None and "doc" not in self.__dict__:
+            return pool.parse([self.text])[0]
+        return doc_features(self.doc)
+
+    @cached_property
+    def sentences(self):
+        return self._features[0]
+
+    @cached_property
+    def tokens(self):
+        return self._features[1]
+
+    @cached_property
+    def nouns(self):
+        return {
+            word for word, pos, _, is_stop, is_punct in self.tokens
+            if pos in ["NOUN", "PROPN"] and not is_stop and not is_punct
+            and len(word) > 2 and word not in RESUME_STOP_WORDS
+        }
+
+    @cached_property
+    def sentence_embeddings(self):
+        # One batched encode for all sentences (float32 NumPy array)
+        model = load_sentence_transformer()
+        if model is None or not self.sentences:
+            return None
+        return model.encode(self.sentences)
+
+    @cached_property
+    def text_embedding(self):
+        model = load_sentence_transformer()
+        return model.encode([self.text])[0] if model is not None else None
+
+def parse_documents(texts, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS, encode=True):
+    """
+    Parses many texts (resume + JD, or a batch of resumes) with one nlp.pipe
+    call and, if `encode` is set, encodes all of their sentences in one batch.
+    Returns a ResumeDocument per text.
+    """
+    texts = [text or "" for text in texts]
+    pool = load_inference_pool()
+    if pool is not None:
+        documents = [
+            ResumeDocument(text, features=features)
+            for text, features in zip(texts, pool.parse(texts, batch_size=batch_size))
+        ]
+    else:
+        nlp = load_spacy_model()
+        documents = [
+            ResumeDocument(text, doc)
+            for text, doc in zip(texts, nlp.pipe(texts, batch_size=batch_size, n_process=n_process))
+        ]
+
+    model = load_sentence_transformer()
+    if encode and model is not None:
+        all_sentences = [sent for document in documents for sent in document.sentences]
+        embeddings = model.encode(all_sentences) if all_sentences else np.zeros((0, 0), dtype=np.float32)
+        start = 0
+        for document in documents:
+            end = start + len(document.sentences)
+            document.__dict__["sentence_embeddings"] = embeddings[start:end] if end > start else None
+            start = end
+    return documents
+
+@lru_cache(maxsize=32)
+def get_document(text):
+    """Returns the cached ResumeDocument for `text`."""
+    return ResumeDocument(text)
+
+def as_document(text_or_doc):
+    if isinstance(text_or_doc, ResumeDocument):
+        return text_or_doc
+    return get_document(text_or_doc or "")
+
 def calculate_role_fit_score(resume_text, jd_text):
     """
     Calculates the Role Fit Score using a stricter Semantic Coverage approach.
     We check how well the TOP requirements in the JD are covered by the resume.
+    Accepts raw text or ResumeDocument instances.
     """
     model = load_sentence_transformer()
-    nlp = load_spacy_model()
     
     if not resume_text or not jd_text or model is None:
         return 0.0
 
-    # Split into sentences
-    resume_doc = nlp(resume_text)
-    jd_doc = nlp(jd_text)
-    
-    resume_sentences = [sent.text.strip() for sent in resume_doc.sents if len(sent.text.strip()) > 10]
-    jd_sentences = [sent.text.strip() for sent in jd_doc.sents if len(sent.text.strip()) > 10]
+    # Split into sentences (parsed once per document)
+    resume_doc = as_document(resume_text)
+    jd_doc = as_document(jd_text)
     
-    if not resume_sentences or not jd_sentences:
+    if not resume_doc.sentences or not jd_doc.sentences:
         return 0.0
 
-    # Compute embeddings
-    resume_embeddings = model.encode(resume_sentences, convert_to_tensor=True)
-    jd_embeddings = model.encode(jd_sentences, convert_to_tensor=True)
-
-    # Compute cosine similarity matrix
+    # Compute cosine similarity matrix from the cached embeddings
     # Shape: (num_jd_sentences, num_resume_sentences)
-    cosine_scores = util.cos_sim(jd_embeddings, resume_embeddings)
+    cosine_scores = cosine_matrix(jd_doc.sentence_embeddings, resume_doc.sentence_embeddings)
     
     # For each JD sentence, find the max similarity score in the resume
-    max_scores_per_jd_sent, _ = cosine_scores.max(dim=1)
+    max_scores_per_jd_sent, _ = max_per_row(cosine_scores)
     
     # STRICTER SCORING LOGIC:
     # 1. Thresholding: Ignore weak matches (< 0.4) entirely.
@@ -61,13 +236,13 @@ def calculate_role_fit_score(resume_text, jd_text):
     # 3. No artificial boosting.
     
     # Filter out very low scores (noise)
-    relevant_scores = [score.item() for score in max_scores_per_jd_sent if score.item() > 0.35]
+    relevant_scores = max_scores_per_jd_sent[max_scores_per_jd_sent > 0.35]
     
-    if not relevant_scores:
+    if relevant_scores.size == 0:
         return 10.0 # Minimum score for effort
         
     # Calculate average of relevant matches
-    avg_score = sum(relevant_scores) / len(jd_sentences) # Divide by TOTAL JD sentences to penalize missing parts
+    avg_score = float(relevant_scores.sum()) / len(jd_doc.sentences) # Divide by TOTAL JD sentences to penalize missing parts
     
     # Scale: A raw cosine similarity of 0.8 is practically perfect.
     # Map 0.0 - 0.8 to 0 - 100
@@ -79,30 +254,7 @@ def extract_nouns(text):
     """
     Extracts nouns and proper nouns from text using spaCy, filtering out common resume stop words.
     """
-    nlp = load_spacy_model()
-    doc = nlp(text)
-    
-    # Common words in resumes/JDs that are NOT skills
-    resume_stop_words = {
-        "experience", "role", "team", "project", "work", "skills", "years", "months", "time",
-        "company", "responsibilities", "requirements", "degree", "university", "college",
-        "candidate", "application", "opportunity", "business", "solutions", "services",
-        "development", "management", "analysis", "data", "system", "support", "knowledge",
-        "understanding", "proficiency", "ability", "track", "record", "hands", "familiarity",
-        "expertise", "bachelor", "master", "phd", "job", "description", "summary", "objective",
-        "education", "certification", "qualifications", "key", "tasks", "products", "designs",
-        "scale", "engineer", "artificial", "intelligence", "domain", "source", "title", "junior",
-        "senior", "lead", "manager", "intern", "internship", "students", "projects", "technologies"
-    }
-    
-    nouns = set()
-    for token in doc:
-        if token.pos_ in ["NOUN", "PROPN"] and not token.is_stop and not token.is_punct:
-            word = token.text.lower()
-            if len(word) > 2 and word not in resume_stop_words:
-                nouns.add(word)
-                
-    return nouns
+    return set(as_document(text).nouns)
 
 def analyze_skill_gaps(resume_text, jd_text):
     """
@@ -126,28 +278,27 @@ def get_sentence_scores(resume_text, jd_text):
     Returns a list of (sentence, score) tuples.
     """
     model = load_sentence_transformer()
-    nlp = load_spacy_model()
     
     if not resume_text or not jd_text or model is None:
         return []
         
-    doc = nlp(resume_text)
-    sentences = [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
+    resume_doc = as_document(resume_text)
+    sentences = resume_doc.sentences
     
-    jd_embedding = model.encode(jd_text, convert_to_tensor=True)
+    if not sentences:
+        return []
     
-    sentence_scores = []
-    for sent in sentences:
-        sent_embedding = model.encode(sent, convert_to_tensor=True)
-        similarity = util.cos_sim(sent_embedding, jd_embedding).item()
-        sentence_scores.append((sent, similarity))
+    # Reuses the sentence embeddings computed for the Role Fit score
+    similarities = cosine_matrix(resume_doc.sentence_embeddings, as_document(jd_text).text_embedding)[:, 0]
         
-    return sentence_scores
+    return [(sent, float(similarity)) for sent, similarity in zip(sentences, similarities)]
 
 def get_recruiter_metrics(resume_text):
     """
     Calculates reading time, buzzword count, and action verb count.
     """
+    resume_doc = as_document(resume_text)
+    resume_text = resume_doc.text
     word_count = len(resume_text.split())
     # Reading time in minutes (Skimming speed ~250 wpm)
     reading_time_min = word_count / 250
@@ -161,19 +312,14 @@ def get_recruiter_metrics(resume_text):
     
     buzzword_count = sum(1 for word in resume_text.lower().split() if word in buzzwords)
     
-    # Action Verbs using spaCy
-    nlp = load_spacy_model()
-    doc = nlp(resume_text)
-    
+    # Action Verbs from the cached spaCy tokens
     # We look for verbs (VERB) in past tense (VBD) or present participle (VBG) which are often used in resumes
     # Also check for specific strong verbs if POS tagging misses them
-    strong_verbs_list = {"led", "built", "engineered", "developed", "managed", "created", "designed", "implemented", "orchestrated", "spearheaded", "executed", "launched"}
-    
     # Refined approach: Count unique action verbs found
     found_verbs = set()
-    for token in doc:
-        if (token.pos_ == "VERB" and token.tag_ in ["VBD", "VBN"]) or (token.text.lower() in strong_verbs_list):
-            found_verbs.add(token.text.lower())
+    for word, pos, tag, _, _ in resume_doc.tokens:
+        if (pos == "VERB" and tag in ["VBD", "VBN"]) or (word in STRONG_VERBS):
+            found_verbs.add(word)
             
     action_verb_count = len(found_verbs)
             
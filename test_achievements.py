@@ -0,0 +1,49 @@
+import json
+import threading
+
+print("Testing batch bullet rewriting...")
+from backend.core import genai
+from backend.core.scheduler import GeminiUnavailable
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+calls = []
+lock = threading.Lock()
+
+def fake_generate(api_key, model_name, prompt, hedge=False, generation_config=None):
+    with lock:
+        calls.append("pack" if generation_config else "single")
+    if generation_config is None:
+        return Response("Rewritten on its own")
+    items = json.loads(prompt.split("same id):")[1].split("Rules:")[0])
+    if any("outage" in item["bullet"] for item in items):
+        raise GeminiUnavailable("Gemini call failed after 4 attempts")
+    # The model drops one bullet and echoes an id that was never sent
+    rewrites = [{"id": item["id"], "text": "Led " + item["bullet"]} for item in items if "skip" not in item["bullet"]]
+    return Response(json.dumps({"rewrites": rewrites + [{"id": 99, "text": "stray"}]}))
+
+genai.generate_content = fake_generate
+
+bullets = [f"worked on service {i}" for i in range(23)] + ["", "skip this one"]
+results = genai.generate_achievements(bullets, "Backend Engineer", "dummy_key", "gemini-1.5-flash")
+assert [r["index"] for r in results] == list(range(len(bullets)))
+assert all(r["enhanced_text"] == "Led " + r["original"] for r in results[:23]), "Outputs mapped to the wrong inputs"
+assert results[23]["error"] == "Empty bullet point"
+assert results[24]["enhanced_text"] == "Rewritten on its own"
+assert calls.count("pack") == 3 and calls.count("single") == 1, calls
+print(f"Packing verified: {len(bullets)} bullets in {calls.count('pack')} pack calls + 1 retry")
+
+calls.clear()
+bullets = ["fixed outage handling", "wrote docs", "built CI", "tuned queries"]
+packs = genai.pack_bullets(bullets, max_size=2)
+assert packs == [[0, 1], [2, 3]]
+results = genai.generate_achievements(bullets, "SRE", "dummy_key", "gemini-1.5-flash", pack_size=2)
+assert results[0]["error"] and results[1]["error"], "Failed pack should mark its bullets"
+assert results[2]["enhanced_text"] == "Led built CI" and results[3]["error"] is None
+print("Partial success verified")
+
+print("\nAll batch rewriting tests passed.")
@@ -0,0 +1,35 @@
+print("Testing benchmark tooling...")
+from benchmarks import gemini_stub
+from benchmarks.corpus import corpus, synthetic_resume, SIZES
+from benchmarks.microbench import compare, measure
+from backend.core import genai, nlp
+
+# The corpus is a pure function of (size, seed)
+assert synthetic_resume("typical", 3) == synthetic_resume("typical", 3) != synthetic_resume("typical", 4)
+samples = corpus(("short", "pathological"))
+assert samples["short"]["pdf"].startswith(b"%PDF") and "." not in samples["pathological"]["jd"]
+assert len(samples["pathological"]["resume"]) > 20 * len(samples["short"]["resume"])
+print(f"Deterministic corpus verified ({', '.join(SIZES)})")
+
+stub = gemini_stub.install()
+first = nlp.calculate_role_fit_score(samples["short"]["resume"], samples["short"]["jd"], "stub-key")
+gemini_stub.reset_embedding_cache()
+assert nlp.calculate_role_fit_score(samples["short"]["resume"], samples["short"]["jd"], "stub-key") == first
+analysis = genai.get_resume_analysis(samples["short"]["resume"], samples["short"]["jd"], "stub-key", "gemini-2.0-flash")
+assert analysis["missing_skills"] == ["Kubernetes"] and set(analysis["sub_scores"].values()) == {70}
+assert stub.calls["embed"] == 4 and stub.calls["generate"] == 1
+print("Deterministic Gemini stub verified")
+
+result = measure(lambda s: sum(range(s)), 1000, repeat=5, min_time=0.0)
+assert result["samples"] == 5 and result["min_ms"] <= result["median_ms"] <= result["p95_ms"]
+
+baseline = {"results": {"a[short]": {"median_ms": 10.0}, "b[short]": {"median_ms": 10.0},
+                        "c[short]": {"median_ms": 0.001}, "gone[short]": {"median_ms": 1.0}}}
+current = {"results": {"a[short]": {"median_ms": 12.0}, "b[short]": {"median_ms": 7.0},
+                       "c[short]": {"median_ms": 0.005}, "new[short]": {"median_ms": 1.0}}}
+status = {row["case"]: row["status"] for row in compare(baseline, current, threshold=0.15)}
+assert status == {"a[short]": "regression", "b[short]": "improvement", "c[short]": "ok",  # Below the noise floor
+                  "new[short]": "new", "gone[short]": "missing"}, status
+print("Baseline comparison verified")
+
+print("Benchmark tooling tests passed")
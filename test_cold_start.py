@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+# Cold-start regression test for the Vercel entry point. Every check runs in a
+# fresh interpreter so modules imported by other tests don't hide a regression.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Import cost of api.index on top of FastAPI itself (milliseconds)
+BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "400"))
+HEAVY_MODULES = ["google.generativeai", "pdfplumber", "numpy", "uvicorn"]
+
+
+def run(code):
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_seconds(module):
+    return min(run(
+        f"import json, time; t = time.perf_counter(); import {module}; "
+        f"print(json.dumps(time.perf_counter() - t))"
+    ) for _ in range(3))
+
+
+print("Testing cold start of api.index...")
+loaded = run(f"import json, sys, api.index; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+assert not loaded, f"api.index eagerly imports {loaded}"
+print("No heavy dependencies at import verified")
+
+overhead_ms = (import_seconds("api.index") - import_seconds("fastapi")) * 1000
+assert overhead_ms < BUDGET_MS, f"api.index adds {overhead_ms:.0f} ms over FastAPI (budget {BUDGET_MS:.0f} ms)"
+print(f"Import overhead verified ({overhead_ms:.0f} ms over FastAPI, budget {BUDGET_MS:.0f} ms)")
+
+# /api/generate-project must not pull in the PDF/scoring stack
+loaded = run(f"""
+import json, sys
+import api.index
+import backend.main
+from fastapi.testclient import TestClient
+
+backend.main.get_project_idea = lambda skill, api_key, model_name: (f"Build something with {{skill}}", False)
+response = TestClient(api.index.app).post(
+    "/api/generate-project", data={{"skill": "Kafka", "api_key": "test", "model_name": "gemini-2.0-flash"}}
+)
+assert response.status_code == 200 and "Kafka" in response.json()["idea"], response.text
+print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))
+""")
+assert "pdfplumber" not in loaded and "numpy" not in loaded, f"/api/generate-project loaded {loaded}"
+print("Trimmed import graph for /api/generate-project verified")
+
+print("Cold start tests passed")
@@ -0,0 +1,57 @@
+print("Testing context packer...")
+from backend.core.context import pack_context, pack_pair, split_units, estimate_tokens
+
+header = "John Doe\njohn.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/johndoe\nSUMMARY\n"
+filler = "".join(f"Volunteered at the community garden every weekend in season {i}.\n" for i in range(40))
+experience = ("EXPERIENCE\n"
+              "Built Kafka streaming pipelines on Kubernetes processing 2M events per day.\n"
+              "Designed PostgreSQL schemas and tuned queries for the billing service.\n")
+resume = header + filler + experience
+jd = ("About us: we are a fast-growing fintech company with a great culture.\n"
+      "Requirements: 3+ years of experience with Kafka and Kubernetes.\n"
+      "Strong PostgreSQL skills are required.\n"
+      "We are an equal opportunity employer and consider all qualified applicants.\n")
+
+# The old prompt cut the resume at character 2000, before the experience section
+assert "Kafka" not in resume[:2000]
+
+units = split_units(resume)
+assert not any("@" in u or "555" in u for u in units), "Contact details were not dropped"
+assert "SUMMARY" not in units and "EXPERIENCE" not in units
+
+resume_ctx, jd_ctx = pack_pair(resume, jd, resume_budget=120, jd_budget=60)
+assert "Kafka streaming pipelines" in resume_ctx["text"], "Experience section lost"
+assert "PostgreSQL schemas" in resume_ctx["text"]
+assert resume_ctx["tokens"] <= 120 and resume_ctx["tokens"] == estimate_tokens(resume_ctx["text"])
+assert resume_ctx["total_tokens"] > 4 * resume_ctx["tokens"]
+assert "Requirements: 3+ years" in jd_ctx["text"] and "equal opportunity" not in jd_ctx["text"]
+# Kept units stay in document order
+assert resume_ctx["text"].index("Kafka") < resume_ctx["text"].index("PostgreSQL")
+print(f"Packing verified: resume {resume_ctx['total_tokens']} -> {resume_ctx['tokens']} tokens, "
+      f"JD {jd_ctx['total_tokens']} -> {jd_ctx['tokens']} tokens")
+
+# One long line without breaks is cut at a word boundary instead of dropped
+wall = " ".join(["python"] * 500)
+packed = pack_context(wall, "python", budget=50)
+assert 0 < packed["tokens"] <= 50 and packed["text"].endswith("python")
+assert pack_context("", "python")["text"] == ""
+print("Edge cases verified")
+
+# A skills section with one skill per line is kept, grouped under its heading
+skills_resume = ("Jane Roe\njane@example.com\nSKILLS\nPython, Docker\nGo\nKubernetes, Terraform\n"
+                 "EXPERIENCE\nLed the migration of the billing service to a new event-driven architecture.\n")
+units = split_units(skills_resume)
+assert "Skills: Python, Docker, Go, Kubernetes, Terraform" in units, units
+assert "EXPERIENCE" not in units and "Experience" not in units
+resume_ctx, _ = pack_pair(skills_resume, "We need Go and Kubernetes experience.")
+for skill in ("Python", "Docker", "Go", "Kubernetes", "Terraform"):
+    assert skill in resume_ctx["text"], f"{skill} dropped from the packed resume"
+assert "billing service" in resume_ctx["text"]
+# Long lists are split into several budget-sized groups instead of one oversized unit
+many = "Skills\n" + "\n".join(f"Tool{i}" for i in range(60))
+groups = split_units(many)
+assert len(groups) > 1 and all(g.startswith("Skills: ") for g in groups)
+assert sum(g.count("Tool") for g in groups) == 60
+print("Short-line grouping verified")
+
+print("\nAll context tests passed.")
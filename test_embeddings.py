@@ -0,0 +1,75 @@
+import os
+import tempfile
+
+import numpy as np
+
+print("Testing embedding store...")
+from backend.core.embedding_cache import EmbeddingStore
+
+db_path = os.path.join(tempfile.mkdtemp(), "embeddings.db")
+rng = np.random.default_rng(0)
+vector = rng.standard_normal(768).astype(np.float32)
+
+store = EmbeddingStore(db_path=db_path, max_entries=3)
+assert store.get("models/text-embedding-004", "semantic_similarity", "Python engineer") is None
+store.put("models/text-embedding-004", "semantic_similarity", "Python engineer", vector)
+cached = store.get("models/text-embedding-004", "semantic_similarity", "Python engineer")
+assert cached.dtype == np.float32 and np.array_equal(cached, vector)
+# Same text under a different task type is a different entry
+assert store.get("models/text-embedding-004", "retrieval_document", "Python engineer") is None
+print("float32 round trip verified")
+
+for i in range(5):
+    store.put("m", "t", f"text {i}", vector)
+assert len(store) == 3, f"Size cap not enforced: {len(store)}"
+print("Size cap verified")
+
+# Batched lookups: one query for all texts, misses as None, duplicates allowed
+batch = EmbeddingStore(db_path=os.path.join(tempfile.mkdtemp(), "batch.db"), max_entries=150)
+texts = [f"sentence {i}" for i in range(200)]
+batch.put_many("m", "t", [(text, vector) for text in texts[:100]])
+found = batch.get_many("m", "t", texts[:100] + ["unknown", texts[0]])
+assert all(np.array_equal(v, vector) for v in found[:100]) and found[100] is None
+assert np.array_equal(found[101], vector) and (batch.hits, batch.misses) == (101, 1)
+# Replacing rows doesn't inflate the tracked count; new rows past the cap evict the oldest
+batch.put_many("m", "t", [(text, vector) for text in texts[:100]])
+assert batch._count == len(batch) == 100
+batch.put_many("m", "t", [(text, vector) for text in texts[100:]])
+assert batch._count == len(batch) == 150
+# Recent hits don't rewrite last_used; old ones do
+before = batch._db.total_changes
+batch.get_many("m", "t", texts[100:])
+assert batch._db.total_changes == before, "Hit on a fresh row wrote to the database"
+batch.touch_interval = 0
+batch.get_many("m", "t", texts[100:110])
+assert batch._db.total_changes == before + 10
+print("Batched get/put verified")
+
+quantized = EmbeddingStore(db_path=":memory:", quantize=True)
+quantized.put("m", "t", "resume", vector)
+restored = quantized.get("m", "t", "resume")
+cosine = float(restored @ vector / (np.linalg.norm(restored) * np.linalg.norm(vector)))
+assert cosine > 0.999, f"int8 quantization lost too much precision ({cosine})"
+print(f"int8 round trip verified (cosine {cosine:.5f})")
+
+print("Testing hashing embedding provider...")
+from backend.core.embeddings import get_provider, HashingProvider
+
+provider = get_provider("hashing")
+assert isinstance(provider, HashingProvider)
+texts = ["Built REST APIs in Python and Docker", "Built REST APIs in Python and Docker", "Baked sourdough bread"]
+matrix = provider.encode(texts)
+assert matrix.shape == (3, provider.dim) and matrix.dtype == np.float32
+assert np.array_equal(matrix[0], matrix[1]), "Hashing embeddings must be deterministic"
+related = float(matrix[0] @ provider.encode(["Python APIs with Docker"])[0])
+unrelated = float(matrix[0] @ matrix[2])
+assert related > unrelated
+assert provider.embed([]) == []
+try:
+    get_provider("nonexistent")
+    raise AssertionError("Unknown provider should raise")
+except ValueError:
+    pass
+print("Hashing provider verified")
+
+print("\nAll tests passed.")
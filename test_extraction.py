@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+print("Testing PDF extraction...")
+from backend.core import extraction
+from backend.core.extraction import extract_text, extract_many, spool_upload, PDFTooLarge
+
+
+def make_pdf(pages):
+    """Builds a minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+pages = [f"Page {i} Built APIs in Python" for i in range(1, 7)]
+pdf = make_pdf(pages)
+
+text = extract_text(pdf, workers=0)
+assert text == "\n".join(pages) + "\n", repr(text)
+assert extract_text(pdf, mode="fast", workers=0).splitlines() == pages
+print("Inline extraction verified")
+
+# Force a small worker pool even on single-core machines. Forked workers: with
+# spawn/forkserver, every worker would re-run this (unguarded) script.
+extraction.PDF_WORKERS = 2
+extraction.PDF_START_METHOD = "fork"
+assert extract_text(pdf, workers=3) == text
+print("Page-parallel extraction verified")
+
+assert extract_text(pdf, max_pages=2, workers=0) == "\n".join(pages[:2]) + "\n"
+print("Page limit verified")
+
+results = extract_many([pdf, b"not a pdf", make_pdf(["Second resume"])])
+assert results[0] == text and results[1] is None and results[2] == "Second resume\n"
+print("Batch extraction verified")
+
+# A pool that breaks, or can't start at all (no POSIX semaphores on AWS
+# Lambda), falls back to inline extraction
+class BrokenPool:
+    def submit(self, *args):
+        raise extraction.BrokenProcessPool("worker killed")
+
+    map = submit
+
+    def shutdown(self, **kwargs):
+        pass
+
+extraction._pool = BrokenPool()
+assert extract_text(pdf, workers=2) == text and extraction._pool is None and not extraction._pool_disabled
+extraction._pool = BrokenPool()
+assert extract_many([pdf, pdf]) == [text, text]
+
+def no_semaphores(*args, **kwargs):
+    raise OSError(38, "Function not implemented")
+
+extraction.ProcessPoolExecutor = no_semaphores
+assert extract_text(pdf, workers=2) == text and extraction._pool_disabled
+assert extract_many([pdf, b"not a pdf"]) == [text, None]
+print("Inline fallback verified")
+
+
+class FakeUpload:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    async def read(self, size=-1):
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+
+spooled = asyncio.run(spool_upload(FakeUpload(pdf), threshold=256))
+assert spooled.path and os.path.exists(spooled.path) and spooled.size == len(pdf)
+assert extract_text(spooled, workers=0) == text
+spooled.close()
+assert spooled.path is None
+
+try:
+    asyncio.run(spool_upload(FakeUpload(pdf), max_bytes=100))
+    raise AssertionError("Byte limit not enforced")
+except PDFTooLarge:
+    pass
+print("Spooling and byte limit verified")
+
+print("\nAll tests passed.")
@@ -0,0 +1,49 @@
+print("Testing project idea store...")
+from backend.core import ideas
+
+single_calls, batch_calls = [], []
+
+def fake_single(skill, api_key, model_name):
+    single_calls.append(skill)
+    return f"Build a {skill} project"
+
+def fake_batch(skills, api_key, model_name):
+    batch_calls.append(list(skills))
+    # The model skips one skill
+    return {i: f"Build a {skill} project" for i, skill in enumerate(skills) if skill != "Rust"}
+
+ideas.generate_project_idea = fake_single
+ideas.generate_project_ideas = fake_batch
+
+assert ideas.normalize_skill("  Docker. ") == ideas.normalize_skill("DOCKER") == "docker"
+assert ideas.normalize_skill("K8s") == "kubernetes" and ideas.normalize_skill("Postgres") == "postgresql"
+
+idea, cached = ideas.get_project_idea("Docker", "dummy_key", "gemini-1.5-flash")
+assert (idea, cached) == ("Build a Docker project", False)
+idea, cached = ideas.get_project_idea(" docker ", "dummy_key", "gemini-1.5-flash")
+assert cached and idea == "Build a Docker project" and single_calls == ["Docker"]
+# Ideas are per model
+assert not ideas.get_project_idea("Docker", "dummy_key", "gemini-2.0-flash")[1]
+print("Normalized keys verified")
+
+single_calls.clear()
+results = ideas.get_project_ideas(["docker", "SQL", "k8s", "Kubernetes", "Rust", ""], "dummy_key", "gemini-1.5-flash")
+assert results[0]["cached"] and results[0]["idea"] == "Build a Docker project"
+assert batch_calls == [["SQL", "k8s", "Rust"]], f"Expected one batched call for uncached skills, got {batch_calls}"
+assert results[2]["idea"] == results[3]["idea"] == "Build a k8s project"
+assert results[4]["idea"] == "Build a Rust project" and single_calls == ["Rust"]
+assert results[5]["error"] == "Empty skill"
+assert all(r["cached"] for r in ideas.get_project_ideas(["sql", "RUST"], "dummy_key", "gemini-1.5-flash"))
+print("Batch API verified (1 call for 3 new skills, 1 retry for the skipped one)")
+
+batch_calls.clear()
+generated = ideas.warm_up("dummy_key", "gemini-1.5-flash", skills=["Go", "Golang", "SQL", "Spark"])
+assert generated == 3 and batch_calls == [["Go", "Spark"]]
+print("Warm-up verified")
+
+store = ideas.ResultCache(ttl=-1)
+ideas._store = store
+assert not ideas.get_project_idea("Docker", "dummy_key", "gemini-1.5-flash")[1], "Expired idea was served"
+print("TTL eviction verified")
+
+print("\nAll project idea tests passed.")
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+print("Testing inference worker pool...")
+from inference_pool import InferencePool
+from backend.core.embeddings import HashingProvider
+
+texts = [f"Built data pipeline number {i} in Python and Spark" for i in range(40)]
+expected = HashingProvider().encode(texts)
+
+# spaCy is not needed for encode requests
+with InferencePool(workers=2, provider_name="hashing", spacy=False, max_batch=16, max_wait_ms=20) as pool:
+    single = pool.encode(texts[:3])
+    assert single.shape == (3, 384) and np.allclose(single, expected[:3])
+    print("Blocking encode verified")
+
+    # Concurrent users, one text each: answers stay with their caller and share worker calls
+    pool.batches = 0
+    with ThreadPoolExecutor(max_workers=20) as users:
+        results = list(users.map(lambda text: pool.encode([text]), texts))
+    for i, result in enumerate(results):
+        assert np.allclose(result[0], expected[i]), f"Result {i} went to the wrong caller"
+    assert pool.batches < len(texts), f"No micro-batching ({pool.batches} worker calls for {len(texts)} requests)"
+    print(f"Micro-batching verified ({len(texts)} requests in {pool.batches} worker calls)")
+
+    async def encode_all():
+        return await asyncio.gather(*(pool.encode_async([text]) for text in texts[:10]))
+
+    results = asyncio.run(encode_all())
+    assert all(np.allclose(r[0], e) for r, e in zip(results, expected[:10]))
+    print("Async client API verified")
+
+print("Inference pool tests passed")
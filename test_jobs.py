@@ -0,0 +1,144 @@
+import os
+import tempfile
+import time
+
+print("Testing job registry...")
+from benchmarks import gemini_stub
+from backend.core import embeddings
+from backend.core.jobs import JobRegistry, EmbeddingMismatch
+from backend.core.nlp import embed_text
+
+gemini_stub.install()
+KEY = "stub-key"
+MODEL = "gemini-2.0-flash"
+
+stacks = ["Python Django PostgreSQL", "Go Kubernetes gRPC", "React TypeScript GraphQL", "Spark Airflow Kafka",
+          "Terraform AWS Linux", "Java Spring Redis"]
+jds = [f"Backend role. Must have {stack} experience in production systems." for stack in stacks]
+
+# A memory-only store smaller than the catalog: evicted jobs leave the index too
+registry = JobRegistry(max_size=3)
+for jd in jds:
+    registry.register(jd, KEY, MODEL)
+assert len(registry.index) == 3, f"Evicted jobs still indexed: {len(registry.index)}"
+query = embed_text(jds[-1], api_key=KEY)
+matches = registry.match(query, top_k=3)
+assert len(matches) == 3 and all(registry.get(job["job_id"]) for job, _ in matches)
+print("Eviction keeps the index in sync")
+
+# Jobs gone from the store without the index noticing are skipped, and the
+# search continues until top_k live jobs are found
+registry = JobRegistry()
+jobs = [registry.register(jd, KEY, MODEL) for jd in jds]
+ranked = [job_id for job_id, _ in registry.index.search(query, len(jds))]
+for job_id in ranked[:-1]:
+    registry._store._memory.pop(job_id)  # As if lost in a restart, without telling the index
+matches = [job["job_id"] for job, _ in registry.match(query, top_k=1)]
+assert matches == ranked[-1:], matches
+assert len(registry.index) < len(jds)  # Stale hits were dropped on the way
+print("Search skips stale entries and still returns top_k")
+
+# Expired jobs are dropped from the index
+registry = JobRegistry(ttl=0.2)
+for jd in jds[:2]:
+    registry.register(jd, KEY, MODEL)
+time.sleep(0.3)
+assert registry.match(query, top_k=5) == [] and len(registry.index) == 0
+print("Expired jobs removed from the index")
+
+# Switching embedding providers: the saved index is rebuilt, old profiles
+# must be registered again and mismatched queries are rejected
+workdir = tempfile.mkdtemp()
+paths = {"db_path": os.path.join(workdir, "jobs.db"), "index_path": os.path.join(workdir, "jobs")}
+gemini_registry = JobRegistry(provider="gemini", **paths)
+job = gemini_registry.register(jds[0], KEY, MODEL)
+assert job["embedding_provider"] == "gemini" and job["embedding_dim"] == gemini_stub.EMBEDDING_DIM
+
+previous, embeddings.EMBEDDING_PROVIDER = embeddings.EMBEDDING_PROVIDER, "hashing"
+try:
+    hashing_registry = JobRegistry(provider="hashing", **paths)
+    assert len(hashing_registry.index) == 0 and hashing_registry.index.space == "hashing"
+    assert not hashing_registry.compatible(hashing_registry.get(job["job_id"]))
+    rebuilt = hashing_registry.register(jds[0], KEY, MODEL)
+    assert rebuilt["embedding_provider"] == "hashing" and hashing_registry.compatible(rebuilt)
+    assert hashing_registry.index.dim == rebuilt["embedding_dim"] != gemini_stub.EMBEDDING_DIM
+    try:
+        hashing_registry.match(query, top_k=1)  # A Gemini-sized query
+        raise AssertionError("Mismatched query was accepted")
+    except EmbeddingMismatch:
+        pass
+    assert hashing_registry.match(embed_text(jds[0]), top_k=1)[0][0]["job_id"] == job["job_id"]
+finally:
+    embeddings.EMBEDDING_PROVIDER = previous
+print("Provider switch handled")
+
+# A failed JD sentence batch fails the registration instead of storing empty
+# rows that a later register() would return as they are
+from backend.core import nlp
+
+stub = gemini_stub.install()
+jd = "Platform role. Must have Terraform and AWS experience. Strong Linux skills are required."
+def failing_sentence_batch(api_key, content=None, **kwargs):
+    if content != [jd]:
+        raise RuntimeError("Gemini call failed after 4 attempts")
+    return stub.embed_content(api_key, content=content, **kwargs)
+registry = JobRegistry()
+nlp.embed_content = failing_sentence_batch
+try:
+    registry.register(jd, KEY, MODEL)
+    raise AssertionError("Registered a job without sentence embeddings")
+except ValueError:
+    pass
+finally:
+    nlp.embed_content = stub.embed_content
+assert len(registry.index) == 0
+job = registry.register(jd, KEY, MODEL)
+assert job["sentence_embeddings"] and all(job["sentence_embeddings"])
+
+# Profiles that already hold empty rows get their JD sentences embedded again
+broken = {**job, "sentence_embeddings": [[] for _ in job["sentences"]]}
+resume = "Built Terraform modules for AWS accounts. Ran Linux fleets with Ansible."
+assert (nlp.get_semantic_sentence_analysis(resume, jd, KEY, broken) ==
+        nlp.get_semantic_sentence_analysis(resume, jd, KEY, job))
+print("JD sentence embeddings are never stored empty")
+
+# The endpoints: register with the request's model, fetch, analyze against the
+# registered job by id, delete
+import backend.main
+from benchmarks.corpus import synthetic_pdf
+from fastapi.testclient import TestClient
+
+from core import nlp  # The modules backend.main uses
+
+api_stub = gemini_stub.install(package="core")
+models = []
+def recording_generate_content(api_key, model_name, prompt, **kwargs):
+    models.append(model_name)
+    return api_stub.generate_content(api_key, model_name, prompt, **kwargs)
+nlp.generate_content = recording_generate_content
+
+client = TestClient(backend.main.app)
+response = client.post("/api/jobs", data={"jd_text": jds[1], "api_key": KEY, "model_name": MODEL, "title": "Go"})
+assert response.status_code == 200, response.text
+summary = response.json()
+assert summary["model_name"] == MODEL and summary["title"] == "Go" and summary["required_skills"]
+assert models == [MODEL], models
+assert client.post("/api/jobs", data={"jd_text": jds[1], "api_key": KEY}).status_code == 422
+print("Jobs register with the requested model")
+
+assert client.get(f"/api/jobs/{summary['job_id']}").json()["job_id"] == summary["job_id"]
+data = {"job_id": summary["job_id"], "api_key": KEY, "model_name": MODEL}
+response = client.post("/api/analyze", data=data, files={"resume_file": ("resume.pdf", synthetic_pdf(), "application/pdf")})
+assert response.status_code == 200, response.text
+result = response.json()
+assert result["score"] is not None and result["missing_skills"] is not None
+assert client.post("/api/analyze", data={**data, "job_id": "missing"},
+                   files={"resume_file": ("resume.pdf", synthetic_pdf(), "application/pdf")}).status_code == 404
+print("Analysis by job_id works")
+
+assert client.delete(f"/api/jobs/{summary['job_id']}").json() == {"deleted": summary["job_id"]}
+assert client.get(f"/api/jobs/{summary['job_id']}").status_code == 404
+assert client.delete(f"/api/jobs/{summary['job_id']}").status_code == 404
+print("Deleted jobs are gone")
+
+print("\nAll job registry tests passed.")
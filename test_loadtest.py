@@ -0,0 +1,45 @@
+import asyncio
+
+print("Testing load-test harness...")
+from benchmarks.loadtest import (LoadContext, is_degraded, load_corpus, parse_mix, percentile, run_load, start_app,
+                                 start_fake_gemini, stream_error, summarize)
+
+assert percentile([], 50) is None
+assert percentile(list(range(1, 101)), 50) == 50 and percentile(list(range(1, 101)), 99) == 99
+assert percentile([3, 1, 2], 100) == 3 and percentile([5], 95) == 5
+assert parse_mix("analyze=3,generate-project") == {"analyze": 3.0, "generate-project": 1.0}
+assert stream_error('data: {"status": 503, "detail": "circuit open"}') == 503
+assert stream_error('{"event": "error", "data": {"status": 500, "detail": "boom"}}') == 500
+assert stream_error('data: {"text": "Led "}') is None and stream_error("event: token") is None
+assert is_degraded('{"score": 0.0, "degraded": ["llm_analysis"]}') and not is_degraded('{"degraded": []}')
+assert is_degraded('{"event": "summary", "data": {"degraded": ["role_fit"]}}') and not is_degraded("event: done")
+print("Percentiles, mix and response parsing verified")
+
+processes = []
+try:
+    # Quota of one request every two seconds and no retries: most calls must surface as 503s
+    fake, gemini_url = start_fake_gemini(latency=0.01, jitter=0.0, rate_limit=0.5)
+    processes.append(fake)
+    app, app_url = start_app(gemini_url, env={"GEMINI_MAX_RETRIES": "0", "GEMINI_QUEUE_TIMEOUT": "0"})
+    processes.append(app)
+
+    ctx = LoadContext(load_corpus(sizes=["short"], count=2), ["load-key"])
+    mix = parse_mix("generate-achievement=1,generate-achievement-stream=1")
+    samples, elapsed = asyncio.run(run_load(app_url, mix, ctx, concurrency=4, duration=2.0, probe_interval=0.1,
+                                            warmup=False))
+    report = summarize(samples, elapsed)
+finally:
+    for process in processes:
+        process.terminate()
+        process.wait(timeout=10)
+
+rows = report["endpoints"]
+assert set(rows) == {"generate-achievement", "generate-achievement-stream", "probe"}, rows
+assert report["requests"] == sum(rows[n]["requests"] for n in mix) > 4
+assert all(rows[n]["p50_ms"] <= rows[n]["p95_ms"] <= rows[n]["p99_ms"] <= rows[n]["max_ms"] for n in rows)
+assert rows["generate-achievement"]["errors"].get("503", 0) >= 1, rows["generate-achievement"]
+assert rows["probe"]["ok"] == rows["probe"]["requests"]
+assert 0 < report["error_rate"] < 1
+print(f"End-to-end run verified ({report['requests']} requests, error rate {report['error_rate']:.0%})")
+
+print("Load-test harness tests passed")
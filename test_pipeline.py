@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import time
+
+print("Testing concurrent analysis pipeline...")
+
+from backend.core import pipeline
+
+# Replace the Gemini-backed stages with slow local stand-ins
+def slow(value, delay=0.3):
+    def stage(*args):
+        time.sleep(delay)
+        return value
+    return stage
+
+pipeline.calculate_role_fit_score = slow(72.5)
+pipeline.analyze_skill_gaps = slow({"Docker"})
+pipeline.get_sentence_scores = slow([("Built APIs in Python", 0.8)])
+pipeline.get_semantic_sentence_analysis = slow({"score": 72.5, "sentence_scores": [("Built APIs in Python", 0.8)]})
+pipeline.get_sub_scores = slow({"Hard Skills": 80, "Soft Skills": 70, "Experience": 60, "Education": 90})
+pipeline.get_resume_analysis = slow({"missing_skills": ["Docker"],
+                                     "sub_scores": {"Hard Skills": 80, "Soft Skills": 70, "Experience": 60, "Education": 90}})
+
+resume = "Built APIs in Python. Led a team of five engineers."
+jd = "We need a Python engineer with Docker experience."
+
+start = time.perf_counter()
+result = asyncio.run(pipeline.run_analysis(resume, jd, "dummy_key", "gemini-2.0-flash-exp"))
+elapsed = time.perf_counter() - start
+
+assert result["score"] == 72.5
+assert result["missing_skills"] == ["Docker"]
+assert result["sub_scores"]["Hard Skills"] == 80
+# Four 0.3s stages in parallel should take ~0.3s, not ~1.2s
+assert elapsed < 0.9, f"Stages did not run concurrently ({elapsed:.2f}s)"
+print(f"Concurrent stages verified: {elapsed:.2f}s")
+
+print("Testing stage timeout fallback...")
+pipeline.get_resume_analysis = slow({"missing_skills": [], "sub_scores": {"Hard Skills": 1}}, delay=1.0)
+result = asyncio.run(pipeline.run_analysis(resume, jd, "dummy_key", "gemini-2.0-flash-exp", timeout=0.5))
+# Sections a stage could not produce are null, not made-up scores
+assert result["sub_scores"] is None and result["missing_skills"] is None
+assert result["score"] == 72.5
+assert result["degraded"] == ["llm_analysis"]
+print("Timeout fallback verified")
+
+def failing(*args):
+    raise RuntimeError("Gemini unavailable")
+
+# With a registered job, skill gaps and sub-scores are separate stages
+pipeline.analyze_skill_gaps = failing
+job = {"jd_text": jd, "required_skills": ["Docker"]}
+result = asyncio.run(pipeline.run_analysis(resume, jd, "dummy_key", "gemini-2.0-flash-exp", job=job))
+assert result["degraded"] == ["skill_gaps"], result["degraded"]
+assert result["missing_skills"] is None and result["sub_scores"]["Hard Skills"] == 80
+print("Failed stage marked as degraded")
+
+# An abandoned stage's Gemini calls stop retrying at the stage deadline
+# instead of holding the worker thread
+from backend.core.scheduler import GeminiScheduler
+
+class Overloaded(Exception):
+    code = 503
+
+scheduler = GeminiScheduler(rate=100, burst=100, max_retries=100, backoff_base=0.1, backoff_max=0.1,
+                            breaker_threshold=1000)
+attempts = []
+def overloaded():
+    attempts.append(1)
+    raise Overloaded("model overloaded")
+stopped = []
+def retrying_stage():
+    try:
+        scheduler.call("key", overloaded)
+    finally:
+        stopped.append(time.perf_counter())
+
+async def abandon():
+    start = time.perf_counter()
+    result = await pipeline.run_stage("sub_scores", retrying_stage, timeout=0.3)
+    await asyncio.sleep(0.3)
+    return start, result
+start, result = asyncio.run(abandon())
+assert result is None and stopped and stopped[0] - start < 0.5, "Stage kept retrying after its deadline"
+assert len(attempts) < 10
+print("Abandoned stage stops retrying")
+
+print("Testing structured analysis parsing...")
+from backend.core import genai
+
+calls = []
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+def fake_generate(api_key, model_name, prompt, hedge=False, generation_config=None):
+    calls.append((model_name, generation_config))
+    return Response('{"missing_skills": ["Docker", "docker", " Kubernetes "], '
+                    '"sub_scores": {"hard_skills": 80, "soft_skills": 70.4, "experience": 60, "education": 90}}')
+
+genai.generate_content = fake_generate
+# Without a key there is nothing to grade with: an error (so the stage is degraded), not zeros
+for without_key in (genai.get_sub_scores, genai.get_resume_analysis):
+    try:
+        without_key(resume, jd, "", "gemini-1.5-flash")
+        raise AssertionError(f"{without_key.__name__} graded without an API key")
+    except ValueError:
+        pass
+
+analysis = genai.get_resume_analysis(resume, jd, "dummy_key", "gemini-1.5-flash")
+assert analysis["missing_skills"] == ["Docker", "Kubernetes"]
+assert analysis["sub_scores"] == {"Hard Skills": 80, "Soft Skills": 70, "Experience": 60, "Education": 90}
+assert analysis["context_tokens"]["resume"] > 0
+assert len(calls) == 1 and calls[0][0] == "gemini-1.5-flash", "Expected one call with the requested model"
+assert calls[0][1]["response_schema"] is genai.ANALYSIS_SCHEMA
+
+for bad in ['```json\n{}\n```', '[]', '{"missing_skills": "Docker", "sub_scores": {}}',
+            '{"missing_skills": [], "sub_scores": {"hard_skills": 120, "soft_skills": 1, "experience": 1, "education": 1}}',
+            '{"missing_skills": [], "sub_scores": {"hard_skills": true, "soft_skills": 1, "experience": 1, "education": 1}}']:
+    genai.generate_content = lambda *args, **kwargs: Response(bad)
+    try:
+        genai.get_resume_analysis(resume, jd, "dummy_key")
+        raise AssertionError(f"Accepted invalid response: {bad}")
+    except ValueError:
+        pass
+print("Strict parser verified")
+
+print("Testing single-flight coalescing...")
+from backend.core.singleflight import SingleFlight
+
+calls = []
+
+async def compute():
+    calls.append(1)
+    await asyncio.sleep(0.1)
+    return {"score": 42}
+
+async def burst():
+    flight = SingleFlight()
+    key = pipeline.analysis_key(hashlib.sha256(b"%PDF-1.4").hexdigest(), jd, "gemini-2.0-flash-exp")
+    results = await asyncio.gather(*(flight.do(key, compute) for _ in range(5)))
+    assert len(flight) == 0
+    return results
+
+results = asyncio.run(burst())
+assert len(calls) == 1, f"Expected one computation, got {len(calls)}"
+assert all(r == {"score": 42} for r in results)
+assert pipeline.analysis_key("a", "bc", "m") != pipeline.analysis_key("ab", "c", "m")
+print("Single-flight verified: 5 requests, 1 computation")
+
+print("Testing result cache...")
+import os
+import tempfile
+from backend.core.cache import ResultCache
+
+db_path = os.path.join(tempfile.mkdtemp(), "cache.db")
+cache = ResultCache(max_size=2, ttl=60, db_path=db_path)
+cache.set("a", {"score": 1})
+cache.set("b", {"score": 2})
+cache.set("c", {"score": 3})  # Evicts "a" from memory
+assert len(cache) == 2
+assert cache.get("c") == {"score": 3}
+assert cache.get("a") == {"score": 1}  # Served from the disk tier
+assert cache.get("missing") is None
+stats = cache.stats()
+assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+cache.set("expired", {"score": 0}, ttl=-1)
+assert cache.get("expired") is None
+
+# A fresh instance on the same file survives a "restart"
+assert ResultCache(db_path=db_path).get("b") == {"score": 2}
+assert pipeline.analysis_key("pdf", "Python  engineer\n", "m") == pipeline.analysis_key("pdf", "Python engineer", "m")
+print("Result cache verified")
+
+print("\nAll tests passed.")
@@ -0,0 +1,100 @@
+print("Testing batch ranking...")
+import backend.main
+from benchmarks import gemini_stub
+from benchmarks.corpus import make_pdf, synthetic_pdf
+from fastapi.testclient import TestClient
+
+stub = gemini_stub.install(package="core")  # The modules backend.main uses
+client = TestClient(backend.main.app)
+KEY = "stub-key"
+MODEL = "gemini-2.0-flash"
+
+jd = ("Data Engineer. Must have 5+ years of experience with Spark, Kafka and Airflow in production. "
+      "Strong knowledge of data pipelines and streaming is required.")
+strong = ["Data Engineer", "Built Spark and Kafka data pipelines orchestrated with Airflow in production.",
+          "Led streaming pipelines processing 2B events a day with Kafka and Spark."]
+medium = ["Backend Engineer", "Built Python services with PostgreSQL.",
+          "Maintained Kafka data pipelines in production for the billing service."]
+weak = ["Pastry Chef", "Baked croissants and sourdough for a busy bakery.", "Managed the weekend brunch menu."]
+
+
+def pdf(name, content):
+    return ("resume_files", (name, content, "application/pdf"))
+
+
+def rank(files, **fields):
+    data = {"jd_text": jd, "api_key": KEY, "model_name": MODEL, **fields}
+    return client.post("/api/rank", data=data, files=files)
+
+
+# Best match first, ranks numbered from 1, unreadable files listed separately
+response = rank([pdf("weak.pdf", make_pdf(weak)), pdf("strong.pdf", make_pdf(strong)),
+                 pdf("medium.pdf", make_pdf(medium)), pdf("broken.pdf", b"not a pdf"),
+                 pdf("blank.pdf", make_pdf([]))])
+assert response.status_code == 200, response.text
+result = response.json()
+ranked = result["ranked"]
+assert [entry["filename"] for entry in ranked] == ["strong.pdf", "medium.pdf", "weak.pdf"], ranked
+assert [entry["rank"] for entry in ranked] == [1, 2, 3]
+assert ranked[0]["similarity"] > ranked[1]["similarity"] > ranked[2]["similarity"]
+assert sorted(result["unreadable"]) == ["blank.pdf", "broken.pdf"], result["unreadable"]
+assert result["unscored"] == []
+assert all("sub_scores" not in entry for entry in ranked)  # No shortlist requested
+print("Resumes ranked by similarity")
+
+# Duplicate filenames stay separate entries with their own scores
+response = rank([pdf("resume.pdf", make_pdf(weak)), pdf("resume.pdf", make_pdf(strong))])
+ranked = response.json()["ranked"]
+assert [entry["filename"] for entry in ranked] == ["resume.pdf", "resume.pdf"]
+assert ranked[0]["similarity"] > ranked[1]["similarity"]
+assert ranked[0]["recruiter_metrics"] != ranked[1]["recruiter_metrics"]
+print("Duplicate filenames kept apart")
+
+# Only the top_n_details shortlist gets the LLM stages
+calls = stub.calls["generate"]
+response = rank([pdf(f"resume{seed}.pdf", synthetic_pdf("short", seed)) for seed in range(4)], top_n_details=2)
+ranked = response.json()["ranked"]
+detailed = [entry for entry in ranked if "sub_scores" in entry]
+assert detailed == ranked[:2], ranked
+assert all(entry["sub_scores"] and entry["missing_skills"] is not None and entry["degraded"] == []
+           for entry in detailed)
+assert stub.calls["generate"] > calls
+print("Details only for the shortlist")
+
+# Resumes whose embedding failed are not ranked as zeros: they come back
+# unscored, and if none could be embedded the request fails
+from core import nlp
+from core.scheduler import GeminiUnavailable
+
+def failing_resume_embeddings(api_key, content=None, **kwargs):
+    if content != [jd]:
+        raise GeminiUnavailable("Gemini call failed after 4 attempts")
+    return stub.embed_content(api_key, content=content, **kwargs)
+
+gemini_stub.reset_embedding_cache("core")
+assert rank([pdf("strong.pdf", make_pdf(strong))]).status_code == 200  # Cached from now on
+nlp.embed_content = failing_resume_embeddings
+try:
+    response = rank([pdf("weak.pdf", make_pdf(weak)), pdf("strong.pdf", make_pdf(strong))])
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [(entry["filename"], entry["rank"]) for entry in result["ranked"]] == [("strong.pdf", 1)]
+    assert [(entry["filename"], entry["score"]) for entry in result["unscored"]] == [("weak.pdf", None)]
+    response = rank([pdf("weak.pdf", make_pdf(weak)), pdf("medium.pdf", make_pdf(medium))])
+    assert response.status_code == 503, response.text
+finally:
+    nlp.embed_content = stub.embed_content
+print("Resumes without embeddings left unscored")
+
+# Requests over MAX_RANK_FILES are refused before any work
+previous, backend.main.MAX_RANK_FILES = backend.main.MAX_RANK_FILES, 2
+try:
+    calls = dict(stub.calls)
+    response = rank([pdf(f"resume{seed}.pdf", synthetic_pdf("short", seed)) for seed in range(3)])
+    assert response.status_code == 400 and "At most 2" in response.json()["detail"], response.text
+    assert stub.calls == calls
+finally:
+    backend.main.MAX_RANK_FILES = previous
+print("File cap enforced")
+
+print("\nAll ranking tests passed.")
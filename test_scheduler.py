@@ -0,0 +1,190 @@
+import threading
+import time
+
+print("Testing Gemini call scheduler...")
+from backend.core.scheduler import GeminiScheduler, GeminiUnavailable, TokenBucket
+
+
+class QuotaError(Exception):
+    # Stands in for google.api_core.exceptions.ResourceExhausted
+    code = 429
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+def flaky(failures, value="ok"):
+    calls = []
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise QuotaError("quota exceeded")
+        return value
+    return func, calls
+
+
+bucket = TokenBucket(rate=20, capacity=2)
+start = time.perf_counter()
+assert all(bucket.acquire(1) for _ in range(4))
+elapsed = time.perf_counter() - start
+assert 0.07 < elapsed < 0.5, f"Token bucket did not pace requests ({elapsed:.3f}s)"
+empty = TokenBucket(rate=0.1, capacity=1)
+empty.acquire(0)
+assert not empty.acquire(0.05), "Acquired a token that was not there"
+print(f"Token bucket verified (4 requests at burst 2 / 20 per s in {elapsed:.3f}s)")
+
+scheduler = GeminiScheduler(rate=100, burst=100, max_retries=3, backoff_base=0.01, backoff_max=0.05,
+                            breaker_threshold=10)
+func, calls = flaky(2)
+assert scheduler.call("key", func) == "ok" and len(calls) == 3
+assert scheduler.stats()["retries"] == 2
+print("Retries with backoff verified")
+
+func, calls = flaky(0)
+def bad_request():
+    calls.append(1)
+    raise BadRequest("invalid argument")
+try:
+    scheduler.call("key", bad_request)
+    raise AssertionError("Expected BadRequest")
+except BadRequest:
+    pass
+assert len(calls) == 1, "Non-retryable errors must not be retried"
+
+func, calls = flaky(100)
+try:
+    scheduler.call("key", func)
+    raise AssertionError("Expected GeminiUnavailable")
+except GeminiUnavailable:
+    pass
+assert len(calls) == 4
+print("Retry exhaustion raises GeminiUnavailable instead of returning a fake value")
+
+import requests
+
+for error in (requests.exceptions.ConnectionError("connection refused"),
+              requests.exceptions.ReadTimeout("read timed out")):
+    network = GeminiScheduler(rate=100, burst=100, max_retries=1, backoff_base=0.01, breaker_threshold=2,
+                              breaker_reset=60)
+    calls = []
+    def unreachable():
+        calls.append(1)
+        raise error
+    try:
+        network.call("key", unreachable)
+        raise AssertionError("Expected GeminiUnavailable")
+    except GeminiUnavailable:
+        pass
+    assert len(calls) == 2, f"{type(error).__name__} was not retried"
+    assert network.breaker("key").state == "open", "Network failures must open the circuit"
+
+def broken():
+    raise TypeError("bug in the caller")
+unrelated = GeminiScheduler(rate=100, burst=100, max_retries=0, breaker_threshold=2)
+func, calls = flaky(100)
+try:
+    unrelated.call("key", func)
+except GeminiUnavailable:
+    pass
+try:
+    unrelated.call("key", broken)
+except TypeError:
+    pass
+assert unrelated.breaker("key").failures == 1, "Errors without an HTTP status must not reset the breaker"
+print("REST transport network errors retried and counted by the breaker")
+
+breaker = GeminiScheduler(rate=100, burst=100, max_retries=0, breaker_threshold=2, breaker_reset=0.2)
+func, calls = flaky(100)
+for _ in range(2):
+    try:
+        breaker.call("key", func)
+    except GeminiUnavailable:
+        pass
+try:
+    breaker.call("key", func)
+    raise AssertionError("Circuit did not open")
+except GeminiUnavailable as e:
+    assert "circuit open" in str(e)
+assert len(calls) == 2, "Open circuit still called Gemini"
+assert breaker.call("other-key", lambda: "ok") == "ok", "Circuits must be per API key"
+time.sleep(0.25)
+assert breaker.call("key", lambda: "recovered") == "recovered"
+assert breaker.breaker("key").state == "closed"
+print("Circuit breaker verified (opens, isolates keys, recovers after reset)")
+
+from backend.core.scheduler import run_with_deadline
+
+patient = GeminiScheduler(rate=100, burst=100, max_retries=10, backoff_base=0.05, backoff_max=0.05,
+                          breaker_threshold=100)
+func, calls = flaky(100)
+start = time.perf_counter()
+try:
+    patient.call("key", func, deadline=time.monotonic() + 0.2)
+    raise AssertionError("Expected GeminiUnavailable")
+except GeminiUnavailable:
+    pass
+assert time.perf_counter() - start < 0.3 and len(calls) < 11, "Retried past the deadline"
+func, calls = flaky(0)
+try:
+    run_with_deadline(time.monotonic() - 1, patient.call, "key", func)
+    raise AssertionError("Expected GeminiUnavailable")
+except GeminiUnavailable as e:
+    assert "deadline" in str(e)
+assert calls == [], "Called Gemini after the caller's deadline"
+queued = GeminiScheduler(rate=0.01, burst=1, queue_timeout=10)
+queued.call("key", lambda: "ok")
+start = time.perf_counter()
+try:
+    run_with_deadline(time.monotonic() + 0.1, queued.call, "key", lambda: "ok")
+    raise AssertionError("Expected GeminiUnavailable")
+except GeminiUnavailable:
+    pass
+assert time.perf_counter() - start < 0.5, "Queued past the deadline"
+seen = []
+patient.call("key", lambda request_options: seen.append(request_options["timeout"]),
+             request_options={"timeout": 20}, deadline=time.monotonic() + 1)
+assert 0 < seen[0] <= 1, f"Request timeout not capped at the deadline: {seen[0]}"
+print("Calls stop queueing and retrying at the caller's deadline")
+
+limited = GeminiScheduler(rate=0.01, burst=1, queue_timeout=0.05)
+assert limited.call("key", lambda: "ok") == "ok"
+try:
+    limited.call("key", lambda: "ok")
+    raise AssertionError("Rate limit not enforced")
+except GeminiUnavailable as e:
+    assert "rate limit" in str(e)
+print("Per-key rate limit verified")
+
+in_flight, peak = [0], [0]
+lock = threading.Lock()
+def tracked():
+    with lock:
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+    time.sleep(0.05)
+    with lock:
+        in_flight[0] -= 1
+bounded = GeminiScheduler(rate=1000, burst=1000, max_concurrency=3)
+threads = [threading.Thread(target=bounded.call, args=(f"key{i}", tracked)) for i in range(12)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert peak[0] == 3, f"Expected at most 3 calls in flight, saw {peak[0]}"
+print("Bounded concurrency verified")
+
+hedged = GeminiScheduler(rate=100, burst=100, hedge_after=0.05)
+attempts = []
+def slow_then_fast():
+    attempts.append(1)
+    time.sleep(1.0 if len(attempts) == 1 else 0.01)
+    return len(attempts)
+start = time.perf_counter()
+assert hedged.call("key", slow_then_fast, hedge=True) == 2
+elapsed = time.perf_counter() - start
+assert elapsed < 0.5, f"Hedged request did not cut the tail ({elapsed:.2f}s)"
+assert hedged.stats()["hedged"] == 1
+print(f"Hedged request verified ({elapsed:.2f}s instead of 1s)")
+
+print("\nAll scheduler tests passed.")
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+
+print("Testing SSE token streaming...")
+import backend.main
+from core import genai, ideas  # The modules backend.main uses
+from core.scheduler import GeminiUnavailable
+from core.streaming import iterate_in_thread
+from fastapi.testclient import TestClient
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            # Like the SDK for a chunk without text parts
+            raise ValueError("no text")
+        return self._text
+
+
+class FakeStream:
+    def __init__(self, texts):
+        self.texts = texts
+        self.cancelled = False
+        self._iterator = self
+
+    def __iter__(self):
+        return (FakeChunk(t) for t in self.texts)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+streams = []
+
+def fake_stream_content(api_key, model_name, prompt, **kwargs):
+    streams.append(FakeStream(["Led ", None, "a team of 5 ", "to cut costs 20%."]))
+    return streams[-1]
+
+genai.stream_content = fake_stream_content
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+
+client = TestClient(backend.main.app)
+form = {"bullet_point": "Managed a team", "job_title": "Manager", "api_key": "k", "model_name": "gemini-2.0-flash"}
+response = client.post("/api/generate-achievement/stream", data=form)
+assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+parsed = events(response)
+assert [e for e, _ in parsed] == ["token", "token", "token", "done"], parsed
+assert parsed[-1][1]["text"] == "Led a team of 5 to cut costs 20%."
+assert streams[-1].cancelled  # Closed after the last chunk as well
+print("Token and done events verified")
+
+# Project ideas: streamed once, then served from the store as a single token
+ideas._store.clear()
+form = {"skill": "Kafka", "api_key": "k", "model_name": "gemini-2.0-flash"}
+first = events(client.post("/api/generate-project/stream", data=form))
+second = events(client.post("/api/generate-project/stream", data=form))
+assert len(first) == 4 and len(second) == 2 and len(streams) == 2
+assert first[-1] == second[-1] == ("done", {"text": "Led a team of 5 to cut costs 20%."})
+print("Cached project idea streaming verified")
+
+# A failure before the first token still gets a status code
+def unavailable(*args, **kwargs):
+    raise GeminiUnavailable("circuit open")
+
+genai.stream_content = unavailable
+response = client.post("/api/generate-project/stream", data={**form, "skill": "Rust"})
+assert response.status_code == 503, response.text
+print("Early failure status verified")
+
+# The producer stops and closes the iterator when the consumer goes away
+closed = threading.Event()
+
+def slow_tokens():
+    try:
+        for i in range(1000):
+            time.sleep(0.01)
+            yield str(i)
+    finally:
+        closed.set()
+
+async def read_two():
+    chunks = iterate_in_thread(slow_tokens)
+    received = [await anext(chunks), await anext(chunks)]
+    await chunks.aclose()
+    return received
+
+assert asyncio.run(read_two()) == ["0", "1"]
+assert closed.wait(1), "Producer kept running after the consumer stopped"
+print("Cancellation on disconnect verified")
+
+print("Testing progressive analysis...")
+from core import pipeline, utils
+
+def stage(value, delay):
+    def run(*args):
+        time.sleep(delay)
+        return value
+    return run
+
+utils.extract_text_from_pdf_bytes = lambda pdf: "Built REST APIs in Python and deployed them with Docker."
+pipeline.SENTENCE_SCORING = "lexical"
+pipeline.calculate_role_fit_score = stage(72.5, 0.05)
+pipeline.get_sentence_scores = stage([("Built REST APIs in Python", 0.8)], 0.15)
+pipeline.get_resume_analysis = stage({"missing_skills": ["Kubernetes"], "sub_scores": {"Hard Skills": 80, "Soft Skills": 70, "Experience": 60, "Education": 90},
+                                      "context_tokens": {"resume": 20, "jd": 10}}, 0.4)
+
+form = {"jd_text": "Python engineer with Docker and Kubernetes", "api_key": "k", "model_name": "gemini-2.0-flash"}
+files = {"resume_file": ("resume.pdf", b"%PDF-1.4 progressive", "application/pdf")}
+response = client.post("/api/analyze/stream", data=form, files=files)
+assert response.status_code == 200, response.text
+parsed = events(response)
+assert [e for e, _ in parsed] == ["recruiter_metrics", "fit_score", "heatmap", "skill_gaps", "sub_scores", "summary"], parsed
+summary = parsed[-1][1]
+assert summary["score"] == 72.5 and summary["missing_skills"] == ["Kubernetes"] and not summary["degraded"]
+for _, data in parsed[:-1]:
+    assert all(summary[k] == v for k, v in data.items())
+print("Sections emitted fastest first, then the summary")
+
+# The finished analysis was cached: replayed at once, here as NDJSON
+start = time.perf_counter()
+response = client.post("/api/analyze/stream", data={**form, "format": "ndjson"}, files=files)
+lines = [json.loads(line) for line in response.text.splitlines()]
+assert response.headers["content-type"].startswith("application/x-ndjson")
+assert time.perf_counter() - start < 0.3 and lines[-1] == {"event": "summary", "data": summary}
+assert {line["event"] for line in lines} == {e for e, _ in parsed}
+print("Cached replay and NDJSON format verified")
+
+# A double-clicked "Analyze" runs the analysis once; the second stream replays it
+calls = []
+analysis = pipeline.get_resume_analysis
+def counted(*args):
+    calls.append(args)
+    return analysis(*args)
+pipeline.get_resume_analysis = counted
+
+files = {"resume_file": ("resume.pdf", b"%PDF-1.4 double click", "application/pdf")}
+with TestClient(backend.main.app) as shared:  # One event loop for both requests
+    results = [None, None]
+    def post(i):
+        results[i] = events(shared.post("/api/analyze/stream", data=form, files=files))
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    for t in threads:
+        t.join()
+assert len(calls) == 1, f"Analysis ran {len(calls)} times"
+assert results[0][-1] == results[1][-1] and results[0][-1][0] == "summary"
+assert {e for e, _ in results[0]} == {e for e, _ in results[1]}
+print("Concurrent identical streams coalesced")
+
+response = client.post("/api/analyze/stream", data={**form, "format": "xml"}, files=files)
+assert response.status_code == 400
+print("Streaming tests passed")
@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+import numpy as np
+
+print("Testing similarity kernels...")
+from backend.core.similarity import cosine, cosine_matrix, max_per_row, top_k
+from backend.core.vector_index import VectorIndex
+
+rng = np.random.default_rng(42)
+vectors = rng.standard_normal((300, 64)).astype(np.float32)
+
+sims = cosine_matrix(vectors[:20], vectors[:50])
+assert sims.shape == (20, 50) and sims.dtype == np.float32
+expected = float(vectors[3] @ vectors[7] / (np.linalg.norm(vectors[3]) * np.linalg.norm(vectors[7])))
+assert abs(cosine(vectors[3], vectors[7]) - expected) < 1e-5
+best, cols = max_per_row(sims)
+assert np.allclose(best, 1.0, atol=1e-5) and (cols == np.arange(20)).all()
+assert list(top_k(np.array([0.1, 0.9, 0.5, 0.7]), 2)) == [1, 3]
+assert cosine_matrix(np.zeros((0, 64)), vectors).shape == (0, 300)
+assert cosine([0.0, 0.0], [1.0, 0.0]) == 0.0
+print("Similarity kernels verified")
+
+index = VectorIndex(approx_threshold=10_000)
+for i, vector in enumerate(vectors):
+    index.add(f"job-{i}", vector)
+
+# A slightly perturbed copy of a stored vector should come back first
+query = vectors[17] + 0.01 * rng.standard_normal(64).astype(np.float32)
+results = index.search(query, k=5)
+assert results[0][0] == "job-17", results[0]
+assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+print("Exact search verified")
+
+assert index.remove("job-17")
+assert not index.remove("job-17")
+assert "job-17" not in index and len(index) == 299
+assert all(job_id != "job-17" for job_id, _ in index.search(query, k=5))
+print("Delete verified")
+
+path = os.path.join(tempfile.mkdtemp(), "jobs")
+index.save(path)
+restored = VectorIndex.load(path)
+assert len(restored) == 299
+assert restored.search(vectors[3], k=1)[0][0] == "job-3"
+print("Persistence verified")
+
+print("Testing approximate (IVF) search...")
+approx = VectorIndex(approx_threshold=200, nprobe=4)
+for i, vector in enumerate(vectors):
+    approx.add(f"job-{i}", vector)
+assert approx._centroids is not None, "IVF layer was not trained"
+hits = sum(approx.search(vectors[i], k=1)[0][0] == f"job-{i}" for i in range(0, 300, 10))
+assert hits >= 28, f"IVF recall too low: {hits}/30"
+approx.save(path)
+assert VectorIndex.load(path, approx_threshold=200)._centroids is not None
+print(f"IVF search verified (recall@1 {hits}/30)")
+
+print("\nAll tests passed.")
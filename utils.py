@@ -1,15 +1,11 @@
-import pdfplumber
+from backend.core.extraction import extract_text
 
 def extract_text_from_pdf(pdf_file):
     """
-    Extracts text from a PDF file using pdfplumber.
+    Extracts text from a PDF file using pdfplumber (see backend/core/extraction.py).
     """
-    text = ""
     try:
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
+        return extract_text(pdf_file)
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return None
-    return text